@@ -4,12 +4,25 @@ from typing import Any
 
 import uvicorn
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.security import OAuth2AuthorizationCodeBearer
 
-from auth.validator import initialise_token_validator
+from auth.validator import shutdown_token_validator, start_token_validator
 from error_handling import add_error_handlers
+from external.kubernetes import initialise_kubernetes_client, shutdown_kubernetes_client
+from features.compression.middleware import CompressionMiddleware
+from features.graph.informers import start_informers, stop_informers
+from features.graph.rate_limit import (
+    initialise_run_rate_limiter,
+    shutdown_run_rate_limiter,
+)
 from features.graph.router import router as graph_router
 from features.health.router import router as health_router
+from features.metrics.middleware import RequestMetricsMiddleware
+from features.metrics.router import router as metrics_router
+from features.profiling.middleware import ProfilingMiddleware
+from features.profiling.router import router as profiling_router
+from features.tracing.middleware import TracingMiddleware
 from settings import settings
 
 logger = logging.getLogger(__name__)
@@ -17,14 +30,21 @@ logger = logging.getLogger(__name__)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> Any:
-    logger.info("Fetching OIDC config...")
-    initialise_token_validator()
-    logger.info("...Fetched OIDC config")
+    logger.info("Fetching OIDC config in background...")
+    start_token_validator()
+    initialise_kubernetes_client()
+    start_informers()
+    initialise_run_rate_limiter()
     yield
+    await shutdown_run_rate_limiter()
+    await stop_informers()
+    await shutdown_kubernetes_client()
+    await shutdown_token_validator()
 
 
 app = FastAPI(
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
     swagger_ui_init_oauth={
         "clientId": settings.AUTH_CLIENT_ID,
         "scopes": "openid profile email",
@@ -33,9 +53,23 @@ app = FastAPI(
     },
 )
 
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.RESPONSE_GZIP_MIN_BYTES,
+    gzip_level=settings.RESPONSE_GZIP_LEVEL,
+    brotli_quality=settings.RESPONSE_BROTLI_QUALITY,
+)
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(TracingMiddleware)
+if settings.METRICS_ENABLED:
+    # Added last so it is outermost, timing compression too
+    app.add_middleware(RequestMetricsMiddleware)
 add_error_handlers(app)
 app.include_router(health_router)
+if settings.METRICS_ENABLED:
+    app.include_router(metrics_router)
 app.include_router(graph_router)
+app.include_router(profiling_router)
 
 if __name__ == "__main__" and settings.DEBUG_MODE:
     uvicorn.run("app:app", host="localhost", port=8080, reload=True)
@@ -1,8 +1,13 @@
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
-from starlette.status import HTTP_400_BAD_REQUEST, HTTP_403_FORBIDDEN
+from fastapi.responses import ORJSONResponse
+from starlette.status import (
+    HTTP_400_BAD_REQUEST,
+    HTTP_403_FORBIDDEN,
+    HTTP_503_SERVICE_UNAVAILABLE,
+)
 
 from .errors import (
+    AuthNotReadyError,
     InsufficientPermissionsError,
     InvalidTokenError,
     TokenDecodingError,
@@ -15,16 +20,24 @@ def include_error_handlers(app: FastAPI) -> None:
     def handle_insufficient_permissions_error(
         request: Request, exc: InsufficientPermissionsError
     ):
-        return JSONResponse({"detail": str(exc)}, status_code=HTTP_403_FORBIDDEN)
+        return ORJSONResponse({"detail": str(exc)}, status_code=HTTP_403_FORBIDDEN)
 
     @app.exception_handler(TokenDecodingError)
     def handle_invalid_token_error(request: Request, exc: TokenDecodingError):
-        return JSONResponse({"detail": str(exc)}, status_code=HTTP_400_BAD_REQUEST)
+        return ORJSONResponse({"detail": str(exc)}, status_code=HTTP_400_BAD_REQUEST)
 
     @app.exception_handler(TokenExpiredError)
     def handle_expired_token_error(request: Request, exc: TokenExpiredError):
-        return JSONResponse({"detail": str(exc)}, status_code=HTTP_403_FORBIDDEN)
+        return ORJSONResponse({"detail": str(exc)}, status_code=HTTP_403_FORBIDDEN)
 
     @app.exception_handler(InvalidTokenError)
     def handle_invalid_token(request: Request, exc: InvalidTokenError):
-        return JSONResponse({"detail": str(exc)}, status_code=HTTP_403_FORBIDDEN)
+        return ORJSONResponse({"detail": str(exc)}, status_code=HTTP_403_FORBIDDEN)
+
+    @app.exception_handler(AuthNotReadyError)
+    def handle_auth_not_ready(request: Request, exc: AuthNotReadyError):
+        return ORJSONResponse(
+            {"detail": str(exc)},
+            status_code=HTTP_503_SERVICE_UNAVAILABLE,
+            headers={"Retry-After": "1"},
+        )
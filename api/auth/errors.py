@@ -33,6 +33,19 @@ class InvalidTokenError(AuthenticationErrors):
         super().__init__(f"Invalid token provided")
 
 
+class UnknownKeyIdError(InvalidTokenError):
+    """Token was signed with a key not in the current JWKS"""
+
+    pass
+
+
+class AuthNotReadyError(AuthenticationErrors):
+    """Signing keys have not been fetched from the IdP yet"""
+
+    def __init__(self) -> None:
+        super().__init__("Authentication is initialising, please retry shortly")
+
+
 class NoAuthorizationHeaderInRequestError(AuthenticationErrors):
     """Error if no authorization is in the request headers"""
 
@@ -0,0 +1,106 @@
+import asyncio
+import logging
+import time
+from typing import Any, Callable, cast
+
+import httpx
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class JWKSClient:
+    """Fetches the JWKS advertised by an OIDC discovery document"""
+
+    def __init__(
+        self,
+        oidc_config_url: str,
+        http_client: httpx.AsyncClient,
+        jwks_uri: str | None = None,
+    ) -> None:
+        self._oidc_config_url = oidc_config_url
+        self._http_client = http_client
+        # Skips the discovery round trip when known up front
+        self._jwks_uri = jwks_uri
+
+    async def fetch_jwks(self) -> dict[str, Any]:
+        if self._jwks_uri is None:
+            oidc_config = await self._get_json(self._oidc_config_url)
+            self._jwks_uri = cast(str, oidc_config["jwks_uri"])
+        return await self._get_json(self._jwks_uri)
+
+    async def aclose(self) -> None:
+        await self._http_client.aclose()
+
+    async def _get_json(self, url: str) -> dict[str, Any]:
+        response = await self._http_client.get(url)
+        response.raise_for_status()
+        return cast(dict[str, Any], response.json())
+
+
+class JWKSRefresher:
+    """Keeps the JWKS up to date in the background
+
+    Refreshes on a fixed interval, and on demand when a token signed with an
+    unknown kid arrives. On-demand refreshes are serialised and rate limited
+    so a burst of such tokens results in at most one request to the IdP.
+    """
+
+    def __init__(
+        self,
+        jwks_client: JWKSClient,
+        on_refresh: Callable[[dict[str, Any]], None],
+        refresh_interval: float,
+        min_refresh_interval: float,
+    ) -> None:
+        self._jwks_client = jwks_client
+        self._on_refresh = on_refresh
+        self._refresh_interval = refresh_interval
+        self._min_refresh_interval = min_refresh_interval
+        self._lock = asyncio.Lock()
+        self._last_refresh = time.monotonic()
+        self._task: asyncio.Task[None] | None = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._refresh_periodically())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._jwks_client.aclose()
+
+    async def refresh_for_unknown_kid(self) -> bool:
+        """Refresh unless done recently, returns whether new keys are available"""
+        requested_at = time.monotonic()
+        async with self._lock:
+            # Another caller refreshed while this one was waiting on the lock
+            if self._last_refresh >= requested_at:
+                return True
+            if requested_at - self._last_refresh < self._min_refresh_interval:
+                return False
+            return await self._refresh()
+
+    async def _refresh_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self._refresh_interval)
+            async with self._lock:
+                await self._refresh()
+
+    async def _refresh(self) -> bool:
+        try:
+            jwks = await self._jwks_client.fetch_jwks()
+            # A malformed key fails here, and must not end the periodic refresh
+            self._on_refresh(jwks)
+        except (httpx.HTTPError, KeyError, TypeError, ValueError):
+            _LOGGER.warning(
+                "Failed to refresh JWKS, keeping current keys", exc_info=True
+            )
+            return False
+        finally:
+            self._last_refresh = time.monotonic()
+
+        return True
@@ -4,10 +4,13 @@ from fastapi import Depends
 from fastapi.security import OAuth2AuthorizationCodeBearer, SecurityScopes
 
 from settings import settings
+from tracing import tracer
 
-from .errors import InsufficientPermissionsError
+from .errors import InsufficientPermissionsError, UnknownKeyIdError
+from .jwks import JWKSRefresher
 from models.auth import Role, TokenContents, User
-from .validator import TokenValidator, get_token_validator
+from .token_cache import TokenCache, get_token_cache
+from .validator import TokenValidator, get_jwks_refresher, get_token_validator
 
 oauth2_scheme = OAuth2AuthorizationCodeBearer(
     authorizationUrl=settings.AUTH_AUTH_URL,
@@ -19,19 +22,48 @@ oauth2_scheme = OAuth2AuthorizationCodeBearer(
 
 
 class OAuth:
-    def __call__(
+    async def __call__(
         self,
         access_token: Annotated[str, Depends(oauth2_scheme)],
         token_validator: Annotated[TokenValidator, Depends(get_token_validator)],
+        token_cache: Annotated[TokenCache, Depends(get_token_cache)],
+        jwks_refresher: Annotated[JWKSRefresher, Depends(get_jwks_refresher)],
     ) -> User:
-        token_contents: TokenContents = token_validator.decode_verify_token(
-            access_token
-        )
-        return User(
+        with tracer.start_as_current_span("OAuth.authenticate") as span:
+            cached_user = token_cache.get(access_token, token_validator.jwks_version)
+            span.set_attribute("auth.token_cache_hit", cached_user is not None)
+            if cached_user is not None:
+                return cached_user
+            return await self._authenticate(
+                access_token, token_validator, token_cache, jwks_refresher
+            )
+
+    async def _authenticate(
+        self,
+        access_token: str,
+        token_validator: TokenValidator,
+        token_cache: TokenCache,
+        jwks_refresher: JWKSRefresher,
+    ) -> User:
+        try:
+            token_contents: TokenContents = token_validator.decode_verify_token(
+                access_token
+            )
+        except UnknownKeyIdError:
+            # Signing keys may have rotated, retry once against fresh keys
+            if not await jwks_refresher.refresh_for_unknown_kid():
+                raise
+            token_contents = token_validator.decode_verify_token(access_token)
+
+        user = User(
             email=token_contents.email,
             token=access_token,
             roles=self._parse_roles(token_contents),
         )
+        token_cache.put(
+            access_token, user, token_contents.exp, token_validator.jwks_version
+        )
+        return user
 
     @staticmethod
     def _parse_roles(token_contents: TokenContents) -> list[Role]:
@@ -49,12 +81,13 @@ class RBACSecurity:
         user: Annotated[User, Depends(OAuth())],
         required_role: Role = settings.AUTH_REQUIRED_ROLE,
     ) -> User:
-        missing_roles = []
-        for role in [required_role] + additional_roles.scopes:
-            if role not in user.roles:
-                missing_roles.append(role)
+        with tracer.start_as_current_span("RBACSecurity.verify"):
+            missing_roles = []
+            for role in [required_role] + additional_roles.scopes:
+                if role not in user.roles:
+                    missing_roles.append(role)
 
-        if len(missing_roles) > 0:
-            raise InsufficientPermissionsError(missing_roles)
+            if len(missing_roles) > 0:
+                raise InsufficientPermissionsError(missing_roles)
 
-        return user
+            return user
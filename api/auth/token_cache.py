@@ -0,0 +1,129 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterator, NamedTuple
+
+from prometheus_client import REGISTRY
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, Metric
+from prometheus_client.registry import Collector
+from pydantic import BaseModel
+
+from models.auth import User
+from settings import settings
+
+
+class TokenCacheStats(BaseModel):
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    max_size: int
+
+
+class _CachedUser(NamedTuple):
+    user: User
+    expires_at: float
+    jwks_version: int
+
+
+class TokenCache:
+    """Bounded LRU of verified tokens, keyed by token hash
+
+    Entries expire at the token's exp claim and are ignored once the JWKS
+    they were verified against has been replaced.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self._max_size = max_size
+        self._entries: OrderedDict[str, _CachedUser] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, token: str, jwks_version: int) -> User | None:
+        key = self._hash_token(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            if entry.expires_at <= time.time() or entry.jwks_version != jwks_version:
+                del self._entries[key]
+                self.evictions += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.user
+
+    def put(
+        self, token: str, user: User, expires_at: int | None, jwks_version: int
+    ) -> None:
+        # Tokens without an expiry are never cached
+        if self._max_size <= 0 or expires_at is None:
+            return
+
+        key = self._hash_token(token)
+        with self._lock:
+            self._entries[key] = _CachedUser(user, float(expires_at), jwks_version)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self.evictions += len(self._entries)
+            self._entries.clear()
+
+    def stats(self) -> TokenCacheStats:
+        return TokenCacheStats(
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            size=len(self._entries),
+            max_size=self._max_size,
+        )
+
+    @staticmethod
+    def _hash_token(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+_token_cache = TokenCache(settings.AUTH_TOKEN_CACHE_SIZE)
+
+
+class _TokenCacheCollector(Collector):
+    """Exports the cache's own counts, which it already keeps under its lock"""
+
+    def collect(self) -> Iterator[Metric]:
+        stats = _token_cache.stats()
+        lookups = CounterMetricFamily(
+            "auth_token_cache_lookups",
+            "Verified token cache lookups",
+            labels=("result",),
+        )
+        lookups.add_metric(("hit",), stats.hits)
+        lookups.add_metric(("miss",), stats.misses)
+        yield lookups
+        yield CounterMetricFamily(
+            "auth_token_cache_evictions",
+            "Verified tokens dropped for expiry, key rotation or capacity",
+            value=stats.evictions,
+        )
+        yield GaugeMetricFamily(
+            "auth_token_cache_entries",
+            "Verified tokens currently cached",
+            value=stats.size,
+        )
+
+
+REGISTRY.register(_TokenCacheCollector())
+
+
+def get_token_cache() -> TokenCache:
+    return _token_cache
@@ -1,30 +1,58 @@
+import asyncio
 import base64
 import binascii
-import json
+import logging
+import time
 from typing import Any, cast
 
+import httpx
 import jwt
-import requests
 from cryptography.hazmat.backends import default_backend
-from cryptography.hazmat.primitives import serialization
-from cryptography.hazmat.primitives.asymmetric.rsa import RSAPublicNumbers
+from cryptography.hazmat.primitives.asymmetric.rsa import RSAPublicKey, RSAPublicNumbers
+from prometheus_client import Histogram
 
 from settings import settings
 
-from .errors import InvalidTokenError, TokenDecodingError, TokenExpiredError
+from .errors import (
+    AuthNotReadyError,
+    TokenDecodingError,
+    TokenExpiredError,
+    UnknownKeyIdError,
+)
+from .jwks import JWKSClient, JWKSRefresher
 from models.auth import TokenContents
 
+_LOGGER = logging.getLogger(__name__)
+_INITIAL_RETRY_DELAY_SECONDS = 0.5
+_MAX_RETRY_DELAY_SECONDS = 30
+
+_VERIFY_DURATION = Histogram(
+    "auth_token_verification_seconds",
+    "Time to verify a JWT signature and claims, whether or not it is valid",
+    buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025),
+)
+
 
 class TokenValidator:
-    def __init__(self, audience: str, issuer: str, jwks_url: str) -> None:
-        self.jwks = self._fetch_jwks(jwks_url)
+    def __init__(self, audience: str, issuer: str, jwks: dict[str, Any]) -> None:
         self._audience = audience
         self._issuer = issuer
-
-    def _fetch_jwks(self, jwks_url: str) -> dict[str, Any]:
-        pub_config = self.__request_url_contents(jwks_url)
-        jwks_uri = pub_config["jwks_uri"]
-        return self.__request_url_contents(jwks_uri)
+        self._public_keys: dict[str, RSAPublicKey] = {}
+        self.jwks: dict[str, Any] = {}
+        self.jwks_version = 0
+        self.update_jwks(jwks)
+
+    def update_jwks(self, jwks: dict[str, Any]) -> None:
+        """Replace JWKS and rebuild the kid to public key index
+
+        Periodic refreshes usually return the same keys. The version, which
+        expires cached tokens, only moves on when the keys have changed.
+        """
+        if self.jwks_version and jwks.get("keys") == self.jwks.get("keys"):
+            return
+        self._public_keys = self._build_public_keys(jwks)
+        self.jwks = jwks
+        self.jwks_version += 1
 
     def decode_verify_token(
         self,
@@ -32,6 +60,7 @@ class TokenValidator:
         *,
         verify_expiry=True,
     ) -> TokenContents:
+        start = time.perf_counter()
         try:
             # Get public key
             __pub_key = self.__get_rsa_key(token)
@@ -51,35 +80,32 @@ class TokenValidator:
             raise TokenExpiredError()
         except (jwt.exceptions.InvalidTokenError, binascii.Error, KeyError):
             raise TokenDecodingError()
+        finally:
+            _VERIFY_DURATION.observe(time.perf_counter() - start)
 
-    def __get_rsa_key(self, token: str) -> bytes:
-        """Converts public key from token header into RSA key"""
+    def __get_rsa_key(self, token: str) -> RSAPublicKey:
+        """Looks up prebuilt public key for the kid in the token header"""
         unverified_headers = self.__get_jwt_headers(token)
-        kid = unverified_headers["kid"]
-        jwk_key = None
-        for keyset in self.jwks["keys"]:
-            if kid == keyset["kid"]:
-                jwk_key = keyset
+        pub_key = self._public_keys.get(unverified_headers["kid"])
 
-        # No matching KID found, return invalid key
-        if jwk_key is None:
-            raise InvalidTokenError()
+        # No matching KID found, keys may have rotated
+        if pub_key is None:
+            raise UnknownKeyIdError()
 
-        # Format public JWK as RSA PEM
-        return self.__rsa_pem_from_jwk(jwk_key)
+        return pub_key
+
+    def _build_public_keys(self, jwks: dict[str, Any]) -> dict[str, RSAPublicKey]:
+        """Load every RSA key in the JWKS once, indexed by kid"""
+        return {
+            jwk["kid"]: self.__rsa_key_from_jwk(jwk)
+            for jwk in jwks.get("keys", [])
+            if jwk.get("kty", "RSA") == "RSA" and "kid" in jwk
+        }
 
     @staticmethod
     def __get_jwt_headers(jwt_token: str) -> dict[str, str]:
         """Decode unverified JWT header"""
-        header = jwt_token.split(".")[0]
-        return cast(
-            dict[str, str], json.loads(base64.b64decode(header).decode("utf-8"))
-        )
-
-    @staticmethod
-    def __request_url_contents(url) -> dict[str, str]:
-        """Gets JSON response from given URL (Cached)"""
-        return cast(dict[str, str], requests.get(url).json())
+        return cast(dict[str, str], jwt.get_unverified_header(jwt_token))
 
     @staticmethod
     def __ensure_bytes(key: str | bytes) -> bytes:
@@ -88,18 +114,11 @@ class TokenValidator:
             key = key.encode("utf-8")
         return key
 
-    def __rsa_pem_from_jwk(self, jwk: dict[str, Any]) -> bytes:
-        """Format JWK as RSA Pub Number, PEM format"""
-        return (
-            RSAPublicNumbers(
-                n=self.__decode_value(jwk["n"]), e=self.__decode_value(jwk["e"])
-            )
-            .public_key(default_backend())
-            .public_bytes(
-                encoding=serialization.Encoding.PEM,
-                format=serialization.PublicFormat.SubjectPublicKeyInfo,
-            )
-        )
+    def __rsa_key_from_jwk(self, jwk: dict[str, Any]) -> RSAPublicKey:
+        """Load JWK as RSA public key object"""
+        return RSAPublicNumbers(
+            n=self.__decode_value(jwk["n"]), e=self.__decode_value(jwk["e"])
+        ).public_key(default_backend())
 
     def __decode_value(self, val) -> int:
         """Decode from Base64 to int"""
@@ -108,14 +127,84 @@ class TokenValidator:
 
 
 _token_validator: TokenValidator | None = None
+_jwks_refresher: JWKSRefresher | None = None
+_initialise_task: asyncio.Task[None] | None = None
 
 
 def get_token_validator() -> TokenValidator:
-    return cast(TokenValidator, _token_validator)
+    if _token_validator is None:
+        raise AuthNotReadyError()
+    return _token_validator
+
+
+def get_jwks_refresher() -> JWKSRefresher:
+    if _jwks_refresher is None:
+        raise AuthNotReadyError()
+    return _jwks_refresher
+
 
+def is_token_validator_ready() -> bool:
+    return _token_validator is not None
 
-def initialise_token_validator() -> None:
-    global _token_validator
-    _token_validator = TokenValidator(
-        settings.AUTH_AUDIENCE, settings.AUTH_ISSUER, settings.AUTH_OIDC_CONFIG_URL
+
+def start_token_validator() -> None:
+    """Initialise in the background so the API can serve before the IdP answers"""
+    global _initialise_task
+    _initialise_task = asyncio.create_task(initialise_token_validator())
+
+
+async def initialise_token_validator() -> None:
+    global _token_validator, _jwks_refresher
+    jwks_client = JWKSClient(
+        settings.AUTH_OIDC_CONFIG_URL,
+        httpx.AsyncClient(timeout=settings.AUTH_HTTP_TIMEOUT_SECONDS),
+        jwks_uri=settings.AUTH_JWKS_URL,
     )
+    _token_validator = await _build_initial_validator(jwks_client)
+    _jwks_refresher = JWKSRefresher(
+        jwks_client,
+        _token_validator.update_jwks,
+        refresh_interval=settings.AUTH_JWKS_REFRESH_INTERVAL_SECONDS,
+        min_refresh_interval=settings.AUTH_JWKS_MIN_REFRESH_INTERVAL_SECONDS,
+    )
+    _jwks_refresher.start()
+    _LOGGER.info("Fetched OIDC config, authentication ready")
+
+
+async def shutdown_token_validator() -> None:
+    global _token_validator, _jwks_refresher, _initialise_task
+    if _initialise_task is not None:
+        _initialise_task.cancel()
+        try:
+            await _initialise_task
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            _LOGGER.exception("Authentication failed to initialise")
+        _initialise_task = None
+    if _jwks_refresher is not None:
+        await _jwks_refresher.stop()
+    _token_validator = None
+    _jwks_refresher = None
+
+
+async def _build_initial_validator(jwks_client: JWKSClient) -> TokenValidator:
+    """Fetch and load JWKS, retrying with exponential backoff until both succeed
+
+    Loading is retried as well, so a malformed key published by the IdP delays
+    readiness rather than ending initialisation.
+    """
+    delay = _INITIAL_RETRY_DELAY_SECONDS
+    while True:
+        try:
+            return TokenValidator(
+                settings.AUTH_AUDIENCE,
+                settings.AUTH_ISSUER,
+                await jwks_client.fetch_jwks(),
+            )
+        except (httpx.HTTPError, KeyError, TypeError, ValueError):
+            _LOGGER.warning(
+                "Failed to load OIDC config or JWKS, retrying in %ss", delay
+            )
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, _MAX_RETRY_DELAY_SECONDS)
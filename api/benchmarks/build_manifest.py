@@ -0,0 +1,81 @@
+"""build_manifest throughput with and without the CRD class registry
+
+Run from the api directory: python -m benchmarks.build_manifest
+"""
+
+from unittest.mock import patch
+
+from kr8s.asyncio.objects import APIObject, new_class
+
+from benchmarks.common import configure_environment, measure_rate, report
+
+configure_environment()
+
+from entity_builders.edag import EDAGBuilder  # noqa: E402
+from models.edag import (  # noqa: E402
+    EDAG_API_VERSION,
+    EDAG_KIND,
+    EDAGResource,
+    EDAGStepResource,
+)
+
+_ITERATIONS = 20000
+_STEPS = 10
+
+
+def main() -> None:
+    builder = EDAGBuilder()
+    resource = EDAGResource(
+        graphname="graph",
+        steps=[
+            EDAGStepResource(
+                stepname=f"step{idx}",
+                image="image",
+                replicas=1,
+                dependencies=[f"step{idx - 1}"] if idx else [],
+                env={"key": "value"},
+                args=[],
+                command=[],
+            )
+            for idx in range(_STEPS)
+        ],
+    )
+
+    def build() -> None:
+        builder.build_manifest(resource, "default")
+
+    def get_crd() -> None:
+        builder.get_crd()
+
+    subclasses_before = len(APIObject.__subclasses__())
+    with patch.object(
+        EDAGBuilder,
+        "get_crd",
+        classmethod(lambda cls: new_class(kind=EDAG_KIND, version=EDAG_API_VERSION)),
+    ):
+        report(
+            "get_crd, new class per call", measure_rate(get_crd, _ITERATIONS), "calls/s"
+        )
+        report(
+            "build_manifest, new class per call",
+            measure_rate(build, _ITERATIONS),
+            "builds/s",
+        )
+        report(
+            "APIObject subclasses created",
+            len(APIObject.__subclasses__()) - subclasses_before,
+            "classes",
+        )
+
+    subclasses_before = len(APIObject.__subclasses__())
+    report("get_crd, registry", measure_rate(get_crd, _ITERATIONS), "calls/s")
+    report("build_manifest, registry", measure_rate(build, _ITERATIONS), "builds/s")
+    report(
+        "APIObject subclasses created",
+        len(APIObject.__subclasses__()) - subclasses_before,
+        "classes",
+    )
+
+
+if __name__ == "__main__":
+    main()
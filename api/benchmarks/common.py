@@ -0,0 +1,32 @@
+import os
+import time
+from typing import Callable
+
+_DEFAULT_ENVIRONMENT = {
+    "DEBUG_MODE": "false",
+    "AUTH_TOKEN_URL": "http://localhost/token",
+    "AUTH_AUTH_URL": "http://localhost/auth",
+    "AUTH_OIDC_CONFIG_URL": "http://localhost/.well-known/openid-configuration",
+    "AUTH_ISSUER": "http://localhost",
+    "AUTH_AUDIENCE": "kickplate",
+    "AUTH_REQUIRED_ROLE": "kickplate:user",
+    "AUTH_CLIENT_ID": "kickplate",
+}
+
+
+def configure_environment() -> None:
+    """Provide placeholder settings so API modules can be imported"""
+    for key, value in _DEFAULT_ENVIRONMENT.items():
+        os.environ.setdefault(key, value)
+
+
+def measure_rate(fn: Callable[[], object], iterations: int) -> float:
+    """Call fn repeatedly, returning calls per second"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return iterations / (time.perf_counter() - start)
+
+
+def report(name: str, value: float, unit: str) -> None:
+    print(f"{name:<40} {value:>14,.1f} {unit}")
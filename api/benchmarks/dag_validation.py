@@ -0,0 +1,96 @@
+"""validate_steps time per thousand steps on 10k step graphs
+
+The target is under 1 ms per thousand steps. Steps listed after their
+dependencies are checked in one pass and meet it. Steps in any other order
+are outside the target: the depth first walk they need takes around 1.5 ms.
+The last line adds build_schedule as creating an EDAG does, which also takes
+it over.
+
+Run from the api directory: python -m benchmarks.dag_validation
+"""
+
+import random
+import time
+from typing import Any, Callable
+
+from benchmarks.common import configure_environment, report
+
+configure_environment()
+
+from entity_builders.dag_validation import build_schedule, validate_steps  # noqa: E402
+from models.edag import EDAGRequestStep  # noqa: E402
+
+_STEPS = 10000
+_REPEATS = 20
+_MAX_DEPENDENCIES = 4
+
+
+def _step(idx: int, dependencies: list[int]) -> EDAGRequestStep:
+    return EDAGRequestStep(
+        stepname=f"step{idx}",
+        image="image",
+        dependencies=[f"step{dependency}" for dependency in dependencies],
+    )
+
+
+def _chain() -> list[EDAGRequestStep]:
+    return [_step(idx, [idx - 1] if idx else []) for idx in range(_STEPS)]
+
+
+def _wide() -> list[EDAGRequestStep]:
+    return [_step(idx, []) if idx == 0 else _step(idx, [0]) for idx in range(_STEPS)]
+
+
+def _random() -> list[EDAGRequestStep]:
+    rng = random.Random(0)
+    return [
+        _step(idx, rng.sample(range(idx), min(idx, _MAX_DEPENDENCIES)))
+        for idx in range(_STEPS)
+    ]
+
+
+def _shuffled() -> list[EDAGRequestStep]:
+    steps = _random()
+    random.Random(1).shuffle(steps)
+    return steps
+
+
+def _validate_and_schedule(steps: list[EDAGRequestStep]) -> dict[str, Any]:
+    return build_schedule(validate_steps(steps))
+
+
+def _time_per_thousand_steps(
+    build: Callable[[], list[EDAGRequestStep]],
+    run: Callable[[list[EDAGRequestStep]], object] = validate_steps,
+) -> float:
+    steps = build()
+    run(steps)
+    start = time.perf_counter()
+    for _ in range(_REPEATS):
+        run(steps)
+    elapsed = (time.perf_counter() - start) / _REPEATS
+    return elapsed * 1000 / (_STEPS / 1000)
+
+
+def main() -> None:
+    report("chain, per 1000 steps", _time_per_thousand_steps(_chain), "ms")
+    report("fan out, per 1000 steps", _time_per_thousand_steps(_wide), "ms")
+    report(
+        f"random {_MAX_DEPENDENCIES} deps, per 1000 steps",
+        _time_per_thousand_steps(_random),
+        "ms",
+    )
+    report(
+        f"shuffled {_MAX_DEPENDENCIES} deps, per 1000 steps",
+        _time_per_thousand_steps(_shuffled),
+        "ms",
+    )
+    report(
+        "random with schedule, per 1000 steps",
+        _time_per_thousand_steps(_random, _validate_and_schedule),
+        "ms",
+    )
+
+
+if __name__ == "__main__":
+    main()
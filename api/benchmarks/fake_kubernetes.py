@@ -0,0 +1,100 @@
+import socket
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Any
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+_COLLECTION = "/apis/edag.kickplate.com/v1alpha1/namespaces/default/{plural}"
+
+
+async def _create(request: Request) -> JSONResponse:
+    body: dict[str, Any] = await request.json()
+    metadata = body.setdefault("metadata", {})
+    if "generateName" in metadata and "name" not in metadata:
+        metadata["name"] = metadata["generateName"] + uuid.uuid4().hex
+    metadata.update(uid=str(uuid.uuid4()), resourceVersion="1")
+    return JSONResponse(body, status_code=201)
+
+
+async def _list(request: Request) -> JSONResponse:
+    plural = request.path_params["plural"]
+    name = request.query_params.get("fieldSelector", "=").split("=")[-1] or "graph"
+    item = {
+        "apiVersion": "edag.kickplate.com/v1alpha1",
+        "kind": "EDAG" if plural == "edags" else "EDAGRun",
+        "metadata": {"name": name, "namespace": "default", "uid": "uid"},
+    }
+    return JSONResponse(
+        {"kind": "List", "apiVersion": "v1", "metadata": {}, "items": [item]}
+    )
+
+
+async def _get(request: Request) -> JSONResponse:
+    plural = request.path_params["plural"]
+    return JSONResponse(
+        {
+            "apiVersion": "edag.kickplate.com/v1alpha1",
+            "kind": "EDAG" if plural == "edags" else "EDAGRun",
+            "metadata": {
+                "name": request.path_params["name"],
+                "namespace": "default",
+                "uid": "uid",
+            },
+        }
+    )
+
+
+def _app(requests: Counter[str]) -> Starlette:
+    app = Starlette(
+        routes=[
+            Route(_COLLECTION, _create, methods=["POST"]),
+            Route(_COLLECTION, _list, methods=["GET"]),
+            Route(_COLLECTION + "/{name}", _get, methods=["GET"]),
+        ]
+    )
+
+    @app.middleware("http")
+    async def count_requests(request: Request, call_next: Any) -> Any:
+        requests[request.method] += 1
+        return await call_next(request)
+
+    return app
+
+
+class FakeKubernetesServer:
+    """Minimal Kubernetes API server for EDAG/EDAGRun custom resources
+
+    Runs uvicorn on a background thread so that clients pay real TCP
+    connection setup costs.
+    """
+
+    def __init__(self) -> None:
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            self.port = sock.getsockname()[1]
+        self.requests: Counter[str] = Counter()
+        self._server = uvicorn.Server(
+            uvicorn.Config(_app(self.requests), port=self.port, log_level="error")
+        )
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self) -> "FakeKubernetesServer":
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self._server.should_exit = True
+        self._thread.join()
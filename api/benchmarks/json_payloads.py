@@ -0,0 +1,75 @@
+"""JSON encode and decode time for a large EDAG, stdlib json against fast paths
+
+Request validation is the same either way so only decoding is timed.
+
+Run from the api directory: python -m benchmarks.json_payloads
+"""
+
+import json
+import time
+from typing import Callable
+
+import orjson
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from benchmarks.common import configure_environment, report
+
+configure_environment()
+
+from models.edag import EDAGRequest, EDAGRequestStep, EDAGResponse  # noqa: E402
+from serialization import ModelResponse  # noqa: E402
+
+_STEPS = 10000
+_REPEATS = 10
+
+
+def _time(fn: Callable[[], object]) -> float:
+    fn()
+    start = time.perf_counter()
+    for _ in range(_REPEATS):
+        fn()
+    return (time.perf_counter() - start) / _REPEATS * 1000
+
+
+def main() -> None:
+    steps = [
+        EDAGRequestStep(
+            stepname=f"step{idx}",
+            image="image",
+            dependencies=[f"step{idx - 1}"] if idx else [],
+            env={"key": "value"},
+            args=["arg"],
+            command=["command"],
+        )
+        for idx in range(_STEPS)
+    ]
+    edag = EDAGResponse(
+        graphname="graph", creation_time="", steps=steps, resource_version="1"
+    )
+    body = EDAGRequest(graphname="graph", steps=steps).model_dump_json().encode()
+
+    report(
+        "response, stdlib json",
+        _time(lambda: JSONResponse(edag.model_dump(mode="json"))),
+        "ms",
+    )
+    report(
+        "response, orjson",
+        _time(lambda: ORJSONResponse(edag.model_dump(mode="json"))),
+        "ms",
+    )
+    report("response, pydantic-core", _time(lambda: ModelResponse(edag)), "ms")
+    report(
+        "request decode, stdlib json",
+        _time(lambda: json.loads(body)),
+        "ms",
+    )
+    report(
+        "request decode, orjson",
+        _time(lambda: orjson.loads(body)),
+        "ms",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""p50/p99 latency of KubernetesClient calls against a local fake API server
+
+Compares building a kr8s Api and KubernetesClient per request with the app
+scoped pooled client.
+
+Run from the api directory: python -m benchmarks.kubernetes_pool
+"""
+
+import asyncio
+import statistics
+import time
+from typing import Awaitable, Callable
+
+from benchmarks.common import configure_environment, report
+from benchmarks.fake_kubernetes import FakeKubernetesServer
+
+configure_environment()
+
+import external.kubernetes as kubernetes  # noqa: E402
+from entity_builders.edag import EDAGBuilder  # noqa: E402
+from models.edag import EDAGResource, EDAGStepResource  # noqa: E402
+
+_REQUESTS = 1000
+_CONCURRENCY = 16
+
+_RESOURCE = EDAGResource(
+    graphname="graph",
+    steps=[
+        EDAGStepResource(
+            stepname="step",
+            image="image",
+            replicas=1,
+            dependencies=[],
+            env={},
+            args=[],
+            command=[],
+        )
+    ],
+)
+
+
+async def _run(call: Callable[[], Awaitable[object]]) -> list[float]:
+    # Warm up connections and the fake server before measuring
+    await asyncio.gather(*[call() for _ in range(_CONCURRENCY)])
+
+    semaphore = asyncio.Semaphore(_CONCURRENCY)
+    latencies: list[float] = []
+
+    async def timed() -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            await call()
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*[timed() for _ in range(_REQUESTS)])
+    return latencies
+
+
+def _report(name: str, latencies: list[float]) -> None:
+    percentiles = statistics.quantiles(latencies, n=100)
+    report(f"{name} p50", percentiles[49] * 1000, "ms")
+    report(f"{name} p99", percentiles[98] * 1000, "ms")
+
+
+async def _benchmark(url: str) -> None:
+    builder = EDAGBuilder()
+
+    async def per_request_client() -> None:
+        api = await kubernetes._PooledApi(url=url, bypass_factory=True)
+        client = kubernetes.KubernetesClient(api)
+        await client.create_resource(builder, _RESOURCE)
+        await client.close()
+
+    kubernetes.initialise_kubernetes_client(url=url)
+    shared_client = kubernetes.get_kubernetes_client()
+
+    async def pooled_client() -> None:
+        await shared_client.create_resource(builder, _RESOURCE)
+
+    _report("per-request client create", await _run(per_request_client))
+    _report("pooled client create", await _run(pooled_client))
+    await kubernetes.shutdown_kubernetes_client()
+
+
+def main() -> None:
+    with FakeKubernetesServer() as server:
+        asyncio.run(_benchmark(server.url))
+
+
+if __name__ == "__main__":
+    main()
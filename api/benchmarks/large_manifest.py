@@ -0,0 +1,83 @@
+"""Time and peak allocations building and serialising large EDAG manifests
+
+Compares wrapping the manifest in its CRD class, as creates used to, against
+posting the plain dicts from build_raw_manifest.
+
+Run from the api directory: python -m benchmarks.large_manifest
+"""
+
+import json
+import time
+import tracemalloc
+from typing import Callable
+
+from benchmarks.common import configure_environment, report
+
+configure_environment()
+
+from entity_builders.edag import EDAGBuilder  # noqa: E402
+from models.edag import EDAGRequest, EDAGRequestStep, EDAGResource  # noqa: E402
+
+_SIZES = (1000, 10000)
+_REPEATS = 5
+
+
+def _request(steps: int) -> EDAGRequest:
+    return EDAGRequest(
+        graphname="graph",
+        steps=[
+            EDAGRequestStep(
+                stepname=f"step{idx}",
+                image="image",
+                dependencies=[f"step{idx - 1}"] if idx else [],
+                env={"key": "value"},
+                args=["arg"],
+                command=["command"],
+            )
+            for idx in range(steps)
+        ],
+    )
+
+
+def _measure(fn: Callable[[], object]) -> tuple[float, float]:
+    """Mean milliseconds per call and peak KiB allocated by one call"""
+    fn()
+    start = time.perf_counter()
+    for _ in range(_REPEATS):
+        fn()
+    elapsed = (time.perf_counter() - start) / _REPEATS
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed * 1000, peak / 1024
+
+
+def _report(name: str, fn: Callable[[], object]) -> None:
+    elapsed, peak = _measure(fn)
+    report(f"{name}, time", elapsed, "ms")
+    report(f"{name}, peak", peak, "KiB")
+
+
+def main() -> None:
+    builder = EDAGBuilder()
+    for steps in _SIZES:
+        request = _request(steps)
+        resource: EDAGResource = builder.build_resource(request)
+
+        def crd_manifest() -> None:
+            json.dumps(builder.build_manifest(resource, "default").raw)
+
+        def raw_manifest() -> None:
+            json.dumps(builder.build_raw_manifest(resource, "default"))
+
+        _report(
+            f"{steps} steps, build_resource", lambda: builder.build_resource(request)
+        )
+        _report(f"{steps} steps, CRD manifest", crd_manifest)
+        _report(f"{steps} steps, raw manifest", raw_manifest)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Cost of the metrics instrumentation on the request path
+
+Times a histogram observation alone and a request through a bare ASGI app with
+and without RequestMetricsMiddleware, the difference being the per request cost.
+
+Run from the api directory: python -m benchmarks.metrics_overhead
+"""
+
+import asyncio
+import time
+from typing import Any
+
+from benchmarks.common import configure_environment, measure_rate, report
+
+configure_environment()
+
+from prometheus_client import Histogram  # noqa: E402
+
+from features.metrics.middleware import RequestMetricsMiddleware  # noqa: E402
+
+_ITERATIONS = 200000
+
+
+class _Route:
+    path = "/api/v1/edag/{edagname}"
+
+
+async def _bare_app(scope: dict[str, Any], receive: Any, send: Any) -> None:
+    scope["route"] = _Route
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def _send(message: dict[str, Any]) -> None:
+    pass
+
+
+async def _receive() -> dict[str, Any]:
+    return {"type": "http.request"}
+
+
+async def _time_requests(app: Any) -> float:
+    """Mean microseconds per request"""
+    start = time.perf_counter()
+    for _ in range(_ITERATIONS):
+        scope = {"type": "http", "method": "GET", "path": "/api/v1/edag/graph"}
+        await app(scope, _receive, _send)
+    return (time.perf_counter() - start) / _ITERATIONS * 1e6
+
+
+def main() -> None:
+    child = Histogram(
+        "benchmark_seconds", "Benchmark histogram", ("method", "route"), registry=None
+    ).labels("GET", "/")
+    report(
+        "histogram observe",
+        1e6 / measure_rate(lambda: child.observe(0.003), _ITERATIONS),
+        "us",
+    )
+
+    bare = asyncio.run(_time_requests(_bare_app))
+    instrumented = asyncio.run(_time_requests(RequestMetricsMiddleware(_bare_app)))
+    report("request, uninstrumented", bare, "us")
+    report("request, instrumented", instrumented, "us")
+    report("instrumentation per request", instrumented - bare, "us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Cost of the profiling hook, idle and while sampling
+
+Times a request through a bare ASGI app with and without ProfilingMiddleware
+when no profile is being taken, then a CPU bound loop with and without the
+sampler running at the default interval.
+
+Run from the api directory: python -m benchmarks.profiling_overhead
+"""
+
+import asyncio
+import time
+from typing import Any
+
+from benchmarks.common import configure_environment, report
+
+configure_environment()
+
+from features.profiling.middleware import ProfilingMiddleware  # noqa: E402
+from features.profiling.profiler import SamplingProfiler  # noqa: E402
+from settings import settings  # noqa: E402
+
+_REQUESTS = 200000
+_LOOP_ITERATIONS = 5000000
+
+
+async def _bare_app(scope: dict[str, Any], receive: Any, send: Any) -> None:
+    pass
+
+
+async def _time_requests(app: Any) -> float:
+    """Mean microseconds per request"""
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": []}
+    start = time.perf_counter()
+    for _ in range(_REQUESTS):
+        await app(scope, None, None)
+    return (time.perf_counter() - start) / _REQUESTS * 1e6
+
+
+def _busy_loop() -> float:
+    start = time.perf_counter()
+    total = 0
+    for idx in range(_LOOP_ITERATIONS):
+        total += idx
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    bare = asyncio.run(_time_requests(_bare_app))
+    hooked = asyncio.run(_time_requests(ProfilingMiddleware(_bare_app)))
+    report("request, no middleware", bare, "us")
+    report("request, profiling idle", hooked, "us")
+
+    unprofiled = _busy_loop()
+    profiler = SamplingProfiler(settings.PROFILE_SAMPLE_INTERVAL_SECONDS)
+    profiler.start()
+    profiled = _busy_loop()
+    profiler.stop()
+    report("busy loop, unprofiled", unprofiled * 1000, "ms")
+    report("busy loop, sampling", profiled * 1000, "ms")
+    report("samples taken", sum(profiler.stacks.values()), "samples")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""API calls made by a burst of concurrent runs of one EDAG
+
+Fires many concurrent run_edag calls at a local fake API server and counts
+the requests it receives, which should be one create per run plus the single
+EDAG lookup made when the informer has not synced.
+
+Run from the api directory: python -m benchmarks.run_burst
+"""
+
+import asyncio
+import time
+from unittest.mock import Mock
+
+from benchmarks.common import configure_environment, report
+from benchmarks.fake_kubernetes import FakeKubernetesServer
+
+configure_environment()
+
+import external.kubernetes as kubernetes  # noqa: E402
+from entity_builders.edag import EDAGBuilder  # noqa: E402
+from entity_builders.edagrun import EDAGRunBuilder  # noqa: E402
+from external.informer import ResourceInformer  # noqa: E402
+from features.graph.services import EDAGServices  # noqa: E402
+
+_RUNS = 5000
+
+
+async def _benchmark(server: FakeKubernetesServer) -> None:
+    kubernetes.initialise_kubernetes_client(url=server.url)
+    informer = Mock(spec=ResourceInformer)
+    informer.synced = True
+    informer.get.return_value = {"metadata": {"name": "graph", "uid": "uid"}}
+    services = EDAGServices(
+        kubernetes.get_kubernetes_client(),
+        EDAGBuilder(),
+        EDAGRunBuilder(),
+        informer,
+        Mock(spec=ResourceInformer),
+    )
+
+    start = time.perf_counter()
+    responses = await asyncio.gather(
+        *[services.run_edag("graph") for _ in range(_RUNS)]
+    )
+    elapsed = time.perf_counter() - start
+    await kubernetes.shutdown_kubernetes_client()
+
+    report("runs", _RUNS, "runs")
+    report("unique run names", len({response.id for response in responses}), "runs")
+    report("create calls", server.requests["POST"], "requests")
+    report("get calls", server.requests["GET"], "requests")
+    report("burst throughput", _RUNS / elapsed, "runs/s")
+
+
+def main() -> None:
+    with FakeKubernetesServer() as server:
+        asyncio.run(_benchmark(server))
+
+
+if __name__ == "__main__":
+    main()
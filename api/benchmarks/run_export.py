@@ -0,0 +1,112 @@
+"""Peak memory of listing 50k EDAG runs, materialised against streamed NDJSON
+
+The Kubernetes client serves generated pages on demand, so the peak measured
+is what the API itself holds while building the response body.
+
+Run from the api directory: python -m benchmarks.run_export
+"""
+
+import asyncio
+import time
+import tracemalloc
+from typing import Any, Awaitable, Callable
+from unittest.mock import Mock
+
+from benchmarks.common import configure_environment, report
+
+configure_environment()
+
+from external.informer import ResourceInformer  # noqa: E402
+from features.graph.router import _ndjson  # noqa: E402
+from features.graph.services import EDAGServices  # noqa: E402
+from models.edagrun import EDAGRunListResponse  # noqa: E402
+from serialization import ModelResponse  # noqa: E402
+from settings import settings  # noqa: E402
+
+_RUNS = 50000
+
+
+class _PagedKubernetesClient:
+    """Serves _RUNS EDAGRuns in pages, building each page only when requested"""
+
+    async def list_resources(self, builder: Any, params: dict[str, Any]) -> dict:
+        start = int(params.get("continue", 0))
+        end = min(start + params["limit"], _RUNS)
+        return {
+            "metadata": {"continue": str(end) if end < _RUNS else ""},
+            "items": [
+                {
+                    "metadata": {
+                        "name": f"graph-{idx:08d}",
+                        "creationTimestamp": "2024-01-01T00:00:00Z",
+                    },
+                    "spec": {"edagname": "graph"},
+                    "status": {
+                        "conditions": [
+                            {
+                                "type": "Succeeded",
+                                "lastTransitionTime": "2024-01-01T00:01:00Z",
+                            }
+                        ],
+                        "jobs": {f"step{step}": f"job{step}" for step in range(5)},
+                    },
+                }
+                for idx in range(start, end)
+            ],
+        }
+
+
+def _services() -> EDAGServices:
+    informer = Mock(spec=ResourceInformer)
+    informer.synced = False
+    return EDAGServices(
+        _PagedKubernetesClient(),  # type: ignore[arg-type]
+        Mock(),
+        Mock(),
+        informer,
+        informer,
+    )
+
+
+async def _materialised(services: EDAGServices) -> int:
+    """Every page collected into one listing, then serialised in one go"""
+    items = []
+    page = await services.list_edag_runs(settings.EXPORT_PAGE_SIZE, None, True)
+    items.extend(page.items)
+    while page.continue_token is not None:
+        page = await services.list_edag_runs(
+            settings.EXPORT_PAGE_SIZE, page.continue_token, True
+        )
+        items.extend(page.items)
+    return len(ModelResponse(EDAGRunListResponse(items=items)).body)
+
+
+async def _streamed(services: EDAGServices) -> int:
+    size = 0
+    async for chunk in _ndjson(await services.export_edag_runs(True)):
+        size += len(chunk)
+    return size
+
+
+async def _measure(
+    name: str, fn: Callable[[EDAGServices], Awaitable[int]], services: EDAGServices
+) -> None:
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = await fn(services)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    report(f"{name}, body", size / 1024 / 1024, "MiB")
+    report(f"{name}, peak memory", peak / 1024 / 1024, "MiB")
+    report(f"{name}, time", elapsed, "s")
+
+
+def main() -> None:
+    services = _services()
+    asyncio.run(_measure("materialised", _materialised, services))
+    asyncio.run(_measure("streamed NDJSON", _streamed, services))
+
+
+if __name__ == "__main__":
+    main()
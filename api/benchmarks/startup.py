@@ -0,0 +1,81 @@
+"""Import and readiness latency of the API against a slow fake IdP
+
+Run from the api directory: python -m benchmarks.startup
+"""
+
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from unittest.mock import patch
+
+import httpx
+
+from benchmarks.common import configure_environment, report
+
+_IDP_LATENCY_SECONDS = 0.25
+_IDP_HOST = "http://idp.local"
+
+configure_environment()
+os.environ["AUTH_OIDC_CONFIG_URL"] = f"{_IDP_HOST}/.well-known/openid-configuration"
+
+
+def _measure_import_seconds() -> float:
+    script = "import time; s = time.perf_counter(); import app; print(time.perf_counter() - s)"
+    output = subprocess.check_output([sys.executable, "-c", script], env=os.environ)
+    return float(output.decode("utf-8").strip().splitlines()[-1])
+
+
+async def _slow_idp(request: httpx.Request) -> httpx.Response:
+    await asyncio.sleep(_IDP_LATENCY_SECONDS)
+    if request.url.path.endswith("openid-configuration"):
+        return httpx.Response(200, json={"jwks_uri": f"{_IDP_HOST}/jwks"})
+    return httpx.Response(200, json={"keys": []})
+
+
+async def _measure_startup(jwks_url: str | None) -> tuple[float, float]:
+    import auth.validator
+    from app import app
+    from settings import settings
+
+    settings.AUTH_JWKS_URL = jwks_url
+
+    idp_transport = httpx.MockTransport(_slow_idp)
+    idp_client = httpx.AsyncClient
+
+    with patch.object(
+        auth.validator.httpx,
+        "AsyncClient",
+        lambda **kwargs: idp_client(transport=idp_transport, **kwargs),
+    ):
+        client = idp_client(
+            transport=httpx.ASGITransport(app=app), base_url="http://test"
+        )
+        start = time.perf_counter()
+        async with app.router.lifespan_context(app):
+            serving = time.perf_counter() - start
+            assert (await client.get("/health")).status_code == 200
+            while (await client.get("/ready")).status_code != 200:
+                await asyncio.sleep(0.005)
+            ready = time.perf_counter() - start
+        await client.aclose()
+    return serving, ready
+
+
+def main() -> None:
+    report("import app", _measure_import_seconds() * 1000, "ms")
+    serving, ready = asyncio.run(_measure_startup(jwks_url=None))
+    report("lifespan startup until serving", serving * 1000, "ms")
+    report("startup until /ready (discovery)", ready * 1000, "ms")
+    _, ready = asyncio.run(_measure_startup(jwks_url=f"{_IDP_HOST}/jwks"))
+    report("startup until /ready (AUTH_JWKS_URL)", ready * 1000, "ms")
+    report(
+        "blocking startup (2 sequential IdP calls)",
+        2 * _IDP_LATENCY_SECONDS * 1000,
+        "ms",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Verifications/sec for the JWKS lookup path in TokenValidator
+
+Run from the api directory: python -m benchmarks.token_validator
+"""
+
+import base64
+from typing import Any
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.hazmat.primitives.asymmetric.rsa import RSAPublicNumbers
+
+from benchmarks.common import configure_environment, measure_rate, report
+
+configure_environment()
+
+from auth.validator import TokenValidator  # noqa: E402
+
+_ITERATIONS = 2000
+_KEY_COUNT = 5
+_AUDIENCE = "kickplate"
+_ISSUER = "http://localhost"
+
+
+def _b64_int(value: int) -> str:
+    raw = value.to_bytes((value.bit_length() + 7) // 8, "big")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("utf-8")
+
+
+def _build_keys() -> tuple[list[rsa.RSAPrivateKey], dict[str, Any]]:
+    private_keys = [
+        rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        for _ in range(_KEY_COUNT)
+    ]
+    jwks = {
+        "keys": [
+            {
+                "kid": f"key-{idx}",
+                "kty": "RSA",
+                "n": _b64_int(key.public_key().public_numbers().n),
+                "e": _b64_int(key.public_key().public_numbers().e),
+            }
+            for idx, key in enumerate(private_keys)
+        ]
+    }
+    return private_keys, jwks
+
+
+def _legacy_decode(token: str, jwks: dict[str, Any]) -> dict[str, Any]:
+    """Previous behaviour: scan JWKS, rebuild PEM and let PyJWT re-parse it"""
+    kid = jwt.get_unverified_header(token)["kid"]
+    jwk = next(key for key in jwks["keys"] if key["kid"] == kid)
+    decode = lambda val: int.from_bytes(  # noqa: E731
+        base64.urlsafe_b64decode(val.encode("utf-8") + b"=="), "big"
+    )
+    pem = (
+        RSAPublicNumbers(n=decode(jwk["n"]), e=decode(jwk["e"]))
+        .public_key()
+        .public_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PublicFormat.SubjectPublicKeyInfo,
+        )
+    )
+    return jwt.decode(
+        token, pem, algorithms=["RS256"], audience=_AUDIENCE, issuer=_ISSUER
+    )
+
+
+def main() -> None:
+    private_keys, jwks = _build_keys()
+    token = jwt.encode(
+        {"email": "user@kickplate.com", "roles": [], "aud": _AUDIENCE, "iss": _ISSUER},
+        private_keys[-1],
+        algorithm="RS256",
+        headers={"kid": f"key-{_KEY_COUNT - 1}"},
+    )
+
+    validator = TokenValidator(_AUDIENCE, _ISSUER, jwks)
+
+    report(
+        "legacy PEM rebuild per request",
+        measure_rate(lambda: _legacy_decode(token, jwks), _ITERATIONS),
+        "verifications/s",
+    )
+    report(
+        "prebuilt kid index",
+        measure_rate(lambda: validator.decode_verify_token(token), _ITERATIONS),
+        "verifications/s",
+    )
+
+
+if __name__ == "__main__":
+    main()
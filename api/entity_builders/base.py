@@ -1,23 +1,48 @@
 from abc import ABC, abstractmethod
+from typing import Any, ClassVar
 
-from kr8s.asyncio.objects import APIObject
+from kr8s.asyncio.objects import APIObject, new_class
 
 from models.base import BaseRequest, BaseResource
 
+_CRD_REGISTRY: dict[tuple[str, str], type[APIObject]] = {}
+
+
+def get_crd_class(kind: str, version: str) -> type[APIObject]:
+    """Get CRD class for kind and version, created once and then reused"""
+    crd = _CRD_REGISTRY.get((kind, version))
+    if crd is None:
+        crd = _CRD_REGISTRY.setdefault(
+            (kind, version), new_class(kind=kind, version=version)
+        )
+    return crd
+
 
 class BaseEntityBuilder(ABC):
+    crd_kind: ClassVar[str]
+    crd_version: ClassVar[str]
+
     @abstractmethod
     def build_resource(self, request: BaseRequest) -> BaseResource:
         """Base method for building resource from request"""
         raise NotImplementedError()
 
     @abstractmethod
-    def build_manifest(self, resource: BaseResource, namespace: str) -> APIObject:
-        """Base method for building k8s manifest definition from resource"""
+    def build_raw_manifest(
+        self, resource: BaseResource, namespace: str
+    ) -> dict[str, Any]:
+        """Base method for building k8s manifest as plain dicts from resource"""
         raise NotImplementedError()
 
-    @staticmethod
-    @abstractmethod
-    def get_crd() -> type[APIObject]:
+    def build_manifest(self, resource: BaseResource, namespace: str) -> APIObject:
+        """Build k8s manifest definition from resource
+
+        Wrapping in the CRD class converts the whole manifest to a Box, so
+        prefer build_raw_manifest where an APIObject is not needed.
+        """
+        return self.get_crd()(self.build_raw_manifest(resource, namespace))
+
+    @classmethod
+    def get_crd(cls) -> type[APIObject]:
         """Getter for CRD definition"""
-        raise NotImplementedError()
+        return get_crd_class(cls.crd_kind, cls.crd_version)
@@ -0,0 +1,287 @@
+from collections import Counter
+from itertools import chain
+from typing import Any, NamedTuple, Sequence, cast
+
+from models.edag import EDAGRequestStep
+
+
+class InvalidEDAGError(Exception):
+    """EDAG steps do not form a valid directed acyclic graph
+
+    Errors use the same shape as FastAPI request validation errors so clients
+    can handle both alike.
+    """
+
+    def __init__(self, errors: list[dict[str, Any]]):
+        self.errors = errors
+        super().__init__("; ".join(error["msg"] for error in errors))
+
+
+def _error(index: int, field: str, msg: str, error_type: str) -> dict[str, Any]:
+    return {"loc": ["body", "steps", index, field], "msg": msg, "type": error_type}
+
+
+class StepGraph(NamedTuple):
+    """Steps that passed validation, with the depths found while checking them"""
+
+    names: list[str]
+    # Names of the steps each step depends on, as given
+    dependencies: list[list[str]]
+    # Longest chain of dependencies before each step
+    depths: list[int]
+
+
+def validate_steps(steps: Sequence[EDAGRequestStep]) -> StepGraph:
+    """Check names are unique, dependencies exist once each and there are no cycles
+
+    Runs in O(V+E) and reports every problem found rather than the first.
+    Valid steps are checked by name, in a single pass when listed after their
+    dependencies as this runs on every create, and invalid ones by a full walk.
+    """
+    names = [step.stepname for step in steps]
+    dependencies = [step.dependencies for step in steps]
+    depths = _depths_by_name(names, dependencies)
+    if depths is None:
+        depths = _check_all_steps(steps, names)
+    return StepGraph(names, dependencies, depths)
+
+
+def build_schedule(graph: StepGraph) -> dict[str, Any]:
+    """Lay validated steps out into levels, critical path and per step counts
+
+    Returned as plain data in the shape of EDAGSchedule, the steps are already
+    validated and the schedule is only ever written out as JSON.
+    """
+    names, dependencies, depths = graph
+    levels: list[list[str]] = [[] for _ in range(max(depths) + 1)]
+    for name, depth in zip(names, depths):
+        levels[depth].append(name)
+
+    fan_out = Counter(chain.from_iterable(dependencies))
+
+    # Walk back from the deepest step through a dependency one level up
+    depth_by_name = dict(zip(names, depths))
+    dependencies_by_name = dict(zip(names, dependencies))
+    name = names[depths.index(len(levels) - 1)]
+    critical_path = [name]
+    while depth_by_name[name]:
+        depth = depth_by_name[name] - 1
+        name = next(
+            dependency
+            for dependency in dependencies_by_name[name]
+            if depth_by_name[dependency] == depth
+        )
+        critical_path.append(name)
+    critical_path.reverse()
+
+    return {
+        "levels": levels,
+        "critical_path": critical_path,
+        "steps": {
+            name: {
+                "depth": depth,
+                "fan_in": len(step_dependencies),
+                "fan_out": fan_out[name],
+            }
+            for name, step_dependencies, depth in zip(names, dependencies, depths)
+        },
+    }
+
+
+def _depths_by_name(
+    names: list[str], dependencies: list[list[str]]
+) -> list[int] | None:
+    """Depth of each step, None if anything is wrong and every step must be checked
+
+    Steps are usually listed after their dependencies, which takes one pass and
+    rules out cycles. From the first step that is not, the rest are walked
+    depth first instead.
+    """
+    dependencies_by_name = dict(zip(names, dependencies))
+    if len(dependencies_by_name) != len(names) or any(
+        len(set(step_dependencies)) != len(step_dependencies)
+        for step_dependencies in dependencies
+    ):
+        return None
+
+    depth_by_name: dict[str, int] = {}
+    get_depth = depth_by_name.__getitem__
+    position = 0
+    try:
+        for position, (name, step_dependencies) in enumerate(zip(names, dependencies)):
+            depth_by_name[name] = (
+                max(map(get_depth, step_dependencies)) + 1 if step_dependencies else 0
+            )
+    except KeyError:
+        if not _walk_depth_first(names[position:], dependencies_by_name, depth_by_name):
+            return None
+    return list(map(get_depth, names))
+
+
+# Marks steps on the current path of the depth first walk
+_IN_PROGRESS = -1
+
+
+def _walk_depth_first(
+    names: list[str],
+    dependencies_by_name: dict[str, list[str]],
+    depth_by_name: dict[str, int],
+) -> bool:
+    """Add the depth of each of names, False on a cycle or an unknown dependency"""
+    get_depth = depth_by_name.__getitem__
+    for name in names:
+        if name in depth_by_name:
+            continue
+        depth_by_name[name] = _IN_PROGRESS
+        stack = [(name, iter(dependencies_by_name[name]))]
+        while stack:
+            step, pending = stack[-1]
+            for dependency in pending:
+                depth = depth_by_name.get(dependency)
+                if depth is None:
+                    if dependency not in dependencies_by_name:
+                        return False
+                    depth_by_name[dependency] = _IN_PROGRESS
+                    stack.append((dependency, iter(dependencies_by_name[dependency])))
+                    break
+                if depth == _IN_PROGRESS:
+                    return False
+            else:
+                stack.pop()
+                step_dependencies = dependencies_by_name[step]
+                depth_by_name[step] = (
+                    max(map(get_depth, step_dependencies)) + 1
+                    if step_dependencies
+                    else 0
+                )
+    return True
+
+
+def _check_all_steps(steps: Sequence[EDAGRequestStep], names: list[str]) -> list[int]:
+    """Depth of each step by index, raising with every problem found"""
+    # Built in reverse so each name maps to its first step
+    index_by_name = dict(zip(reversed(names), range(len(names) - 1, -1, -1)))
+    duplicates = [
+        index for index, name in enumerate(names) if index_by_name[name] != index
+    ]
+    errors = [
+        _error(
+            index,
+            "stepname",
+            f"Step name {names[index]} is used by more than one step",
+            "duplicate_step",
+        )
+        for index in duplicates
+    ]
+
+    get_index = index_by_name.get
+    dependencies: list[list[int | None]] = [
+        list(map(get_index, step.dependencies)) for step in steps
+    ]
+    # Steps repeating a name are left out of the graph
+    for index in duplicates:
+        dependencies[index] = []
+    for index, step in enumerate(steps):
+        if len(set(step.dependencies)) != len(step.dependencies):
+            errors.extend(_duplicate_dependency_errors(index, step))
+    for index, indices in enumerate(dependencies):
+        if None in indices:
+            errors.extend(_unknown_dependency_errors(index, steps[index], indices))
+            dependencies[index] = [i for i in indices if i is not None]
+
+    # Unknown dependencies, the only None entries, have been dropped
+    graph = cast(list[list[int]], dependencies)
+    depths, blocked = _walk_steps(graph)
+    if blocked:
+        errors.extend(
+            _error(
+                index,
+                "dependencies",
+                f"Step {names[index]} is part of a dependency cycle",
+                "dependency_cycle",
+            )
+            for index in sorted(_cycle_members(blocked, graph))
+        )
+
+    if errors:
+        raise InvalidEDAGError(errors)
+    return depths
+
+
+def _unknown_dependency_errors(
+    index: int, step: EDAGRequestStep, indices: list[int | None]
+) -> list[dict[str, Any]]:
+    return [
+        _error(
+            index,
+            "dependencies",
+            f"Step {step.stepname} depends on unknown step {dependency}",
+            "unknown_dependency",
+        )
+        for dependency, dependency_index in zip(step.dependencies, indices)
+        if dependency_index is None
+    ]
+
+
+def _duplicate_dependency_errors(
+    index: int, step: EDAGRequestStep
+) -> list[dict[str, Any]]:
+    return [
+        _error(
+            index,
+            "dependencies",
+            f"Step {step.stepname} lists dependency {dependency} more than once",
+            "duplicate_dependency",
+        )
+        for dependency, count in Counter(step.dependencies).items()
+        if count > 1
+    ]
+
+
+def _walk_steps(dependencies: list[list[int]]) -> tuple[list[int], set[int]]:
+    """Kahn's algorithm, giving the depth of each step
+
+    A step's depth is worked out once, when its last dependency is done.
+    Anything never reaching zero in-degree is blocked by a cycle.
+    """
+    in_degree = list(map(len, dependencies))
+    # Edges run from a dependency to the steps that depend on it
+    dependents: list[list[int]] = [[] for _ in dependencies]
+    for index, indices in enumerate(dependencies):
+        for dependency in indices:
+            dependents[dependency].append(index)
+
+    depths = [0] * len(dependencies)
+    get_depth = depths.__getitem__
+    ready = [index for index, degree in enumerate(in_degree) if not degree]
+    while ready:
+        index = ready.pop()
+        for dependent in dependents[index]:
+            in_degree[dependent] -= 1
+            if not in_degree[dependent]:
+                depths[dependent] = max(map(get_depth, dependencies[dependent])) + 1
+                ready.append(dependent)
+
+    return depths, {index for index, degree in enumerate(in_degree) if degree}
+
+
+def _cycle_members(blocked: set[int], dependencies: list[list[int]]) -> list[int]:
+    """Drop steps that only sit downstream of a cycle, leaving those on one"""
+    # Counts blocked steps depending on each blocked step
+    out_degree = dict.fromkeys(blocked, 0)
+    for index in blocked:
+        for dependency in dependencies[index]:
+            if dependency in blocked:
+                out_degree[dependency] += 1
+
+    leaves = [index for index, degree in out_degree.items() if not degree]
+    while leaves:
+        index = leaves.pop()
+        del out_degree[index]
+        for dependency in dependencies[index]:
+            if dependency in blocked:
+                out_degree[dependency] -= 1
+                if not out_degree[dependency]:
+                    leaves.append(dependency)
+
+    return list(out_degree)
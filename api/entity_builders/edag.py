@@ -1,44 +1,140 @@
-from typing import Any
+import hashlib
+import json
+from typing import Any, Sequence
 
-from kr8s.asyncio.objects import APIObject, new_class
+import orjson
 
 from entity_builders.base import BaseEntityBuilder
-from models.edag import (EDAG_API_VERSION, EDAG_KIND, EDAGRequest,
-                         EDAGResource, EDAGStepResource)
+from entity_builders.dag_validation import build_schedule, validate_steps
+from models.edag import (
+    EDAG_API_VERSION,
+    EDAG_CONTENT_HASH_ANNOTATION,
+    EDAG_KIND,
+    EDAG_SCHEDULE_ANNOTATION,
+    EDAGRequest,
+    EDAGRequestStep,
+    EDAGResource,
+    EDAGSchedule,
+    EDAGStepResource,
+)
+
+# Kubernetes caps all annotations on an object at 256KiB, leave room for others
+_MAX_SCHEDULE_ANNOTATION_BYTES = 128 * 1024
+
+
+def content_hash(steps: Sequence[EDAGStepResource]) -> str:
+    """Hash of what an EDAG runs, the same whatever order steps were given in
+
+    Steps are sorted by name and dependencies and env sorted within each step,
+    args and commands keep their order as it changes what runs.
+    """
+    canonical = sorted(
+        [
+            step.stepname,
+            step.image,
+            step.replicas,
+            sorted(set(step.dependencies)),
+            sorted(step.env.items()),
+            step.args,
+            step.command,
+        ]
+        for step in steps
+    )
+    return hashlib.sha256(
+        json.dumps(canonical, separators=(",", ":")).encode()
+    ).hexdigest()
 
 
 class EDAGBuilder(BaseEntityBuilder):
+    crd_kind = EDAG_KIND
+    crd_version = EDAG_API_VERSION
+
     def build_resource(self, request: EDAGRequest) -> EDAGResource:
+        schedule = build_schedule(validate_steps(request.steps))
+        steps = [
+            EDAGStepResource(
+                stepname=steprequest.stepname,
+                image=steprequest.image,
+                replicas=steprequest.replicas,
+                dependencies=steprequest.dependencies,
+                env=steprequest.env,
+                args=steprequest.args,
+                command=steprequest.command,
+            )
+            for steprequest in request.steps
+        ]
         return EDAGResource(
             graphname=request.graphname,
-            steps=[
-                EDAGStepResource(
-                    stepname=steprequest.stepname,
-                    image=steprequest.image,
-                    replicas=steprequest.replicas,
-                    dependencies=steprequest.dependencies,
-                    env=steprequest.env,
-                    args=steprequest.args,
-                    command=steprequest.command,
-                )
-                for steprequest in request.steps
-            ],
+            steps=steps,
+            schedule=schedule,
+            content_hash=content_hash(steps),
         )
 
-    def build_manifest(self, resource: EDAGResource, namespace: str) -> APIObject:
-        EDAG = self.get_crd()
-        manifest = EDAG(
-            resource={
-                "metadata": {"name": resource.graphname, "namespace": namespace},
-                "spec": {
-                    "steps": {
-                        step.stepname: self._build_step_manifest(step)
-                        for step in resource.steps
-                    }
-                },
-            }
+    def build_raw_manifest(
+        self, resource: EDAGResource, namespace: str
+    ) -> dict[str, Any]:
+        metadata: dict[str, Any] = {"name": resource.graphname, "namespace": namespace}
+        annotations: dict[str, str] = {}
+        if resource.content_hash is not None:
+            annotations[EDAG_CONTENT_HASH_ANNOTATION] = resource.content_hash
+        if resource.schedule is not None:
+            annotations[EDAG_SCHEDULE_ANNOTATION] = self._build_schedule_annotation(
+                resource.schedule
+            )
+        if annotations:
+            metadata["annotations"] = annotations
+        return {
+            "apiVersion": self.crd_version,
+            "kind": self.crd_kind,
+            "metadata": metadata,
+            "spec": {
+                "steps": {
+                    step.stepname: self._build_step_manifest(step)
+                    for step in resource.steps
+                }
+            },
+        }
+
+    def build_steps_from_manifest(
+        self, manifest: dict[str, Any]
+    ) -> list[EDAGRequestStep]:
+        """Inverse of build_manifest for the steps of an EDAG"""
+        return [
+            EDAGRequestStep(
+                stepname=stepname,
+                image=step["image"],
+                replicas=step["replicas"],
+                dependencies=step.get("dependencies") or [],
+                env=step.get("envs") or {},
+                args=step.get("argument") or [],
+                command=step.get("command") or [],
+            )
+            for stepname, step in manifest["spec"]["steps"].items()
+        ]
+
+    def get_content_hash(self, manifest: dict[str, Any]) -> str | None:
+        """Content hash stored on an EDAG, None if it was created without one"""
+        annotations = manifest["metadata"].get("annotations") or {}
+        return annotations.get(EDAG_CONTENT_HASH_ANNOTATION)
+
+    def build_schedule_from_manifest(
+        self, manifest: dict[str, Any]
+    ) -> EDAGSchedule | None:
+        """Schedule stored on an EDAG, None if it was created without one"""
+        schedule = (manifest["metadata"].get("annotations") or {}).get(
+            EDAG_SCHEDULE_ANNOTATION
         )
-        return manifest
+        if not schedule:
+            return None
+        return EDAGSchedule.model_validate_json(schedule)
+
+    def _build_schedule_annotation(self, schedule: dict[str, Any]) -> str:
+        annotation = orjson.dumps(schedule).decode()
+        # Left empty rather than removed so an update clears any older schedule,
+        # consumers then fall back to walking the steps themselves
+        if len(annotation) > _MAX_SCHEDULE_ANNOTATION_BYTES:
+            return ""
+        return annotation
 
     def _build_step_manifest(self, step: EDAGStepResource) -> dict[str, Any]:
         return {
@@ -49,7 +145,3 @@ class EDAGBuilder(BaseEntityBuilder):
             "image": step.image,
             "replicas": step.replicas,
         }
-
-    @staticmethod
-    def get_crd() -> type[APIObject]:
-        return new_class(kind=EDAG_KIND, version=EDAG_API_VERSION)
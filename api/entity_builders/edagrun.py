@@ -1,51 +1,80 @@
-import random
-from string import ascii_lowercase, digits
-
-from kr8s.asyncio.objects import APIObject, new_class
+import hashlib
+from typing import Any
 
 from entity_builders.base import BaseEntityBuilder
 from models.base import BaseRequest
 from models.edag import EDAG_API_VERSION, EDAG_KIND
-from models.edagrun import EDAG_RUN_API_VERSION, EDAG_RUN_KIND, EDAGRunResource
+from models.edagrun import (
+    EDAG_NAME_LABEL,
+    EDAG_RUN_API_VERSION,
+    EDAG_RUN_KIND,
+    EDAG_RUN_TRACEPARENT_ANNOTATION,
+    OWNER_LABEL,
+    EDAGRunResource,
+)
+
+_OWNER_LABEL_LENGTH = 32
+_LABEL_VALUE_MAX_LENGTH = 63
+_EDAG_LABEL_HASH_LENGTH = 16
+
+
+def owner_label_value(email: str) -> str:
+    """Label safe, non identifying value for the user that started a run"""
+    return hashlib.sha256(email.encode()).hexdigest()[:_OWNER_LABEL_LENGTH]
 
-_GENERATED_SUFFIX_LENGTH = 8
+
+def edag_label_value(edag_name: str) -> str:
+    """Label safe value for an EDAG name, which may be longer than a label allows
+
+    Names that fit are kept as they are. Longer ones are truncated and end in
+    a hash of the full name, so EDAGs sharing a prefix keep distinct labels.
+    """
+    if len(edag_name) <= _LABEL_VALUE_MAX_LENGTH:
+        return edag_name
+    digest = hashlib.sha256(edag_name.encode()).hexdigest()[:_EDAG_LABEL_HASH_LENGTH]
+    prefix = edag_name[: _LABEL_VALUE_MAX_LENGTH - _EDAG_LABEL_HASH_LENGTH - 1]
+    return f"{prefix}-{digest}"
 
 
 class EDAGRunBuilder(BaseEntityBuilder):
+    crd_kind = EDAG_RUN_KIND
+    crd_version = EDAG_RUN_API_VERSION
+
     def build_resource(self, request: BaseRequest) -> EDAGRunResource:
         """Ignore as there is no request body"""
 
         raise NotImplementedError
 
-    def build_manifest(self, resource: EDAGRunResource, namespace: str) -> APIObject:
-        EDAGRun = self.get_crd()
-        manifest = EDAGRun(
-            resource={
-                "metadata": {
-                    "name": self._generate_edagrun_name(resource.edagname),
-                    "namespace": namespace,
-                    "ownerReferences": [
-                        {
-                            "apiVersion": EDAG_API_VERSION,
-                            "kind": EDAG_KIND,
-                            "name": resource.edagname,
-                            "uid": resource.edag_uid,
-                        }
-                    ],
-                },
-                "spec": {"edagname": resource.edagname},
+    def build_raw_manifest(
+        self, resource: EDAGRunResource, namespace: str
+    ) -> dict[str, Any]:
+        metadata: dict[str, Any] = {
+            # API server appends a unique suffix, so names never collide
+            "generateName": f"{resource.edagname}-",
+            "namespace": namespace,
+            "labels": self._build_labels(resource),
+            "ownerReferences": [
+                {
+                    "apiVersion": EDAG_API_VERSION,
+                    "kind": EDAG_KIND,
+                    "name": resource.edagname,
+                    "uid": resource.edag_uid,
+                }
+            ],
+        }
+        if resource.traceparent is not None:
+            metadata["annotations"] = {
+                EDAG_RUN_TRACEPARENT_ANNOTATION: resource.traceparent
             }
-        )
-        return manifest
-
-    def _generate_edagrun_name(self, edagname: str) -> str:
-        suffix = "".join(
-            random.choices(
-                population=ascii_lowercase + digits, k=_GENERATED_SUFFIX_LENGTH
-            )
-        )
-        return f"{edagname}-{suffix}"
-
-    @staticmethod
-    def get_crd() -> type[APIObject]:
-        return new_class(kind=EDAG_RUN_KIND, version=EDAG_RUN_API_VERSION)
+        return {
+            "apiVersion": self.crd_version,
+            "kind": self.crd_kind,
+            "metadata": metadata,
+            "spec": {"edagname": resource.edagname},
+        }
+
+    def _build_labels(self, resource: EDAGRunResource) -> dict[str, str]:
+        labels = {EDAG_NAME_LABEL: edag_label_value(resource.edagname)}
+        if resource.owner is not None:
+            labels[OWNER_LABEL] = owner_label_value(resource.owner)
+        return labels
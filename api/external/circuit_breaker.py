@@ -0,0 +1,60 @@
+import time
+from typing import Callable
+
+
+class CircuitBreaker:
+    """Fails calls fast once a dependency has failed too many times in a row
+
+    After failure_threshold consecutive failures the circuit opens and calls
+    are refused for reset_seconds. A single trial call is then let through,
+    closing the circuit if it succeeds and reopening it if it fails. A trial
+    that never reports back, such as a cancelled call, is replaced by another
+    after reset_seconds.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int,
+        reset_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._failure_threshold = failure_threshold
+        self._reset_seconds = reset_seconds
+        self._clock = clock
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._trial_started_at: float | None = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def retry_after(self) -> float:
+        """Seconds until calls are let through again, 0 if this call may go ahead"""
+        if self._opened_at is None:
+            return 0
+
+        now = self._clock()
+        started_at = self._trial_started_at or self._opened_at
+        wait = started_at + self._reset_seconds - now
+        if wait > 0:
+            return wait
+        self._trial_started_at = now
+        return 0
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._opened_at = None
+        self._trial_started_at = None
+
+    def record_failure(self) -> bool:
+        """Count a failure, returning whether it opened the circuit"""
+        self._failures += 1
+        if self._trial_started_at is not None or (
+            self._opened_at is None and self._failures >= self._failure_threshold
+        ):
+            opened = self._opened_at is None
+            self._opened_at = self._clock()
+            self._trial_started_at = None
+            return opened
+        return False
@@ -0,0 +1,196 @@
+import asyncio
+import logging
+from typing import Any, Callable
+
+from entity_builders.base import BaseEntityBuilder
+from external.kubernetes import KubernetesClient
+
+_LOGGER = logging.getLogger(__name__)
+_INITIAL_RETRY_DELAY_SECONDS = 0.5
+_MAX_RETRY_DELAY_SECONDS = 30
+_LIST_PAGE_SIZE = 500
+_HTTP_GONE = 410
+
+IndexFunc = Callable[[dict[str, Any]], str | None]
+EventListener = Callable[[str, dict[str, Any]], None]
+
+
+class _WatchExpiredError(Exception):
+    """Watch resourceVersion is too old, a full relist is needed"""
+
+    pass
+
+
+class ResourceInformer:
+    """In-memory copy of every resource of one kind, kept current by a watch
+
+    Lists once, then applies watch events on top. Readers must check
+    `synced` and fall back to the API server when it is False.
+
+    Indexers map a resource to a key, such as the EDAG a run belongs to, so
+    that `list_by_index` can find every resource with that key directly.
+
+    Listeners are called with the event type and resource for every change,
+    including those found by a relist, so many consumers can share one watch.
+    """
+
+    def __init__(
+        self,
+        kubernetes_client: KubernetesClient,
+        resource_builder: BaseEntityBuilder,
+        indexers: dict[str, IndexFunc] | None = None,
+    ) -> None:
+        self._kubernetes_client = kubernetes_client
+        self._resource_builder = resource_builder
+        self._items: dict[str, dict[str, Any]] = {}
+        self._indexers = indexers or {}
+        self._indices: dict[str, dict[str, set[str]]] = {
+            index_name: {} for index_name in self._indexers
+        }
+        self._listeners: list[EventListener] = []
+        self._synced = False
+        self._task: asyncio.Task[None] | None = None
+
+    @property
+    def synced(self) -> bool:
+        return self._synced
+
+    def get(self, name: str) -> dict[str, Any] | None:
+        return self._items.get(name)
+
+    def list_by_index(self, index_name: str, key: str) -> list[dict[str, Any]]:
+        names = self._indices[index_name].get(key, set())
+        return [self._items[name] for name in names]
+
+    def add_listener(self, listener: EventListener) -> None:
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: EventListener) -> None:
+        self._listeners.remove(listener)
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._synced = False
+
+    async def _run(self) -> None:
+        delay = _INITIAL_RETRY_DELAY_SECONDS
+        while True:
+            try:
+                resource_version = await self._list()
+                self._synced = True
+                delay = _INITIAL_RETRY_DELAY_SECONDS
+                await self._watch(resource_version)
+            except _WatchExpiredError:
+                _LOGGER.info("Watch expired, relisting %s", self._kind)
+            except Exception:
+                # Any failure, including a malformed event, leaves the cache
+                # stale, so readers fall back to the API server until a relist
+                self._synced = False
+                _LOGGER.warning(
+                    "Informer for %s failed, retrying in %ss",
+                    self._kind,
+                    delay,
+                    exc_info=True,
+                )
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, _MAX_RETRY_DELAY_SECONDS)
+
+    async def _list(self) -> str:
+        items: dict[str, dict[str, Any]] = {}
+        params: dict[str, Any] = {"limit": _LIST_PAGE_SIZE}
+        while True:
+            resource_list = await self._kubernetes_client.list_resources(
+                self._resource_builder, params
+            )
+            for item in resource_list.get("items", []):
+                items[item["metadata"]["name"]] = item
+            continue_token = resource_list["metadata"].get("continue")
+            if not continue_token:
+                break
+            params["continue"] = continue_token
+
+        previous_items = self._items
+        self._items = {}
+        for index in self._indices.values():
+            index.clear()
+        for item in items.values():
+            self._store(item)
+        self._notify_relist(previous_items)
+        return str(resource_list["metadata"]["resourceVersion"])
+
+    async def _watch(self, resource_version: str) -> None:
+        # Watches are closed by the server periodically, resume from last seen version
+        while True:
+            async for event in self._kubernetes_client.watch_resources(
+                self._resource_builder, resource_version
+            ):
+                event_type = event["type"]
+                obj = event["object"]
+                if event_type == "ERROR":
+                    if obj.get("code") == _HTTP_GONE:
+                        raise _WatchExpiredError()
+                    raise ValueError(f"Watch error: {obj.get('message')}")
+
+                resource_version = obj["metadata"]["resourceVersion"]
+                if event_type == "DELETED":
+                    self._remove(obj["metadata"]["name"])
+                    self._notify(event_type, obj)
+                elif event_type in ("ADDED", "MODIFIED"):
+                    self._store(obj)
+                    self._notify(event_type, obj)
+
+    def _notify_relist(self, previous_items: dict[str, dict[str, Any]]) -> None:
+        if not self._listeners:
+            return
+        for name, item in self._items.items():
+            previous = previous_items.get(name)
+            if previous is None:
+                self._notify("ADDED", item)
+            elif previous["metadata"].get("resourceVersion") != item["metadata"].get(
+                "resourceVersion"
+            ):
+                self._notify("MODIFIED", item)
+        for name, previous in previous_items.items():
+            if name not in self._items:
+                self._notify("DELETED", previous)
+
+    def _notify(self, event_type: str, obj: dict[str, Any]) -> None:
+        for listener in list(self._listeners):
+            try:
+                listener(event_type, obj)
+            except Exception:
+                _LOGGER.exception("Listener for %s failed", self._kind)
+
+    def _store(self, obj: dict[str, Any]) -> None:
+        name = obj["metadata"]["name"]
+        self._remove(name)
+        self._items[name] = obj
+        for index_name, index_func in self._indexers.items():
+            key = index_func(obj)
+            if key is not None:
+                self._indices[index_name].setdefault(key, set()).add(name)
+
+    def _remove(self, name: str) -> None:
+        obj = self._items.pop(name, None)
+        if obj is None:
+            return
+        for index_name, index_func in self._indexers.items():
+            key = index_func(obj)
+            names = self._indices[index_name].get(key) if key is not None else None
+            if names is not None:
+                names.discard(name)
+                if not names:
+                    del self._indices[index_name][key]
+
+    @property
+    def _kind(self) -> str:
+        return self._resource_builder.crd_kind
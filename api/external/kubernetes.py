@@ -1,33 +1,432 @@
-from typing import Annotated, Any, cast
+import asyncio
+import json
+import random
+import time
+from typing import Any, AsyncIterator, cast
 
-import kr8s
-from fastapi import Depends
+import httpx
+import kr8s.asyncio
+from kr8s import APITimeoutError, ServerError
 from kr8s.asyncio.objects import APIObject
+from opentelemetry import trace
+from opentelemetry.trace import SpanKind
+from prometheus_client import Counter, Gauge, Histogram
 
 from entity_builders.base import BaseEntityBuilder
+from external.circuit_breaker import CircuitBreaker
+from metrics import LATENCY_BUCKETS
 from models.base import BaseResource
+from settings import settings
+from tracing import tracer
 
 _NAMESPACE = "default"
 
+# The API server rejects these before acting on the request, so any method can
+# be retried. Other server errors may follow a partial write.
+_NOT_PROCESSED_STATUSES = {429, 503}
 
-def _get_api() -> kr8s.Api:
-    """Wrap factory to stop parameters leaking through dependency injection to api route"""
-    return kr8s.api()
+_REQUESTS = Counter(
+    "kubernetes_requests_total",
+    "Kubernetes API requests by outcome, a status code or the failure",
+    ("method", "outcome"),
+)
+_REQUEST_DURATION = Histogram(
+    "kubernetes_request_duration_seconds",
+    "Kubernetes API request latency, excluding time queued for a slot",
+    ("method",),
+    buckets=LATENCY_BUCKETS,
+)
+_RETRIES = Counter(
+    "kubernetes_request_retries_total",
+    "Kubernetes API requests retried after a retryable failure",
+    ("method",),
+)
+_QUEUED = Gauge(
+    "kubernetes_requests_queued", "Kubernetes API requests waiting for a slot"
+)
+_IN_FLIGHT = Gauge(
+    "kubernetes_requests_in_flight", "Kubernetes API requests being sent"
+)
+_CIRCUIT_OPEN = Gauge(
+    "kubernetes_circuit_open", "Whether Kubernetes API calls are being refused"
+)
+_CIRCUIT_OPENED = Counter(
+    "kubernetes_circuit_opened_total", "Times the Kubernetes API circuit opened"
+)
+
+
+class KubernetesUnavailableError(Exception):
+    """API server is failing or too slow, or calls to it are being refused"""
+
+    def __init__(self, retry_after: float | None = None) -> None:
+        self.retry_after = retry_after
+        super().__init__("Kubernetes API is unavailable, please retry later")
+
+
+class _PooledApi(kr8s.asyncio.Api):
+    """kr8s Api whose HTTP session uses an explicitly sized connection pool"""
+
+    async def _create_session(self) -> None:
+        headers = {"User-Agent": self.__version__, "content-type": "application/json"}
+        if self.auth.token:
+            headers["Authorization"] = f"Bearer {self.auth.token}"
+        if self._session:
+            await self._session.aclose()
+        self._session = httpx.AsyncClient(
+            base_url=self.auth.server,
+            headers=headers,
+            verify=await self.auth.ssl_context(),
+            timeout=httpx.Timeout(
+                settings.K8S_TIMEOUT_SECONDS,
+                connect=settings.K8S_CONNECT_TIMEOUT_SECONDS,
+            ),
+            limits=httpx.Limits(
+                max_connections=settings.K8S_POOL_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.K8S_POOL_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.K8S_POOL_KEEPALIVE_EXPIRY_SECONDS,
+            ),
+            follow_redirects=True,
+        )
 
 
 class KubernetesClient:
-    def __init__(self, api: Annotated[kr8s.Api, Depends(_get_api)]) -> None:
+    """Calls to the Kubernetes API, connecting on first use
+
+    Without an api one is created from url, or the kubeconfig or service
+    account when url is None, so the app starts even without credentials.
+    """
+
+    def __init__(
+        self, api: kr8s.asyncio.Api | None = None, url: str | None = None
+    ) -> None:
         self._client = api
+        self._url = url
+        self._connect_lock = asyncio.Lock()
+        # Queue excess requests here rather than in the connection pool, whose
+        # wait queue is scanned in full every time a connection frees up
+        self._request_slots = asyncio.Semaphore(settings.K8S_POOL_MAX_CONNECTIONS)
+        self._circuit_breaker = CircuitBreaker(
+            settings.K8S_CIRCUIT_FAILURE_THRESHOLD, settings.K8S_CIRCUIT_RESET_SECONDS
+        )
 
     async def create_resource(
         self, resource_builder: BaseEntityBuilder, resource: BaseResource
     ) -> dict[str, Any]:
-        manifest = resource_builder.build_manifest(resource, _NAMESPACE)
-        manifest.api = self._client
-        await manifest.create()
-        return cast(dict[str, Any], manifest.raw)
+        # Posted as plain dicts, an APIObject would convert it to a Box both ways
+        manifest = resource_builder.build_raw_manifest(resource, _NAMESPACE)
+        crd = resource_builder.get_crd()
+        response = await self._call(
+            "POST",
+            idempotent=False,
+            version=crd.version,
+            url=crd.endpoint,
+            namespace=_NAMESPACE,
+            data=json.dumps(manifest),
+        )
+        return cast(dict[str, Any], response.json())
+
+    async def update_resource(
+        self,
+        resource_builder: BaseEntityBuilder,
+        resource: BaseResource,
+        current: APIObject,
+        resource_version: str | None = None,
+    ) -> dict[str, Any] | None:
+        """Replace the spec of current with resource, None if already up to date
+
+        Annotations set by the builder are merged over those already on current.
+        When resource_version is given the API server rejects the update with a
+        409 if the resource has changed since that version.
+        """
+        manifest = resource_builder.build_raw_manifest(resource, _NAMESPACE)
+        spec = manifest["spec"]
+        annotations = manifest["metadata"].get("annotations") or {}
+        current_annotations = current.raw["metadata"].get("annotations") or {}
+        if current.raw.get("spec") == spec and all(
+            current_annotations.get(key) == value for key, value in annotations.items()
+        ):
+            return None
+
+        patch: list[dict[str, Any]] = [
+            {"op": "replace", "path": "/spec", "value": spec}
+        ]
+        if annotations:
+            patch.append(
+                {
+                    "op": "add",
+                    "path": "/metadata/annotations",
+                    "value": {**current_annotations, **annotations},
+                }
+            )
+        if resource_version is not None:
+            patch.insert(
+                0,
+                {
+                    "op": "replace",
+                    "path": "/metadata/resourceVersion",
+                    "value": resource_version,
+                },
+            )
+
+        crd = resource_builder.get_crd()
+        response = await self._call(
+            "PATCH",
+            idempotent=False,
+            version=crd.version,
+            url=f"{crd.endpoint}/{current.name}",
+            namespace=_NAMESPACE,
+            data=json.dumps(patch),
+            headers={"Content-Type": "application/json-patch+json"},
+        )
+        return cast(dict[str, Any], response.json())
 
     async def get_resource(
         self, resource_builder: BaseEntityBuilder, name: str
     ) -> APIObject:
-        return await resource_builder.get_crd().get(name, namespace=_NAMESPACE)
+        # Direct GET so a missing resource fails fast with a 404 ServerError
+        crd = resource_builder.get_crd()
+        response = await self._call(
+            "GET",
+            idempotent=True,
+            version=crd.version,
+            url=f"{crd.endpoint}/{name}",
+            namespace=_NAMESPACE,
+        )
+        return crd(response.json(), api=await self._get_api())
+
+    async def delete_resource(
+        self,
+        resource_builder: BaseEntityBuilder,
+        name: str,
+        resource_version: str | None = None,
+    ) -> None:
+        """Delete without waiting for dependents, which are garbage collected after"""
+        delete_options: dict[str, Any] = {"propagationPolicy": "Background"}
+        if resource_version is not None:
+            delete_options["preconditions"] = {"resourceVersion": resource_version}
+
+        crd = resource_builder.get_crd()
+        await self._call(
+            "DELETE",
+            idempotent=False,
+            version=crd.version,
+            url=f"{crd.endpoint}/{name}",
+            namespace=_NAMESPACE,
+            data=json.dumps(delete_options),
+        )
+
+    async def list_resources(
+        self, resource_builder: BaseEntityBuilder, params: dict[str, Any] | None = None
+    ) -> dict[str, Any]:
+        """List resources as a raw List object, including list metadata"""
+        crd = resource_builder.get_crd()
+        response = await self._call(
+            "GET",
+            idempotent=True,
+            version=crd.version,
+            url=crd.endpoint,
+            namespace=_NAMESPACE,
+            params=params,
+        )
+        return cast(dict[str, Any], response.json())
+
+    async def watch_resources(
+        self, resource_builder: BaseEntityBuilder, resource_version: str
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Stream raw watch events starting after resource_version"""
+        crd = resource_builder.get_crd()
+        api = await self._get_api()
+        async with api.call_api(
+            "GET",
+            version=crd.version,
+            url=crd.endpoint,
+            namespace=_NAMESPACE,
+            params={
+                "watch": "true",
+                "resourceVersion": resource_version,
+                "allowWatchBookmarks": "true",
+            },
+            stream=True,
+            timeout=None,
+        ) as response:
+            async for line in response.aiter_lines():
+                if line:
+                    yield json.loads(line)
+
+    async def _call(
+        self, method: str, idempotent: bool, **kwargs: Any
+    ) -> httpx.Response:
+        """Send a request, retrying failures which are safe to retry
+
+        Responses the API server did not act on are retried for any method,
+        other server errors and timeouts only when idempotent. Retries back off
+        with jitter, waiting at least as long as any Retry-After. Queueing and
+        retries all fit within K8S_CALL_TIMEOUT_SECONDS, after which, or while
+        the circuit is open, KubernetesUnavailableError is raised.
+        """
+        deadline = asyncio.get_running_loop().time() + settings.K8S_CALL_TIMEOUT_SECONDS
+        with tracer.start_as_current_span(
+            f"Kubernetes {method}",
+            kind=SpanKind.CLIENT,
+            attributes={"http.request.method": method, "url.path": kwargs["url"]},
+        ) as span:
+            try:
+                response = await asyncio.wait_for(
+                    self._call_with_retries(method, idempotent, deadline, kwargs),
+                    settings.K8S_CALL_TIMEOUT_SECONDS,
+                )
+            except asyncio.TimeoutError as exc:
+                _REQUESTS.labels(method, "timeout").inc()
+                self._record_failure()
+                raise KubernetesUnavailableError() from exc
+            span.set_attribute("http.response.status_code", response.status_code)
+            return response
+
+    async def _call_with_retries(
+        self, method: str, idempotent: bool, deadline: float, kwargs: dict[str, Any]
+    ) -> httpx.Response:
+        attempt = 0
+        while True:
+            retry_after = self._circuit_breaker.retry_after()
+            if retry_after:
+                _REQUESTS.labels(method, "circuit_open").inc()
+                raise KubernetesUnavailableError(retry_after)
+
+            try:
+                return await self._attempt(method, **kwargs)
+            except (ServerError, APITimeoutError, httpx.TransportError) as exc:
+                if not _is_retryable(exc, idempotent):
+                    if isinstance(exc, ServerError):
+                        raise
+                    raise KubernetesUnavailableError() from exc
+                delay = _retry_after(exc)
+                error = exc
+
+            backoff = _backoff(attempt, delay)
+            attempt += 1
+            if (
+                attempt > settings.K8S_MAX_RETRIES
+                or asyncio.get_running_loop().time() + backoff >= deadline
+            ):
+                raise KubernetesUnavailableError(delay) from error
+            _RETRIES.labels(method).inc()
+            trace.get_current_span().add_event(
+                "retry", {"attempt": attempt, "delay_seconds": backoff}
+            )
+            await asyncio.sleep(backoff)
+
+    async def _attempt(self, method: str, **kwargs: Any) -> httpx.Response:
+        api = await self._get_api()
+        _QUEUED.inc()
+        try:
+            await self._request_slots.acquire()
+        finally:
+            _QUEUED.dec()
+
+        _IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            # Non streamed responses are read in full before call_api yields
+            async with api.call_api(method, **kwargs) as response:
+                pass
+        except ServerError as exc:
+            status_code = _status_code(exc)
+            _REQUESTS.labels(method, str(status_code)).inc()
+            if status_code in _NOT_PROCESSED_STATUSES or status_code >= 500:
+                self._record_failure()
+            else:
+                self._record_success()
+            raise
+        except (APITimeoutError, httpx.TransportError):
+            _REQUESTS.labels(method, "error").inc()
+            self._record_failure()
+            raise
+        finally:
+            _REQUEST_DURATION.labels(method).observe(time.perf_counter() - start)
+            _IN_FLIGHT.dec()
+            self._request_slots.release()
+
+        _REQUESTS.labels(method, str(response.status_code)).inc()
+        self._record_success()
+        return response
+
+    def _record_success(self) -> None:
+        self._circuit_breaker.record_success()
+        _CIRCUIT_OPEN.set(0)
+
+    def _record_failure(self) -> None:
+        if self._circuit_breaker.record_failure():
+            _CIRCUIT_OPENED.inc()
+        _CIRCUIT_OPEN.set(self._circuit_breaker.is_open)
+
+    async def _get_api(self) -> kr8s.asyncio.Api:
+        if self._client is not None:
+            return self._client
+        async with self._connect_lock:
+            if self._client is None:
+                try:
+                    api = await _PooledApi(url=self._url, bypass_factory=True)
+                    # kr8s creates the session lazily, so a burst of first
+                    # requests would each build their own session and SSL context
+                    await api._create_session()
+                except ValueError as exc:
+                    # Raised by kr8s when no credentials can be found
+                    raise KubernetesUnavailableError() from exc
+                self._client = api
+        return self._client
+
+    async def close(self) -> None:
+        if self._client is not None and self._client._session is not None:
+            await self._client._session.aclose()
+
+
+def _status_code(exc: ServerError) -> int:
+    if exc.response is not None:
+        return exc.response.status_code
+    return 500
+
+
+def _is_retryable(exc: Exception, idempotent: bool) -> bool:
+    if not isinstance(exc, ServerError):
+        return idempotent
+    status_code = _status_code(exc)
+    return status_code in _NOT_PROCESSED_STATUSES or (idempotent and status_code >= 500)
+
+
+def _retry_after(exc: Exception) -> float | None:
+    """Seconds from a Retry-After header, ignoring HTTP dates"""
+    if not isinstance(exc, ServerError) or exc.response is None:
+        return None
+    try:
+        return float(exc.response.headers.get("Retry-After", ""))
+    except ValueError:
+        return None
+
+
+def _backoff(attempt: int, retry_after: float | None) -> float:
+    """Exponential backoff with full jitter, so retries from replicas spread out"""
+    ceiling = min(
+        settings.K8S_RETRY_MAX_DELAY_SECONDS,
+        settings.K8S_RETRY_BASE_DELAY_SECONDS * 2**attempt,
+    )
+    return (retry_after or 0) + random.uniform(0, ceiling)
+
+
+_kubernetes_client: KubernetesClient | None = None
+
+
+def get_kubernetes_client() -> KubernetesClient:
+    return cast(KubernetesClient, _kubernetes_client)
+
+
+def initialise_kubernetes_client(url: str | None = None) -> None:
+    """Create the app scoped client shared by all requests, connecting on first use"""
+    global _kubernetes_client
+    _kubernetes_client = KubernetesClient(url=url)
+
+
+async def shutdown_kubernetes_client() -> None:
+    global _kubernetes_client
+    if _kubernetes_client is not None:
+        await _kubernetes_client.close()
+        _kubernetes_client = None
@@ -0,0 +1,129 @@
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Callable
+
+# Refill, take and expiry in one atomic step, timed by the Redis server so
+# that every API replica shares one clock
+_TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local server_time = redis.call('TIME')
+local now = tonumber(server_time[1]) + tonumber(server_time[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(bucket[1]) or burst
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+local taken = math.min(requested, math.floor(tokens))
+tokens = tokens - taken
+local wait_ms = 0
+if taken < requested then
+    wait_ms = math.ceil((1 - tokens) / rate * 1000)
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000))
+return {taken, wait_ms}
+"""
+
+# Buckets that expired were full, so only buckets still held are refilled
+_GIVE_BACK_SCRIPT = """
+local tokens = tonumber(redis.call('HGET', KEYS[1], 'tokens'))
+if tokens then
+    local burst = tonumber(ARGV[1])
+    redis.call('HSET', KEYS[1], 'tokens', math.min(burst, tokens + tonumber(ARGV[2])))
+end
+return 0
+"""
+
+# Buckets idle long enough to have refilled are pruned past this many keys
+_PRUNE_THRESHOLD = 10000
+
+
+class RateLimitBackend(ABC):
+    """Token buckets shared by everything using the same backend"""
+
+    @abstractmethod
+    async def take(
+        self, key: str, rate: float, burst: int, tokens: int
+    ) -> tuple[int, float]:
+        """Take up to tokens from the bucket for key, refilling at rate per second
+
+        Returns how many were taken and, if fewer than asked for, the seconds
+        until the next token is available.
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    async def give_back(self, key: str, rate: float, burst: int, tokens: int) -> None:
+        """Return tokens taken but not used to the bucket for key"""
+        raise NotImplementedError()
+
+    async def close(self) -> None:
+        pass
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """Buckets held by this process, so each API replica limits separately"""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic) -> None:
+        self._clock = clock
+        self._buckets: dict[str, tuple[float, float, float]] = {}
+
+    async def take(
+        self, key: str, rate: float, burst: int, tokens: int
+    ) -> tuple[int, float]:
+        now = self._clock()
+        available, updated, _ = self._buckets.get(key, (burst, now, now))
+        available = min(burst, available + (now - updated) * rate)
+
+        taken = min(tokens, int(available))
+        available -= taken
+        wait = 0.0 if taken == tokens else (1 - available) / rate
+
+        if len(self._buckets) >= _PRUNE_THRESHOLD:
+            self._prune(now)
+        self._buckets[key] = (available, now, now + (burst - available) / rate)
+        return taken, wait
+
+    async def give_back(self, key: str, rate: float, burst: int, tokens: int) -> None:
+        if key not in self._buckets:
+            return
+        available, updated, _ = self._buckets[key]
+        available = min(burst, available + tokens)
+        self._buckets[key] = (available, updated, updated + (burst - available) / rate)
+
+    def _prune(self, now: float) -> None:
+        self._buckets = {
+            key: bucket for key, bucket in self._buckets.items() if bucket[2] > now
+        }
+
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """Buckets in Redis, shared by every API replica
+
+    client is a redis.asyncio.Redis or anything with the same eval and aclose.
+    """
+
+    def __init__(self, client: Any) -> None:
+        self._client = client
+
+    async def take(
+        self, key: str, rate: float, burst: int, tokens: int
+    ) -> tuple[int, float]:
+        taken, wait_ms = await self._client.eval(
+            _TOKEN_BUCKET_SCRIPT, 1, key, rate, burst, tokens
+        )
+        return int(taken), int(wait_ms) / 1000
+
+    async def give_back(self, key: str, rate: float, burst: int, tokens: int) -> None:
+        await self._client.eval(_GIVE_BACK_SCRIPT, 1, key, burst, tokens)
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+def create_redis_rate_limit_backend(url: str) -> RedisRateLimitBackend:
+    # Only needed when a shared backend is configured, so imported here
+    from redis.asyncio import Redis
+
+    return RedisRateLimitBackend(Redis.from_url(url))
@@ -0,0 +1,105 @@
+import brotli
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+def _accepted_encodings(accept_encoding: str) -> set[str]:
+    """Content codings in an Accept-Encoding header, less any refused with q=0"""
+    encodings = set()
+    for item in accept_encoding.split(","):
+        coding, *params = item.split(";")
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0
+        if quality > 0:
+            encodings.add(coding.strip().lower())
+    return encodings
+
+
+class CompressionMiddleware:
+    """Compresses responses of minimum_size bytes or more with brotli or gzip
+
+    Brotli is preferred when a client accepts both as it makes JSON smaller at
+    a similar cost, gzip is left to Starlette's GZipMiddleware. Responses that
+    already set Content-Encoding are passed through untouched.
+    """
+
+    def __init__(
+        self, app: ASGIApp, minimum_size: int, gzip_level: int, brotli_quality: int
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.brotli_quality = brotli_quality
+        self.gzip = GZipMiddleware(app, minimum_size, gzip_level)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and "br" in _accepted_encodings(
+            Headers(scope=scope).get("Accept-Encoding", "")
+        ):
+            responder = _BrotliResponder(
+                self.app, self.minimum_size, self.brotli_quality
+            )
+            await responder(scope, receive, send)
+            return
+        await self.gzip(scope, receive, send)
+
+
+class _BrotliResponder:
+    """Brotli counterpart of Starlette's GZipResponder, for a single response"""
+
+    def __init__(self, app: ASGIApp, minimum_size: int, quality: int) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.compressor = brotli.Compressor(quality=quality)
+        self.initial_message: Message = {}
+        self.started = False
+        self.compressing = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        async def send_with_brotli(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                # Held back until the first body shows whether to compress
+                self.initial_message = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            first = not self.started
+            if first:
+                self.started = True
+                headers = Headers(raw=self.initial_message["headers"])
+                self.compressing = "content-encoding" not in headers and (
+                    more_body or len(body) >= self.minimum_size
+                )
+
+            if self.compressing:
+                body = self.compressor.process(body)
+                if not more_body:
+                    body += self.compressor.finish()
+                message = {**message, "body": body}
+
+            if first:
+                if self.compressing:
+                    self._set_compressed_headers(len(body), more_body)
+                await send(self.initial_message)
+            await send(message)
+
+        await self.app(scope, receive, send_with_brotli)
+
+    def _set_compressed_headers(self, length: int, more_body: bool) -> None:
+        headers = MutableHeaders(raw=self.initial_message["headers"])
+        headers["Content-Encoding"] = "br"
+        headers.add_vary_header("Accept-Encoding")
+        if more_body:
+            del headers["Content-Length"]
+        else:
+            headers["Content-Length"] = str(length)
@@ -1,9 +1,22 @@
 import logging
+import math
 
 from fastapi import Request
-from fastapi.responses import JSONResponse
-from starlette.status import (HTTP_404_NOT_FOUND, HTTP_409_CONFLICT,
-                              HTTP_500_INTERNAL_SERVER_ERROR)
+from fastapi.responses import ORJSONResponse
+from starlette.status import (
+    HTTP_400_BAD_REQUEST,
+    HTTP_404_NOT_FOUND,
+    HTTP_409_CONFLICT,
+    HTTP_410_GONE,
+    HTTP_412_PRECONDITION_FAILED,
+    HTTP_422_UNPROCESSABLE_ENTITY,
+    HTTP_429_TOO_MANY_REQUESTS,
+    HTTP_500_INTERNAL_SERVER_ERROR,
+    HTTP_503_SERVICE_UNAVAILABLE,
+)
+
+from entity_builders.dag_validation import InvalidEDAGError
+from external.kubernetes import KubernetesUnavailableError
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -17,7 +30,8 @@ class BaseGraphExceptions(Exception):
 class UndeterminedApiError(BaseGraphExceptions):
     """API Error could not be categorised"""
 
-    pass
+    def __init__(self) -> None:
+        super().__init__("Unknown error from the Kubernetes API")
 
 
 class EDAGAlreadyExistsError(BaseGraphExceptions):
@@ -34,11 +48,69 @@ class EDAGNotFoundError(BaseGraphExceptions):
         super().__init__(f"EDAG {edag_name} not found")
 
 
+class EDAGChangedError(BaseGraphExceptions):
+    """EDAG no longer matches the version the client conditioned on"""
+
+    def __init__(self, edag_name: str):
+        self.edag_name = edag_name
+        super().__init__(f"EDAG {edag_name} has been modified")
+
+
+class InvalidIfMatchError(BaseGraphExceptions):
+    """If-Match header lists no ETags"""
+
+    def __init__(self) -> None:
+        super().__init__("If-Match must list at least one ETag or *")
+
+
+class EDAGNameMismatchError(BaseGraphExceptions):
+    def __init__(self, path_name: str, body_name: str):
+        super().__init__(
+            f"Graph name {body_name} does not match EDAG {path_name} being updated"
+        )
+
+
+class EDAGRunNotFoundError(BaseGraphExceptions):
+    def __init__(self, run_name: str):
+        self.run_name = run_name
+        super().__init__(f"EDAG run {run_name} not found")
+
+
+class RunStatusNotReadyError(BaseGraphExceptions):
+    """Run status cache has not finished its initial sync"""
+
+    def __init__(self) -> None:
+        super().__init__("Run status is initialising, please retry shortly")
+
+
+class TooManyStreamsError(BaseGraphExceptions):
+    """User already has the maximum number of open status streams"""
+
+    def __init__(self, max_streams: int):
+        self.max_streams = max_streams
+        super().__init__(f"A maximum of {max_streams} status streams can be open")
+
+
+class RunRateLimitedError(BaseGraphExceptions):
+    """User or EDAG has started too many runs recently"""
+
+    def __init__(self, retry_after: float):
+        self.retry_after = retry_after
+        super().__init__("Too many runs started, please retry later")
+
+
+class ContinueTokenExpiredError(BaseGraphExceptions):
+    """Continue token is too old to resume a paginated list from"""
+
+    def __init__(self) -> None:
+        super().__init__("Continue token has expired, restart the list")
+
+
 def add_exception_handlers(app) -> None:
     @app.exception_handler(UndeterminedApiError)
     def handle_unknown_api_error(request: Request, exc: UndeterminedApiError):
         _LOGGER.error("Unknown error", exc_info=exc)
-        return JSONResponse(
+        return ORJSONResponse(
             {
                 "detail": "An unknown error occured, please try again or contact an admin"
             },
@@ -47,14 +119,96 @@ def add_exception_handlers(app) -> None:
 
     @app.exception_handler(EDAGAlreadyExistsError)
     def handle_edag_already_exists(request: Request, exc: EDAGAlreadyExistsError):
-        return JSONResponse(
+        return ORJSONResponse(
             {"detail": str(exc)},
             status_code=HTTP_409_CONFLICT,
         )
 
     @app.exception_handler(EDAGNotFoundError)
     def handle_edag_not_found(request: Request, exc: EDAGNotFoundError):
-        return JSONResponse(
+        return ORJSONResponse(
+            {"detail": str(exc)},
+            status_code=HTTP_404_NOT_FOUND,
+        )
+
+    @app.exception_handler(EDAGRunNotFoundError)
+    def handle_edag_run_not_found(request: Request, exc: EDAGRunNotFoundError):
+        return ORJSONResponse(
             {"detail": str(exc)},
             status_code=HTTP_404_NOT_FOUND,
         )
+
+    @app.exception_handler(RunStatusNotReadyError)
+    def handle_run_status_not_ready(request: Request, exc: RunStatusNotReadyError):
+        return ORJSONResponse(
+            {"detail": str(exc)},
+            status_code=HTTP_503_SERVICE_UNAVAILABLE,
+            headers={"Retry-After": "1"},
+        )
+
+    @app.exception_handler(TooManyStreamsError)
+    def handle_too_many_streams(request: Request, exc: TooManyStreamsError):
+        return ORJSONResponse(
+            {"detail": str(exc)},
+            status_code=HTTP_429_TOO_MANY_REQUESTS,
+        )
+
+    @app.exception_handler(RunRateLimitedError)
+    def handle_run_rate_limited(request: Request, exc: RunRateLimitedError):
+        return ORJSONResponse(
+            {"detail": str(exc)},
+            status_code=HTTP_429_TOO_MANY_REQUESTS,
+            headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))},
+        )
+
+    @app.exception_handler(KubernetesUnavailableError)
+    def handle_kubernetes_unavailable(
+        request: Request, exc: KubernetesUnavailableError
+    ):
+        _LOGGER.warning("Kubernetes API unavailable", exc_info=exc)
+        return ORJSONResponse(
+            {"detail": str(exc)},
+            status_code=HTTP_503_SERVICE_UNAVAILABLE,
+            headers={"Retry-After": str(max(1, math.ceil(exc.retry_after or 1)))},
+        )
+
+    _add_request_error_handlers(app)
+
+
+def _add_request_error_handlers(app) -> None:
+    """Errors caused by what the client sent rather than the cluster state"""
+
+    @app.exception_handler(ContinueTokenExpiredError)
+    def handle_continue_token_expired(request: Request, exc: ContinueTokenExpiredError):
+        return ORJSONResponse(
+            {"detail": str(exc)},
+            status_code=HTTP_410_GONE,
+        )
+
+    @app.exception_handler(EDAGChangedError)
+    def handle_edag_changed(request: Request, exc: EDAGChangedError):
+        return ORJSONResponse(
+            {"detail": str(exc)},
+            status_code=HTTP_412_PRECONDITION_FAILED,
+        )
+
+    @app.exception_handler(InvalidIfMatchError)
+    def handle_invalid_if_match(request: Request, exc: InvalidIfMatchError):
+        return ORJSONResponse(
+            {"detail": str(exc)},
+            status_code=HTTP_400_BAD_REQUEST,
+        )
+
+    @app.exception_handler(EDAGNameMismatchError)
+    def handle_edag_name_mismatch(request: Request, exc: EDAGNameMismatchError):
+        return ORJSONResponse(
+            {"detail": str(exc)},
+            status_code=HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+
+    @app.exception_handler(InvalidEDAGError)
+    def handle_invalid_edag(request: Request, exc: InvalidEDAGError):
+        return ORJSONResponse(
+            {"detail": exc.errors},
+            status_code=HTTP_422_UNPROCESSABLE_ENTITY,
+        )
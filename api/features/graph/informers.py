@@ -0,0 +1,57 @@
+from typing import Any, cast
+
+from entity_builders.edag import EDAGBuilder
+from entity_builders.edagrun import EDAGRunBuilder
+from external.informer import ResourceInformer
+from external.kubernetes import get_kubernetes_client
+from features.graph.streams import RunStatusBroadcaster
+
+EDAG_NAME_INDEX = "edagname"
+
+_edag_informer: ResourceInformer | None = None
+_edag_run_informer: ResourceInformer | None = None
+_run_status_broadcaster: RunStatusBroadcaster | None = None
+
+
+def get_edag_informer() -> ResourceInformer:
+    return cast(ResourceInformer, _edag_informer)
+
+
+def get_edag_run_informer() -> ResourceInformer:
+    return cast(ResourceInformer, _edag_run_informer)
+
+
+def get_run_status_broadcaster() -> RunStatusBroadcaster:
+    return cast(RunStatusBroadcaster, _run_status_broadcaster)
+
+
+def _index_by_edag_name(edag_run: dict[str, Any]) -> str | None:
+    return cast(str | None, edag_run.get("spec", {}).get("edagname"))
+
+
+def start_informers() -> None:
+    """Start background watches, requires the kubernetes client to be initialised"""
+    global _edag_informer, _edag_run_informer, _run_status_broadcaster
+    _edag_informer = ResourceInformer(get_kubernetes_client(), EDAGBuilder())
+    _edag_run_informer = ResourceInformer(
+        get_kubernetes_client(),
+        EDAGRunBuilder(),
+        indexers={EDAG_NAME_INDEX: _index_by_edag_name},
+    )
+    _run_status_broadcaster = RunStatusBroadcaster(_edag_run_informer, _edag_informer)
+    _run_status_broadcaster.start()
+    _edag_informer.start()
+    _edag_run_informer.start()
+
+
+async def stop_informers() -> None:
+    global _edag_informer, _edag_run_informer, _run_status_broadcaster
+    if _run_status_broadcaster is not None:
+        _run_status_broadcaster.stop()
+        _run_status_broadcaster = None
+    if _edag_informer is not None:
+        await _edag_informer.stop()
+        _edag_informer = None
+    if _edag_run_informer is not None:
+        await _edag_run_informer.stop()
+        _edag_run_informer = None
@@ -0,0 +1,108 @@
+from collections import Counter
+from typing import Annotated, Sequence
+
+from fastapi import Depends, Path, Security
+
+from auth.security import RBACSecurity
+from entity_builders.edagrun import owner_label_value
+from external.rate_limit import (
+    InMemoryRateLimitBackend,
+    RateLimitBackend,
+    create_redis_rate_limit_backend,
+)
+from features.graph.exceptions import RunRateLimitedError
+from models.auth import User
+from settings import settings
+
+
+class RunRateLimiter:
+    """Token buckets per user and per EDAG, smoothing bursts of runs
+
+    Buckets hold up to the burst setting and refill at the per second rate.
+    Every run is charged, a batch larger than a bucket has as many runs
+    admitted as it holds and the rest refused.
+    """
+
+    def __init__(self, backend: RateLimitBackend) -> None:
+        self.backend = backend
+
+    async def admit(self, user_email: str, edag_names: Sequence[str]) -> list[bool]:
+        """Admit as many runs of edag_names as the buckets allow, in order
+
+        Returns whether each run was admitted and raises RunRateLimitedError if
+        none were. Tokens the user bucket gave for runs an EDAG bucket then
+        refused are given back.
+        """
+        # Hashed so emails are not stored in a shared backend
+        user_key = f"runs:user:{owner_label_value(user_email)}"
+        user_taken, retry_after = await self.backend.take(
+            user_key,
+            settings.RUN_RATE_LIMIT_PER_USER_PER_SECOND,
+            settings.RUN_RATE_LIMIT_PER_USER_BURST,
+            len(edag_names),
+        )
+
+        # The user's tokens go to the first runs, each EDAG then admits what it can
+        admitted_per_edag: dict[str, int] = {}
+        edag_retry_afters = []
+        for edag_name, runs in Counter(edag_names[:user_taken]).items():
+            taken, edag_retry_after = await self.backend.take(
+                f"runs:edag:{edag_name}",
+                settings.RUN_RATE_LIMIT_PER_EDAG_PER_SECOND,
+                settings.RUN_RATE_LIMIT_PER_EDAG_BURST,
+                runs,
+            )
+            admitted_per_edag[edag_name] = taken
+            if taken < runs:
+                edag_retry_afters.append(edag_retry_after)
+
+        unused = user_taken - sum(admitted_per_edag.values())
+        if unused:
+            await self.backend.give_back(
+                user_key,
+                settings.RUN_RATE_LIMIT_PER_USER_PER_SECOND,
+                settings.RUN_RATE_LIMIT_PER_USER_BURST,
+                unused,
+            )
+
+        admitted = []
+        for edag_name in edag_names:
+            remaining = admitted_per_edag.get(edag_name, 0)
+            admitted.append(remaining > 0)
+            if remaining:
+                admitted_per_edag[edag_name] = remaining - 1
+        if not any(admitted):
+            # Either the user bucket is empty or every EDAG bucket asked for is
+            raise RunRateLimitedError(
+                min(edag_retry_afters) if user_taken else retry_after
+            )
+        return admitted
+
+
+_run_rate_limiter = RunRateLimiter(InMemoryRateLimitBackend())
+
+
+def get_run_rate_limiter() -> RunRateLimiter:
+    return _run_rate_limiter
+
+
+def initialise_run_rate_limiter() -> None:
+    """Share buckets between replicas through Redis when it is configured"""
+    if settings.RUN_RATE_LIMIT_REDIS_URL is not None:
+        _run_rate_limiter.backend = create_redis_rate_limit_backend(
+            settings.RUN_RATE_LIMIT_REDIS_URL
+        )
+
+
+async def shutdown_run_rate_limiter() -> None:
+    await _run_rate_limiter.backend.close()
+    _run_rate_limiter.backend = InMemoryRateLimitBackend()
+
+
+async def limit_run(
+    edagname: Annotated[str, Path()],
+    user: Annotated[User, Security(RBACSecurity.verify)],
+    rate_limiter: Annotated[RunRateLimiter, Depends(get_run_rate_limiter)],
+) -> None:
+    """Dependency admitting one run of the EDAG in the path"""
+    await rate_limiter.admit(user.email, [edagname])
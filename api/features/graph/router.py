@@ -1,31 +1,134 @@
-from typing import Annotated, cast
+from typing import Annotated, AsyncIterator, cast
 
-from fastapi import APIRouter, Body, Depends, Path, Security
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Body, Depends, Header, Path, Query, Response, Security
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from starlette.status import HTTP_204_NO_CONTENT, HTTP_304_NOT_MODIFIED
 
 from auth.security import RBACSecurity
 from models.auth import Role, User
-from models.edag import EDAGRequest
-from models.edagrun import EDAGRunResponse
+from models.edag import (
+    EDAGBulkRequest,
+    EDAGBulkResponse,
+    EDAGListResponse,
+    EDAGRequest,
+    EDAGResponse,
+)
+from models.edagrun import (
+    EDAGRunBatchRequest,
+    EDAGRunBatchResponse,
+    EDAGRunListResponse,
+    EDAGRunResponse,
+)
+from models.status import GraphStatusDetails
+from serialization import ModelResponse, ORJSONRoute
+from .exceptions import InvalidIfMatchError
+from .informers import get_run_status_broadcaster
+from .rate_limit import RunRateLimiter, get_run_rate_limiter, limit_run
 from .services import EDAGServices
+from .streams import RunStatusBroadcaster, RunStatusStreamResponse
 
-router = APIRouter(prefix="/api/v1/edag")
+router = APIRouter(prefix="/api/v1/edag", route_class=ORJSONRoute)
 
 _EDAG_TAG = "EDAG"
 _EDAG_EXECUTION_TAG = "EDAG Execution"
+_DEFAULT_PAGE_SIZE = 100
+_MAX_PAGE_SIZE = 500
+_NDJSON = "application/x-ndjson"
+
+_Limit = Annotated[
+    int, Query(ge=1, le=_MAX_PAGE_SIZE, description="Maximum items in the page")
+]
+_ContinueToken = Annotated[
+    str | None,
+    Query(alias="continue", description="continue_token from the previous page"),
+]
+_IncludeSteps = Annotated[bool, Query(description="Include step details")]
+_IfMatch = Annotated[
+    str | None, Header(description="Only change the EDAG if its ETag still matches")
+]
+
+
+def _format_etag(resource_version: str) -> str:
+    return f'"{resource_version}"'
+
+
+def _parse_etags(header: str) -> list[str]:
+    """Resource versions listed in an If-Match or If-None-Match header"""
+    etags = (etag.strip().removeprefix("W/").strip('"') for etag in header.split(","))
+    return [etag for etag in etags if etag]
+
+
+def _parse_if_match(if_match: str | None) -> list[str] | None:
+    """Resource versions an EDAG may be changed at, None if any will do"""
+    if if_match is None:
+        return None
+    etags = _parse_etags(if_match)
+    if not etags:
+        raise InvalidIfMatchError()
+    if "*" in etags:
+        return None
+    return etags
+
+
+async def _ndjson(items: AsyncIterator[BaseModel]) -> AsyncIterator[bytes]:
+    """One JSON document per line, so only the current page is held in memory"""
+    async for item in items:
+        yield f"{item.model_dump_json()}\n".encode()
+
+
+def _edag_response(edag: EDAGResponse) -> ModelResponse:
+    return ModelResponse(
+        edag,
+        headers={"ETag": _format_etag(edag.resource_version)},
+    )
 
 
 @router.post(
     "/",
     tags=[_EDAG_TAG],
-    description="Create new EDAG",
+    description="Create new EDAG, returning it with its precomputed schedule",
+    response_model=EDAGResponse,
 )
 async def create_edag(
     edag_request: Annotated[EDAGRequest, Body()],
     edag_services: Annotated[EDAGServices, Depends()],
     _user: Annotated[User, Security(RBACSecurity.verify)],
-) -> None:
-    await edag_services.create_edag(edag_request)
+) -> ModelResponse:
+    edag = await edag_services.create_edag(edag_request)
+    return _edag_response(edag)
+
+
+@router.get(
+    "/",
+    tags=[_EDAG_TAG],
+    description="List EDAGs one page at a time",
+    response_model=EDAGListResponse,
+)
+async def list_edags(
+    edag_services: Annotated[EDAGServices, Depends()],
+    _user: Annotated[User, Security(RBACSecurity.verify)],
+    limit: _Limit = _DEFAULT_PAGE_SIZE,
+    continue_token: _ContinueToken = None,
+    include_steps: _IncludeSteps = False,
+) -> ModelResponse:
+    return ModelResponse(
+        await edag_services.list_edags(limit, continue_token, include_steps)
+    )
+
+
+@router.put(
+    "/",
+    tags=[_EDAG_TAG],
+    description="Create or update many EDAGs, outcomes are reported per graph",
+    response_model=EDAGBulkResponse,
+)
+async def upsert_edags(
+    bulk_request: Annotated[EDAGBulkRequest, Body()],
+    edag_services: Annotated[EDAGServices, Depends()],
+    _user: Annotated[User, Security(RBACSecurity.verify)],
+) -> ModelResponse:
+    return ModelResponse(await edag_services.upsert_edags(bulk_request))
 
 
 @router.post(
@@ -34,22 +137,190 @@ async def create_edag(
 async def run_edag(
     edagname: Annotated[str, Path()],
     graph_services: Annotated[EDAGServices, Depends()],
-    _user: Annotated[User, Security(RBACSecurity.verify)],
+    user: Annotated[User, Security(RBACSecurity.verify)],
+    _rate_limit: Annotated[None, Depends(limit_run)],
 ) -> EDAGRunResponse:
-    run_response = await graph_services.run_edag(edagname)
+    run_response = await graph_services.run_edag(edagname, owner=user.email)
     return cast(EDAGRunResponse, run_response)
 
 
+@router.post(
+    "/runs",
+    tags=[_EDAG_EXECUTION_TAG],
+    description="Execute many EDAGs in one request, results are reported per run",
+    response_model=EDAGRunBatchResponse,
+)
+async def run_edags(
+    batch_request: Annotated[EDAGRunBatchRequest, Body()],
+    graph_services: Annotated[EDAGServices, Depends()],
+    user: Annotated[User, Security(RBACSecurity.verify)],
+    rate_limiter: Annotated[RunRateLimiter, Depends(get_run_rate_limiter)],
+) -> ModelResponse:
+    admitted = await rate_limiter.admit(
+        user.email,
+        [item.edagname for item in batch_request.runs for _ in range(item.count)],
+    )
+    return ModelResponse(
+        await graph_services.run_edags(
+            batch_request, owner=user.email, admitted=admitted
+        )
+    )
+
+
+@router.get(
+    "/runs",
+    tags=[_EDAG_EXECUTION_TAG],
+    description="List EDAG runs one page at a time, filtered by EDAG, owner or phase",
+    response_model=EDAGRunListResponse,
+)
+async def list_edag_runs(
+    graph_services: Annotated[EDAGServices, Depends()],
+    _user: Annotated[User, Security(RBACSecurity.verify)],
+    limit: _Limit = _DEFAULT_PAGE_SIZE,
+    continue_token: _ContinueToken = None,
+    include_steps: _IncludeSteps = False,
+    edagname: Annotated[str | None, Query(description="Runs of this EDAG")] = None,
+    owner: Annotated[
+        str | None, Query(description="Email of the user that started the run")
+    ] = None,
+    phase: Annotated[
+        str | None,
+        Query(description="Run phase, filtered per page so pages may be short"),
+    ] = None,
+) -> ModelResponse:
+    return ModelResponse(
+        await graph_services.list_edag_runs(
+            limit, continue_token, include_steps, edagname, owner, phase
+        )
+    )
+
+
+@router.get(
+    "/runs/export",
+    tags=[_EDAG_EXECUTION_TAG],
+    description="Stream every matching EDAG run as newline delimited JSON",
+    response_class=StreamingResponse,
+    responses={200: {"content": {_NDJSON: {}}}},
+)
+async def export_edag_runs(
+    graph_services: Annotated[EDAGServices, Depends()],
+    _user: Annotated[User, Security(RBACSecurity.verify)],
+    include_steps: _IncludeSteps = False,
+    edagname: Annotated[str | None, Query(description="Runs of this EDAG")] = None,
+    owner: Annotated[
+        str | None, Query(description="Email of the user that started the run")
+    ] = None,
+    phase: Annotated[str | None, Query(description="Run phase")] = None,
+) -> StreamingResponse:
+    summaries = await graph_services.export_edag_runs(
+        include_steps, edagname, owner, phase
+    )
+    return StreamingResponse(_ndjson(summaries), media_type=_NDJSON)
+
+
+@router.get(
+    "/runs/{runname}",
+    tags=[_EDAG_EXECUTION_TAG],
+    description="Get the status of an EDAG run",
+    response_model=GraphStatusDetails,
+)
+async def get_run_status(
+    runname: Annotated[str, Path()],
+    graph_services: Annotated[EDAGServices, Depends()],
+    _user: Annotated[User, Security(RBACSecurity.verify)],
+) -> ModelResponse:
+    return ModelResponse(await graph_services.get_run_status(runname))
+
+
+@router.get(
+    "/runs/{runname}/events",
+    tags=[_EDAG_EXECUTION_TAG],
+    description="Stream step status changes of an EDAG run as Server-Sent Events",
+    response_class=StreamingResponse,
+)
+async def stream_run_status(
+    runname: Annotated[str, Path()],
+    graph_services: Annotated[EDAGServices, Depends()],
+    broadcaster: Annotated[RunStatusBroadcaster, Depends(get_run_status_broadcaster)],
+    user: Annotated[User, Security(RBACSecurity.verify)],
+) -> StreamingResponse:
+    status = await graph_services.get_run_status(runname)
+    # Subscribed here, not in the stream, so a user at their cap gets a 429
+    subscription = broadcaster.subscribe(runname, user.email, status)
+    return RunStatusStreamResponse(broadcaster, subscription)
+
+
+@router.get(
+    "/{edagname}/runs",
+    tags=[_EDAG_EXECUTION_TAG],
+    description="Get the status of every run of an EDAG, oldest first",
+    response_model=list[GraphStatusDetails],
+)
+async def list_run_statuses(
+    edagname: Annotated[str, Path()],
+    graph_services: Annotated[EDAGServices, Depends()],
+    _user: Annotated[User, Security(RBACSecurity.verify)],
+) -> ModelResponse:
+    return ModelResponse(graph_services.list_run_statuses(edagname))
+
+
+@router.get(
+    "/{edagname}",
+    tags=[_EDAG_TAG],
+    description="Get an EDAG, 304 if it still matches the If-None-Match ETag",
+    response_model=EDAGResponse,
+    responses={HTTP_304_NOT_MODIFIED: {"description": "EDAG unchanged"}},
+)
+async def get_edag(
+    edagname: Annotated[str, Path()],
+    edag_services: Annotated[EDAGServices, Depends()],
+    _user: Annotated[User, Security(RBACSecurity.verify)],
+    if_none_match: Annotated[str | None, Header()] = None,
+) -> Response:
+    edag = await edag_services.get_edag(edagname)
+    if if_none_match is not None and (
+        if_none_match.strip() == "*"
+        or edag.resource_version in _parse_etags(if_none_match)
+    ):
+        return Response(
+            status_code=HTTP_304_NOT_MODIFIED,
+            headers={"ETag": _format_etag(edag.resource_version)},
+        )
+    return _edag_response(edag)
+
+
+@router.put(
+    "/{edagname}",
+    tags=[_EDAG_TAG],
+    description="Replace an EDAG, 412 if it no longer matches the If-Match ETag",
+    response_model=EDAGResponse,
+)
+async def update_edag(
+    edagname: Annotated[str, Path()],
+    edag_request: Annotated[EDAGRequest, Body()],
+    edag_services: Annotated[EDAGServices, Depends()],
+    _user: Annotated[User, Security(RBACSecurity.verify)],
+    if_match: _IfMatch = None,
+) -> ModelResponse:
+    edag = await edag_services.update_edag(
+        edagname, edag_request, _parse_if_match(if_match)
+    )
+    return _edag_response(edag)
+
+
 @router.delete(
     "/{edagname}",
     tags=[_EDAG_TAG],
     description="Delete an EDAG and all associated runs. Admin only",
+    status_code=HTTP_204_NO_CONTENT,
 )
 async def delete_edag(
     edagname: Annotated[str, Path()],
+    edag_services: Annotated[EDAGServices, Depends()],
     _user: Annotated[
         User, Security(RBACSecurity.verify, scopes=[Role.KICKPLATE_ADMIN])
     ],
-) -> JSONResponse:
-    """Non functional, used for test for admin role"""
-    return JSONResponse(status_code=500, content="Endpoint not implemented")
+    if_match: _IfMatch = None,
+) -> Response:
+    await edag_services.delete_edag(edagname, _parse_if_match(if_match))
+    return Response(status_code=HTTP_204_NO_CONTENT)
@@ -1,39 +1,122 @@
-from typing import Annotated, Any, cast
+import asyncio
+from typing import Annotated, Any, AsyncIterator, Sequence, cast
 
 from fastapi import Depends
 from kr8s import ServerError
-from starlette.status import HTTP_404_NOT_FOUND, HTTP_409_CONFLICT
+from kr8s.asyncio.objects import APIObject
+from prometheus_client import Counter
+from starlette.status import HTTP_404_NOT_FOUND, HTTP_409_CONFLICT, HTTP_410_GONE
 
+from entity_builders.base import BaseEntityBuilder
+from entity_builders.dag_validation import InvalidEDAGError
 from entity_builders.edag import EDAGBuilder
-from entity_builders.edagrun import EDAGRunBuilder
-from external.kubernetes import KubernetesClient
+from entity_builders.edagrun import (
+    EDAGRunBuilder,
+    edag_label_value,
+    owner_label_value,
+)
+from external.informer import ResourceInformer
+from external.kubernetes import (
+    KubernetesClient,
+    KubernetesUnavailableError,
+    get_kubernetes_client,
+)
 from features.graph.exceptions import (
+    BaseGraphExceptions,
+    ContinueTokenExpiredError,
     EDAGAlreadyExistsError,
+    EDAGChangedError,
+    EDAGNameMismatchError,
     EDAGNotFoundError,
+    EDAGRunNotFoundError,
+    RunRateLimitedError,
+    RunStatusNotReadyError,
     UndeterminedApiError,
 )
-from models.edag import EDAGRequest, EDAGResource
-from models.edagrun import EDAGRunResource, EDAGRunResponse
+from features.graph.informers import (
+    EDAG_NAME_INDEX,
+    get_edag_informer,
+    get_edag_run_informer,
+)
+from features.graph.status import build_graph_status
+from models.edag import (
+    EDAGBulkRequest,
+    EDAGBulkResponse,
+    EDAGListResponse,
+    EDAGRequest,
+    EDAGResource,
+    EDAGResponse,
+    EDAGSummary,
+    EDAGUpsertOutcome,
+    EDAGUpsertResult,
+)
+from models.edagrun import (
+    EDAG_NAME_LABEL,
+    OWNER_LABEL,
+    EDAGRunBatchRequest,
+    EDAGRunBatchResponse,
+    EDAGRunBatchResult,
+    EDAGRunListResponse,
+    EDAGRunResource,
+    EDAGRunResponse,
+    EDAGRunSummary,
+)
+from models.status import GraphStatusDetails
+from settings import settings
+from tracing import current_traceparent, traced
+
+_CACHE_LOOKUPS = Counter(
+    "informer_cache_lookups_total",
+    "Lookups in the informer caches, misses go to the API server if needed",
+    ("cache", "result"),
+)
+_EDAG_CACHE_HITS = _CACHE_LOOKUPS.labels("edag", "hit")
+_EDAG_CACHE_MISSES = _CACHE_LOOKUPS.labels("edag", "miss")
+_RUN_CACHE_HITS = _CACHE_LOOKUPS.labels("edagrun", "hit")
+_RUN_CACHE_MISSES = _CACHE_LOOKUPS.labels("edagrun", "miss")
+_RUN_NAME_COLLISIONS = Counter(
+    "edag_run_name_collisions_total",
+    "Runs refused because the API server generated a name already in use",
+)
 
 
 class EDAGServices:
     def __init__(
         self,
-        kubernetes_client: Annotated[KubernetesClient, Depends()],
+        kubernetes_client: Annotated[KubernetesClient, Depends(get_kubernetes_client)],
         edag_builder: Annotated[EDAGBuilder, Depends()],
         edag_run_builder: Annotated[EDAGRunBuilder, Depends()],
+        edag_informer: Annotated[ResourceInformer, Depends(get_edag_informer)],
+        edag_run_informer: Annotated[ResourceInformer, Depends(get_edag_run_informer)],
     ) -> None:
         self._kubernetes_client = kubernetes_client
         self._edag_builder = edag_builder
         self._edag_run_builder = edag_run_builder
+        self._edag_informer = edag_informer
+        self._edag_run_informer = edag_run_informer
 
-    async def create_edag(self, edag_request: EDAGRequest) -> None:
+    @traced("EDAGServices.create_edag")
+    async def create_edag(self, edag_request: EDAGRequest) -> EDAGResponse:
+        """Create an EDAG, resubmitting an identical one returns it unchanged"""
         edag_resource = self._edag_builder.build_resource(edag_request)
-        await self._create_edag_resource(edag_resource)
+        cached = self._get_cached_edag(edag_resource.graphname)
+        if cached is not None and self._is_unchanged(cached, edag_resource):
+            return self._build_edag_response(cached)
+
+        try:
+            created = await self._create_edag_resource(edag_resource)
+        except EDAGAlreadyExistsError:
+            current = (await self._get_edag_details(edag_resource.graphname)).raw
+            if not self._is_unchanged(current, edag_resource):
+                raise
+            return self._build_edag_response(current)
+        return self._build_edag_response(created)
 
-    async def _create_edag_resource(self, edag_resource: EDAGResource) -> None:
+    async def _create_edag_resource(
+        self, edag_resource: EDAGResource
+    ) -> dict[str, Any]:
         try:
-            await self._kubernetes_client.create_resource(
+            return await self._kubernetes_client.create_resource(
                 self._edag_builder, edag_resource
             )
         except ServerError as exc:
@@ -42,20 +125,89 @@ class EDAGServices:
                 raise EDAGAlreadyExistsError(edag_resource.graphname)
             raise UndeterminedApiError() from exc
 
-    async def run_edag(self, edag_name: str) -> EDAGRunResponse:
-        edag_uid = await self._get_edag_uid(edag_name)
-        edag_run_resource = EDAGRunResource(edagname=edag_name, edag_uid=edag_uid)
-        manifest = await self._create_edag_run(edag_run_resource)
+    @traced("EDAGServices.get_edag")
+    async def get_edag(self, edag_name: str) -> EDAGResponse:
+        edag = self._get_cached_edag(edag_name)
+        if edag is None:
+            edag = (await self._get_edag_details(edag_name)).raw
+        return self._build_edag_response(edag)
+
+    @traced("EDAGServices.update_edag")
+    async def update_edag(
+        self,
+        edag_name: str,
+        edag_request: EDAGRequest,
+        if_match: Sequence[str] | None,
+    ) -> EDAGResponse:
+        """Replace an EDAG, only if still at a version in if_match when it is given"""
+        if edag_request.graphname != edag_name:
+            raise EDAGNameMismatchError(edag_name, edag_request.graphname)
 
-        if manifest is None:
-            # Name collision
-            return await self.run_edag(edag_name)
+        edag_resource = self._edag_builder.build_resource(edag_request)
+        cached = self._get_cached_edag(edag_name)
+        if (
+            cached is not None
+            and (if_match is None or cached["metadata"]["resourceVersion"] in if_match)
+            and self._is_unchanged(cached, edag_resource)
+        ):
+            return self._build_edag_response(cached)
 
-        return EDAGRunResponse(id=manifest["metadata"]["name"])
+        current = await self._get_edag_details(edag_name)
+        resource_version = None
+        if if_match is not None:
+            # The update is conditioned on the version that matched, so it
+            # still fails if the EDAG changes in between
+            resource_version = current.raw["metadata"]["resourceVersion"]
+            if resource_version not in if_match:
+                raise EDAGChangedError(edag_name)
+        if self._is_unchanged(current.raw, edag_resource):
+            return self._build_edag_response(current.raw)
 
-    async def _get_edag_uid(self, edag_name: str) -> str:
         try:
-            edag_details = await self._kubernetes_client.get_resource(
+            updated = await self._kubernetes_client.update_resource(
+                self._edag_builder,
+                edag_resource,
+                current,
+                resource_version=resource_version,
+            )
+        except ServerError as exc:
+            status_code = self._try_get_status_code(exc)
+            if status_code == HTTP_409_CONFLICT:
+                raise EDAGChangedError(edag_name)
+            if status_code == HTTP_404_NOT_FOUND:
+                raise EDAGNotFoundError(edag_name)
+            raise UndeterminedApiError() from exc
+
+        return self._build_edag_response(updated or current.raw)
+
+    @traced("EDAGServices.delete_edag")
+    async def delete_edag(self, edag_name: str, if_match: Sequence[str] | None) -> None:
+        """Delete an EDAG, its runs are removed by the garbage collector after"""
+        resource_version = None
+        if if_match is not None and len(if_match) == 1:
+            resource_version = if_match[0]
+        elif if_match is not None:
+            # Kubernetes preconditions take a single version, so find which matches
+            current = await self._get_edag_details(edag_name)
+            resource_version = current.raw["metadata"]["resourceVersion"]
+            if resource_version not in if_match:
+                raise EDAGChangedError(edag_name)
+        try:
+            await self._kubernetes_client.delete_resource(
+                self._edag_builder, edag_name, resource_version=resource_version
+            )
+        except ServerError as exc:
+            status_code = self._try_get_status_code(exc)
+            if status_code == HTTP_404_NOT_FOUND:
+                raise EDAGNotFoundError(edag_name)
+            if status_code == HTTP_409_CONFLICT:
+                raise EDAGChangedError(edag_name)
+            raise UndeterminedApiError() from exc
+
+    @traced("EDAGServices._get_edag_details")
+    async def _get_edag_details(self, edag_name: str) -> APIObject:
+        try:
+            return await self._kubernetes_client.get_resource(
                 self._edag_builder, edag_name
             )
         except ServerError as exc:
@@ -64,23 +216,353 @@ class EDAGServices:
                 raise EDAGNotFoundError(edag_name)
             raise UndeterminedApiError() from exc
 
+    def _is_unchanged(self, edag: dict[str, Any], edag_resource: EDAGResource) -> bool:
+        """Whether edag already holds edag_resource, by its stored content hash"""
+        return (
+            edag_resource.content_hash is not None
+            and self._edag_builder.get_content_hash(edag) == edag_resource.content_hash
+        )
+
+    def _build_edag_response(self, edag: dict[str, Any]) -> EDAGResponse:
+        return EDAGResponse(
+            graphname=edag["metadata"]["name"],
+            creation_time=edag["metadata"].get("creationTimestamp", ""),
+            steps=self._edag_builder.build_steps_from_manifest(edag),
+            schedule=self._edag_builder.build_schedule_from_manifest(edag),
+            resource_version=edag["metadata"]["resourceVersion"],
+        )
+
+    @traced("EDAGServices.upsert_edags")
+    async def upsert_edags(self, bulk_request: EDAGBulkRequest) -> EDAGBulkResponse:
+        """Create or update many EDAGs, reporting the outcome per graph"""
+        semaphore = asyncio.Semaphore(settings.EDAG_BULK_CONCURRENCY)
+
+        async def limited(edag_request: EDAGRequest) -> EDAGUpsertResult:
+            async with semaphore:
+                return await self._upsert_edag(edag_request)
+
+        return EDAGBulkResponse(
+            results=await asyncio.gather(
+                *[limited(edag_request) for edag_request in bulk_request.graphs]
+            )
+        )
+
+    async def _upsert_edag(self, edag_request: EDAGRequest) -> EDAGUpsertResult:
+        try:
+            edag_resource = self._edag_builder.build_resource(edag_request)
+            outcome = await self._create_or_update_edag_resource(edag_resource)
+        except (
+            BaseGraphExceptions,
+            InvalidEDAGError,
+            KubernetesUnavailableError,
+        ) as exc:
+            return EDAGUpsertResult(
+                graphname=edag_request.graphname,
+                outcome=EDAGUpsertOutcome.FAILED,
+                error=str(exc),
+            )
+        return EDAGUpsertResult(graphname=edag_request.graphname, outcome=outcome)
+
+    async def _create_or_update_edag_resource(
+        self, edag_resource: EDAGResource
+    ) -> EDAGUpsertOutcome:
+        cached = self._get_cached_edag(edag_resource.graphname)
+        if cached is not None and self._is_unchanged(cached, edag_resource):
+            return EDAGUpsertOutcome.UNCHANGED
+
+        # Only try creating when the cache does not already know of the EDAG
+        if cached is None:
+            try:
+                await self._create_edag_resource(edag_resource)
+                return EDAGUpsertOutcome.CREATED
+            except EDAGAlreadyExistsError:
+                pass
+
+        try:
+            current = await self._kubernetes_client.get_resource(
+                self._edag_builder, edag_resource.graphname
+            )
+            if self._is_unchanged(current.raw, edag_resource):
+                return EDAGUpsertOutcome.UNCHANGED
+            updated = await self._kubernetes_client.update_resource(
+                self._edag_builder, edag_resource, current
+            )
+        except ServerError as exc:
+            raise UndeterminedApiError() from exc
+
+        if updated is None:
+            return EDAGUpsertOutcome.UNCHANGED
+        return EDAGUpsertOutcome.UPDATED
+
+    @traced("EDAGServices.list_edags")
+    async def list_edags(
+        self, limit: int, continue_token: str | None, include_steps: bool
+    ) -> EDAGListResponse:
+        edag_list = await self._list_page(self._edag_builder, limit, continue_token)
+        return EDAGListResponse(
+            items=[
+                EDAGSummary(
+                    graphname=edag["metadata"]["name"],
+                    creation_time=edag["metadata"].get("creationTimestamp", ""),
+                    step_count=len(edag["spec"]["steps"]),
+                    steps=(
+                        self._edag_builder.build_steps_from_manifest(edag)
+                        if include_steps
+                        else None
+                    ),
+                )
+                for edag in edag_list.get("items", [])
+            ],
+            continue_token=edag_list["metadata"].get("continue") or None,
+        )
+
+    @traced("EDAGServices.list_edag_runs")
+    async def list_edag_runs(
+        self,
+        limit: int,
+        continue_token: str | None,
+        include_steps: bool,
+        edag_name: str | None = None,
+        owner: str | None = None,
+        phase: str | None = None,
+    ) -> EDAGRunListResponse:
+        """List a page of runs, phase is filtered per page as it is not a label"""
+        labels = {}
+        if edag_name is not None:
+            labels[EDAG_NAME_LABEL] = edag_label_value(edag_name)
+        if owner is not None:
+            labels[OWNER_LABEL] = owner_label_value(owner)
+
+        edag_run_list = await self._list_page(
+            self._edag_run_builder, limit, continue_token, labels
+        )
+        summaries = [
+            EDAGRunSummary(
+                id=status.id,
+                graphname=status.graphname,
+                phase=status.phase,
+                creation_time=status.creation_time,
+                completed_time=status.completed_time,
+                steps_status=status.steps_status if include_steps else None,
+            )
+            for status in map(build_graph_status, edag_run_list.get("items", []))
+        ]
+        return EDAGRunListResponse(
+            items=[
+                summary
+                for summary in summaries
+                if phase is None or summary.phase == phase
+            ],
+            continue_token=edag_run_list["metadata"].get("continue") or None,
+        )
+
+    async def export_edag_runs(
+        self,
+        include_steps: bool,
+        edag_name: str | None = None,
+        owner: str | None = None,
+        phase: str | None = None,
+    ) -> AsyncIterator[EDAGRunSummary]:
+        """Every matching run, fetched a page at a time as they are consumed
+
+        The first page is fetched before returning so that its errors can still
+        be sent as a normal error response.
+        """
+        first_page = await self.list_edag_runs(
+            settings.EXPORT_PAGE_SIZE, None, include_steps, edag_name, owner, phase
+        )
+
+        async def summaries() -> AsyncIterator[EDAGRunSummary]:
+            page = first_page
+            while True:
+                for summary in page.items:
+                    yield summary
+                if page.continue_token is None:
+                    return
+                page = await self.list_edag_runs(
+                    settings.EXPORT_PAGE_SIZE,
+                    page.continue_token,
+                    include_steps,
+                    edag_name,
+                    owner,
+                    phase,
+                )
+
+        return summaries()
+
+    async def _list_page(
+        self,
+        resource_builder: BaseEntityBuilder,
+        limit: int,
+        continue_token: str | None,
+        labels: dict[str, str] | None = None,
+    ) -> dict[str, Any]:
+        params: dict[str, Any] = {"limit": limit}
+        if continue_token:
+            params["continue"] = continue_token
+        if labels:
+            params["labelSelector"] = ",".join(
+                f"{key}={value}" for key, value in labels.items()
+            )
+
+        try:
+            return await self._kubernetes_client.list_resources(
+                resource_builder, params
+            )
+        except ServerError as exc:
+            status_code = self._try_get_status_code(exc)
+            if status_code == HTTP_410_GONE:
+                raise ContinueTokenExpiredError()
+            raise UndeterminedApiError() from exc
+
+    @traced("EDAGServices.run_edag")
+    async def run_edag(
+        self, edag_name: str, owner: str | None = None
+    ) -> EDAGRunResponse:
+        edag_uid = await self._get_edag_uid(edag_name)
+        edag_run_resource = EDAGRunResource(
+            edagname=edag_name, edag_uid=edag_uid, owner=owner
+        )
+        manifest = await self._create_edag_run(edag_run_resource)
+        return EDAGRunResponse(id=manifest["metadata"]["name"])
+
+    @traced("EDAGServices.run_edags")
+    async def run_edags(
+        self,
+        batch: EDAGRunBatchRequest,
+        owner: str | None = None,
+        admitted: Sequence[bool] | None = None,
+    ) -> EDAGRunBatchResponse:
+        """Start runs for many EDAGs, reporting failures per run
+
+        admitted says which runs, in batch order, the rate limiter let through,
+        the others are reported as rate limited without being started.
+        """
+        semaphore = asyncio.Semaphore(settings.EDAG_RUN_BATCH_CONCURRENCY)
+
+        async def limited(coroutine: Any) -> Any:
+            async with semaphore:
+                return await coroutine
+
+        runs = [item.edagname for item in batch.runs for _ in range(item.count)]
+        if admitted is None:
+            admitted = [True] * len(runs)
+
+        # Resolve each EDAG once, however many runs it has in the batch
+        edag_names = list(
+            dict.fromkeys(name for name, start in zip(runs, admitted) if start)
+        )
+        resolved_uids = await asyncio.gather(
+            *[limited(self._get_edag_uid(name)) for name in edag_names],
+            return_exceptions=True,
+        )
+        edag_uids = dict(zip(edag_names, resolved_uids))
+
+        return EDAGRunBatchResponse(
+            results=await asyncio.gather(
+                *[
+                    limited(
+                        self._run_batch_item(
+                            name,
+                            edag_uids[name] if start else RunRateLimitedError(0),
+                            owner,
+                        )
+                    )
+                    for name, start in zip(runs, admitted)
+                ]
+            )
+        )
+
+    async def _run_batch_item(
+        self, edag_name: str, edag_uid: str | BaseException, owner: str | None
+    ) -> EDAGRunBatchResult:
+        try:
+            if isinstance(edag_uid, BaseException):
+                raise edag_uid
+
+            manifest = await self._create_edag_run(
+                EDAGRunResource(edagname=edag_name, edag_uid=edag_uid, owner=owner)
+            )
+        except (BaseGraphExceptions, KubernetesUnavailableError) as exc:
+            return EDAGRunBatchResult(edagname=edag_name, error=str(exc))
+
+        return EDAGRunBatchResult(edagname=edag_name, id=manifest["metadata"]["name"])
+
+    @traced("EDAGServices.get_run_status")
+    async def get_run_status(self, run_name: str) -> GraphStatusDetails:
+        edag_run = self._get_cached_run(run_name)
+        if edag_run is None:
+            # Cache miss may be a run created since the last watch event
+            try:
+                edag_run_details = await self._kubernetes_client.get_resource(
+                    self._edag_run_builder, run_name
+                )
+            except ServerError as exc:
+                status_code = self._try_get_status_code(exc)
+                if status_code == HTTP_404_NOT_FOUND:
+                    raise EDAGRunNotFoundError(run_name)
+                raise UndeterminedApiError() from exc
+            edag_run = edag_run_details.raw
+
+        return build_graph_status(
+            edag_run, self._get_cached_edag(edag_run["spec"]["edagname"])
+        )
+
+    @traced("EDAGServices.list_run_statuses")
+    def list_run_statuses(self, edag_name: str) -> list[GraphStatusDetails]:
+        if not self._edag_run_informer.synced:
+            raise RunStatusNotReadyError()
+
+        edag = self._get_cached_edag(edag_name)
+        edag_runs = self._edag_run_informer.list_by_index(EDAG_NAME_INDEX, edag_name)
+        return [
+            build_graph_status(edag_run, edag)
+            for edag_run in sorted(
+                edag_runs,
+                key=lambda edag_run: edag_run["metadata"].get("creationTimestamp", ""),
+            )
+        ]
+
+    def _get_cached_run(self, run_name: str) -> dict[str, Any] | None:
+        if not self._edag_run_informer.synced:
+            _RUN_CACHE_MISSES.inc()
+            return None
+        edag_run = self._edag_run_informer.get(run_name)
+        (_RUN_CACHE_MISSES if edag_run is None else _RUN_CACHE_HITS).inc()
+        return edag_run
+
+    def _get_cached_edag(self, edag_name: str) -> dict[str, Any] | None:
+        if not self._edag_informer.synced:
+            _EDAG_CACHE_MISSES.inc()
+            return None
+        edag = self._edag_informer.get(edag_name)
+        (_EDAG_CACHE_MISSES if edag is None else _EDAG_CACHE_HITS).inc()
+        return edag
+
+    @traced("EDAGServices._get_edag_uid")
+    async def _get_edag_uid(self, edag_name: str) -> str:
+        cached_edag = self._get_cached_edag(edag_name)
+        if cached_edag is not None:
+            return cast(str, cached_edag["metadata"]["uid"])
+
+        edag_details = await self._get_edag_details(edag_name)
         uid = edag_details.raw["metadata"]["uid"]
         return cast(str, uid)
 
+    @traced("EDAGServices._create_edag_run")
     async def _create_edag_run(
         self, edag_run_resource: EDAGRunResource
-    ) -> dict[str, Any] | None:
+    ) -> dict[str, Any]:
+        # Continued by the operator, so its spans follow on from this one
+        edag_run_resource.traceparent = current_traceparent()
         try:
             edag_run_manifest = await self._kubernetes_client.create_resource(
                 self._edag_run_builder, edag_run_resource
             )
             return edag_run_manifest
         except ServerError as exc:
-            status_code = self._try_get_status_code(exc)
-            if status_code == HTTP_409_CONFLICT:
-                # Unlikely event of generatated name collision
-                # Return none and trigger another attempt
-                return None
+            if self._try_get_status_code(exc) == HTTP_409_CONFLICT:
+                _RUN_NAME_COLLISIONS.inc()
             raise UndeterminedApiError() from exc
 
     def _try_get_status_code(self, exc: ServerError) -> int:
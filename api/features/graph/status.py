@@ -0,0 +1,44 @@
+from typing import Any
+
+from models.status import GraphStatusDetails, StepStatus
+
+_PENDING = "Pending"
+_STARTED = "Started"
+_SUCCEEDED = "Succeeded"
+_FAILED = "Failed"
+
+
+def build_graph_status(
+    edag_run: dict[str, Any], edag: dict[str, Any] | None = None
+) -> GraphStatusDetails:
+    """Map an EDAGRun manifest, and its EDAG when known, to a status summary"""
+    status = edag_run.get("status") or {}
+    conditions = status.get("conditions") or []
+    jobs: dict[str, str] = status.get("jobs") or {}
+
+    # Operator appends conditions, so the last one is the current phase
+    latest_condition = conditions[-1] if conditions else None
+    phase = latest_condition["type"] if latest_condition else _PENDING
+    completed_time = (
+        latest_condition.get("lastTransitionTime")
+        if latest_condition and phase in (_SUCCEEDED, _FAILED)
+        else None
+    )
+
+    step_state = _SUCCEEDED if phase == _SUCCEEDED else _STARTED
+    steps_status = [StepStatus(name=stepname, state=step_state) for stepname in jobs]
+    if edag is not None:
+        steps_status.extend(
+            StepStatus(name=stepname, state=_PENDING)
+            for stepname in edag.get("spec", {}).get("steps", {})
+            if stepname not in jobs
+        )
+
+    return GraphStatusDetails(
+        id=edag_run["metadata"]["name"],
+        graphname=edag_run["spec"]["edagname"],
+        completed_time=completed_time,
+        phase=phase,
+        creation_time=edag_run["metadata"].get("creationTimestamp", ""),
+        steps_status=steps_status,
+    )
@@ -0,0 +1,175 @@
+import asyncio
+from collections import Counter
+from typing import Any, AsyncIterator
+
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from starlette.types import Receive, Scope, Send
+
+from external.informer import ResourceInformer
+from features.graph.exceptions import TooManyStreamsError
+from features.graph.status import build_graph_status
+from models.status import GraphStatusDetails, StepStatus
+from settings import settings
+
+_COMPLETE_PHASES = ("Succeeded", "Failed")
+
+
+class _Subscription:
+    """Status updates for one client of one run
+
+    Pending updates are coalesced per step, so a slow client only ever holds
+    the latest state of each step and cannot hold up the shared watch.
+    """
+
+    def __init__(self, run_name: str, user_email: str, status: GraphStatusDetails):
+        self.run_name = run_name
+        self.user_email = user_email
+        self._sent_states = {step.name: step.state for step in status.steps_status}
+        self._pending: dict[str, StepStatus] = {
+            step.name: step for step in status.steps_status
+        }
+        self._final_status = status if status.phase in _COMPLETE_PHASES else None
+        self._closed = False
+        self._changed = asyncio.Event()
+        self._changed.set()
+
+    def push(self, status: GraphStatusDetails) -> None:
+        for step in status.steps_status:
+            if self._sent_states.get(step.name) != step.state:
+                self._sent_states[step.name] = step.state
+                self._pending[step.name] = step
+        if status.phase in _COMPLETE_PHASES:
+            self._final_status = status
+        if self._pending or self._final_status is not None:
+            self._changed.set()
+
+    def close(self) -> None:
+        self._closed = True
+        self._changed.set()
+
+    async def events(self, keepalive_seconds: float) -> AsyncIterator[str]:
+        while True:
+            try:
+                await asyncio.wait_for(self._changed.wait(), keepalive_seconds)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            self._changed.clear()
+
+            pending, self._pending = self._pending, {}
+            for step in pending.values():
+                yield _format_event("step", step)
+            if self._final_status is not None:
+                yield _format_event("complete", self._final_status)
+                return
+            if self._closed:
+                return
+
+
+def _format_event(event: str, data: BaseModel) -> str:
+    return f"event: {event}\ndata: {data.model_dump_json()}\n\n"
+
+
+class RunStatusBroadcaster:
+    """Fans EDAGRun changes from one informer out to many streaming clients"""
+
+    def __init__(
+        self, edag_run_informer: ResourceInformer, edag_informer: ResourceInformer
+    ) -> None:
+        self._edag_run_informer = edag_run_informer
+        self._edag_informer = edag_informer
+        self._subscriptions: dict[str, set[_Subscription]] = {}
+        self._streams_per_user: Counter[str] = Counter()
+
+    def start(self) -> None:
+        self._edag_run_informer.add_listener(self._on_event)
+
+    def stop(self) -> None:
+        self._edag_run_informer.remove_listener(self._on_event)
+        for subscriptions in self._subscriptions.values():
+            for subscription in subscriptions:
+                subscription.close()
+
+    def subscribe(
+        self, run_name: str, user_email: str, status: GraphStatusDetails
+    ) -> _Subscription:
+        """Register a stream starting from status, raises if user is at their cap"""
+        if self._streams_per_user[user_email] >= settings.RUN_STATUS_STREAMS_PER_USER:
+            raise TooManyStreamsError(settings.RUN_STATUS_STREAMS_PER_USER)
+
+        subscription = _Subscription(run_name, user_email, status)
+        self._subscriptions.setdefault(run_name, set()).add(subscription)
+        self._streams_per_user[user_email] += 1
+        return subscription
+
+    def unsubscribe(self, subscription: _Subscription) -> None:
+        subscriptions = self._subscriptions.get(subscription.run_name)
+        if subscriptions is None or subscription not in subscriptions:
+            return
+        subscriptions.discard(subscription)
+        if not subscriptions:
+            del self._subscriptions[subscription.run_name]
+        self._streams_per_user[subscription.user_email] -= 1
+        if not self._streams_per_user[subscription.user_email]:
+            del self._streams_per_user[subscription.user_email]
+
+    async def stream(self, subscription: _Subscription) -> AsyncIterator[str]:
+        """Server-Sent Events for subscription, unsubscribing when finished"""
+        try:
+            async for event in subscription.events(
+                settings.RUN_STATUS_STREAM_KEEPALIVE_SECONDS
+            ):
+                yield event
+        finally:
+            self.unsubscribe(subscription)
+
+    def _on_event(self, event_type: str, edag_run: dict[str, Any]) -> None:
+        subscriptions = self._subscriptions.get(edag_run["metadata"]["name"])
+        if not subscriptions:
+            return
+
+        if event_type == "DELETED":
+            for subscription in subscriptions:
+                subscription.close()
+            return
+
+        # Build the status once, however many clients are following this run
+        edag = (
+            self._edag_informer.get(edag_run["spec"]["edagname"])
+            if self._edag_informer.synced
+            else None
+        )
+        status = build_graph_status(edag_run, edag)
+        for subscription in subscriptions:
+            subscription.push(status)
+
+
+class RunStatusStreamResponse(StreamingResponse):
+    """Server-Sent Events for a subscription, released however the response ends
+
+    The stream only unsubscribes once its body has started, which never happens
+    if the client disconnects first, so the response releases it as well.
+    """
+
+    def __init__(
+        self, broadcaster: RunStatusBroadcaster, subscription: _Subscription
+    ) -> None:
+        self._broadcaster = broadcaster
+        self._subscription = subscription
+        super().__init__(
+            broadcaster.stream(subscription),
+            media_type="text/event-stream",
+            # Marked identity so compression passes events through unbuffered
+            headers={
+                "Cache-Control": "no-cache",
+                "Content-Encoding": "identity",
+                "X-Accel-Buffering": "no",
+            },
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self._broadcaster.unsubscribe(self._subscription)
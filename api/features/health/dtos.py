@@ -3,3 +3,7 @@ from pydantic import BaseModel
 
 class HealthCheckResponse(BaseModel):
     status: str
+
+
+class ReadinessResponse(BaseModel):
+    status: str
@@ -1,6 +1,10 @@
 from fastapi import APIRouter
+from fastapi.responses import ORJSONResponse
+from starlette.status import HTTP_200_OK, HTTP_503_SERVICE_UNAVAILABLE
 
-from .dtos import HealthCheckResponse
+from auth.validator import is_token_validator_ready
+
+from .dtos import HealthCheckResponse, ReadinessResponse
 
 _TAG = "Health"
 
@@ -10,3 +14,18 @@ router = APIRouter(tags=[_TAG])
 @router.get("/health")
 def get_api_health() -> HealthCheckResponse:
     return HealthCheckResponse(status="ok")
+
+
+@router.get(
+    "/ready",
+    responses={HTTP_503_SERVICE_UNAVAILABLE: {"model": ReadinessResponse}},
+)
+def get_api_readiness() -> ORJSONResponse:
+    if is_token_validator_ready():
+        return ORJSONResponse(
+            ReadinessResponse(status="ready").model_dump(), status_code=HTTP_200_OK
+        )
+    return ORJSONResponse(
+        ReadinessResponse(status="initialising").model_dump(),
+        status_code=HTTP_503_SERVICE_UNAVAILABLE,
+    )
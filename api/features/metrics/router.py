@@ -0,0 +1,15 @@
+from fastapi import APIRouter, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+_TAG = "Metrics"
+
+router = APIRouter(tags=[_TAG])
+
+
+@router.get("/metrics", response_class=Response)
+def get_metrics() -> Response:
+    """Metrics for Prometheus to scrape, left unauthenticated like /health
+
+    Only mounted when METRICS_ENABLED is set.
+    """
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,38 @@
+from fastapi import Request
+from fastapi.responses import ORJSONResponse
+from starlette.status import HTTP_409_CONFLICT, HTTP_422_UNPROCESSABLE_ENTITY
+
+
+class BaseProfilingExceptions(Exception):
+    """Base exception for all profiling errors"""
+
+    pass
+
+
+class ProfilerBusyError(BaseProfilingExceptions):
+    """Another profile is already being taken"""
+
+    def __init__(self) -> None:
+        super().__init__("A profile is already being taken, retry once it finishes")
+
+
+class UnknownRouteError(BaseProfilingExceptions):
+    def __init__(self, route: str):
+        self.route = route
+        super().__init__(f"No route {route} to profile")
+
+
+def add_exception_handlers(app) -> None:
+    @app.exception_handler(ProfilerBusyError)
+    def handle_profiler_busy(request: Request, exc: ProfilerBusyError):
+        return ORJSONResponse(
+            {"detail": str(exc)},
+            status_code=HTTP_409_CONFLICT,
+        )
+
+    @app.exception_handler(UnknownRouteError)
+    def handle_unknown_route(request: Request, exc: UnknownRouteError):
+        return ORJSONResponse(
+            {"detail": str(exc)},
+            status_code=HTTP_422_UNPROCESSABLE_ENTITY,
+        )
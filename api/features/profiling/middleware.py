@@ -0,0 +1,30 @@
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from .profiler import get_profile_session
+
+
+class ProfilingMiddleware:
+    """Counts requests in flight that an active profile session is filtering on
+
+    While no session is active a request costs one lookup here.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        session = get_profile_session()
+        if (
+            session is None
+            or not session.filtered
+            or scope["type"] != "http"
+            or not session.matches(scope)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        session.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            session.in_flight -= 1
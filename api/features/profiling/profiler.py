@@ -0,0 +1,112 @@
+import sys
+import threading
+from collections import Counter
+from types import CodeType
+from typing import Callable
+
+from starlette.types import Scope
+
+
+class SamplingProfiler:
+    """Samples the stack of every thread from a background thread
+
+    Nothing is hooked into the interpreter, so code runs at full speed between
+    samples and not at all differently once stopped. Samples are only taken
+    while should_sample returns True.
+    """
+
+    def __init__(
+        self,
+        interval_seconds: float,
+        should_sample: Callable[[], bool] = lambda: True,
+    ) -> None:
+        self._interval_seconds = interval_seconds
+        self._should_sample = should_sample
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="sampling-profiler", daemon=True
+        )
+        self._labels: dict[CodeType, str] = {}
+        self.stacks: Counter[str] = Counter()
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._thread.join()
+
+    def collapsed(self) -> str:
+        """Stacks in the collapsed format read by flamegraph.pl and speedscope"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.items())
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self._interval_seconds):
+            if self._should_sample():
+                self._sample()
+
+    def _sample(self) -> None:
+        thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == self._thread.ident:
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(self._label(frame.f_code))
+                frame = frame.f_back
+            labels.append(thread_names.get(thread_id, str(thread_id)))
+            self.stacks[";".join(reversed(labels))] += 1
+
+    def _label(self, code: CodeType) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = (
+                f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})"
+            )
+        return label
+
+
+class ProfileSession:
+    """Profiles the process, or only while matching requests are in flight
+
+    Requests match when their path matches path_pattern and they carry header,
+    whichever are given. Coroutines interleave on the event loop, so samples
+    taken while a matching request is in flight can include other requests.
+    """
+
+    def __init__(
+        self,
+        interval_seconds: float,
+        path_matches: Callable[[str], bool] | None = None,
+        header: str | None = None,
+    ) -> None:
+        self._path_matches = path_matches
+        self._header = header.lower().encode("latin-1") if header else None
+        self.in_flight = 0
+        self.profiler = SamplingProfiler(interval_seconds, self._should_sample)
+
+    @property
+    def filtered(self) -> bool:
+        return self._path_matches is not None or self._header is not None
+
+    def matches(self, scope: Scope) -> bool:
+        if self._path_matches is not None and not self._path_matches(scope["path"]):
+            return False
+        if self._header is not None:
+            return any(name == self._header for name, _ in scope["headers"])
+        return True
+
+    def _should_sample(self) -> bool:
+        return not self.filtered or self.in_flight > 0
+
+
+_profile_session: ProfileSession | None = None
+
+
+def get_profile_session() -> ProfileSession | None:
+    return _profile_session
+
+
+def set_profile_session(session: ProfileSession | None) -> None:
+    global _profile_session
+    _profile_session = session
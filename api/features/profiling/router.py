@@ -0,0 +1,72 @@
+import asyncio
+from typing import Annotated, Callable
+
+from fastapi import APIRouter, FastAPI, Query, Request, Security
+from fastapi.responses import PlainTextResponse
+from starlette.routing import Route
+
+from auth.security import RBACSecurity
+from models.auth import Role, User
+from settings import settings
+
+from .exceptions import ProfilerBusyError, UnknownRouteError
+from .profiler import ProfileSession, get_profile_session, set_profile_session
+
+_TAG = "Profiling"
+
+router = APIRouter(prefix="/api/v1/profile")
+
+
+@router.post(
+    "/",
+    tags=[_TAG],
+    description=(
+        "Sample the stacks of every API thread for a number of seconds, "
+        "returned in the collapsed format used by flamegraph tools. Admin only"
+    ),
+    response_class=PlainTextResponse,
+)
+async def profile(
+    request: Request,
+    _user: Annotated[
+        User, Security(RBACSecurity.verify, scopes=[Role.KICKPLATE_ADMIN])
+    ],
+    seconds: Annotated[
+        float,
+        Query(gt=0, le=settings.PROFILE_MAX_SECONDS, description="Seconds to sample"),
+    ] = 10,
+    route: Annotated[
+        str | None,
+        Query(
+            description="Only sample while requests to this route template, "
+            "such as /api/v1/edag/{edagname}/run, are in flight"
+        ),
+    ] = None,
+    header: Annotated[
+        str | None,
+        Query(description="Only sample while requests with this header are in flight"),
+    ] = None,
+) -> PlainTextResponse:
+    path_matches = _path_matcher(request.app, route) if route is not None else None
+    if get_profile_session() is not None:
+        raise ProfilerBusyError()
+
+    session = ProfileSession(
+        settings.PROFILE_SAMPLE_INTERVAL_SECONDS, path_matches, header
+    )
+    set_profile_session(session)
+    session.profiler.start()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        session.profiler.stop()
+        set_profile_session(None)
+    return PlainTextResponse(session.profiler.collapsed())
+
+
+def _path_matcher(app: FastAPI, route: str) -> Callable[[str], bool]:
+    for app_route in app.routes:
+        if isinstance(app_route, Route) and app_route.path == route:
+            path_regex = app_route.path_regex
+            return lambda path: path_regex.match(path) is not None
+    raise UnknownRouteError(route)
@@ -0,0 +1,18 @@
+# Latency buckets in seconds, spanning fast cache hits to slow API server calls.
+# prometheus_client's defaults start at 5ms, too coarse for the cache hits.
+LATENCY_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+)
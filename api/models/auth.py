@@ -11,6 +11,7 @@ class Role(str, Enum):
 class TokenContents(BaseModel, extra="allow"):
     email: str
     roles: list[str]
+    exp: int | None = None
 
 
 class User(BaseModel):
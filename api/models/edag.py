@@ -1,9 +1,18 @@
-from pydantic import Field
+from enum import Enum
+from typing import Any
+
+from pydantic import Field, field_validator
 
 from entity_builders.base import BaseRequest, BaseResource
+from models.base import BaseResponse
 
 EDAG_KIND = "EDAG"
 EDAG_API_VERSION = "edag.kickplate.com/v1alpha1"
+MAX_BULK_EDAGS = 500
+EDAG_SCHEDULE_ANNOTATION = "kickplate.com/schedule"
+EDAG_CONTENT_HASH_ANNOTATION = "kickplate.com/content-hash"
+# Would be shadowed by the /runs routes that share the EDAG name path segment
+RESERVED_EDAG_NAMES = frozenset({"runs"})
 
 
 class EDAGRequestStep(BaseRequest):
@@ -32,6 +41,13 @@ class EDAGRequest(BaseRequest):
     graphname: str = Field(description="Name of graph, must be unique")
     steps: list[EDAGRequestStep] = Field(description="Steps to execute", min_length=1)
 
+    @field_validator("graphname")
+    @classmethod
+    def check_graphname_not_reserved(cls, graphname: str) -> str:
+        if graphname in RESERVED_EDAG_NAMES:
+            raise ValueError(f"Graph name {graphname} is reserved")
+        return graphname
+
 
 class EDAGStepResource(BaseResource):
     stepname: str
@@ -43,6 +59,80 @@ class EDAGStepResource(BaseResource):
     command: list[str]
 
 
+class EDAGStepSchedule(BaseResponse):
+    depth: int = Field(description="Longest chain of dependencies before the step")
+    fan_in: int = Field(description="Number of steps this step depends on")
+    fan_out: int = Field(description="Number of steps depending on this step")
+
+
+class EDAGSchedule(BaseResponse):
+    levels: list[list[str]] = Field(
+        description="Steps grouped by depth, each level only depends on earlier ones"
+    )
+    critical_path: list[str] = Field(
+        description="Longest chain of dependent steps, from first to last"
+    )
+    steps: dict[str, EDAGStepSchedule]
+
+
 class EDAGResource(BaseResource):
     graphname: str
     steps: list[EDAGStepResource]
+    # Plain data in the shape of EDAGSchedule, it is only written out as JSON
+    schedule: dict[str, Any] | None = None
+    content_hash: str | None = None
+
+
+class EDAGBulkRequest(BaseRequest):
+    graphs: list[EDAGRequest] = Field(
+        description="EDAGs to create or update",
+        min_length=1,
+        max_length=MAX_BULK_EDAGS,
+    )
+
+    @field_validator("graphs")
+    @classmethod
+    def check_unique_graphnames(cls, graphs: list[EDAGRequest]) -> list[EDAGRequest]:
+        graphnames = [graph.graphname for graph in graphs]
+        if len(set(graphnames)) != len(graphnames):
+            raise ValueError("Graph names must be unique within a bulk request")
+        return graphs
+
+
+class EDAGUpsertOutcome(str, Enum):
+    CREATED = "created"
+    UPDATED = "updated"
+    UNCHANGED = "unchanged"
+    FAILED = "failed"
+
+
+class EDAGUpsertResult(BaseResponse):
+    graphname: str
+    outcome: EDAGUpsertOutcome
+    error: str | None = None
+
+
+class EDAGBulkResponse(BaseResponse):
+    results: list[EDAGUpsertResult]
+
+
+class EDAGSummary(BaseResponse):
+    graphname: str
+    creation_time: str
+    step_count: int
+    steps: list[EDAGRequestStep] | None = None
+
+
+class EDAGResponse(BaseResponse):
+    graphname: str
+    creation_time: str
+    steps: list[EDAGRequestStep]
+    # Missing for EDAGs created before schedules were stored
+    schedule: EDAGSchedule | None = None
+    # Sent as the ETag header rather than in the body
+    resource_version: str = Field(exclude=True)
+
+
+class EDAGListResponse(BaseResponse):
+    items: list[EDAGSummary]
+    continue_token: str | None = None
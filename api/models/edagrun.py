@@ -1,14 +1,65 @@
+from pydantic import Field, model_validator
+
 from entity_builders.base import BaseRequest, BaseResource
 from models.base import BaseResponse
+from models.status import StepStatus
 
 EDAG_RUN_KIND = "EDAGRun"
 EDAG_RUN_API_VERSION = "edag.kickplate.com/v1alpha1"
+MAX_BATCH_RUNS = 1000
+EDAG_NAME_LABEL = "kickplate.com/edag"
+OWNER_LABEL = "kickplate.com/owner"
+EDAG_RUN_TRACEPARENT_ANNOTATION = "kickplate.com/traceparent"
 
 
 class EDAGRunResource(BaseResource):
     edagname: str
     edag_uid: str
+    owner: str | None = None
+    traceparent: str | None = None
 
 
 class EDAGRunResponse(BaseResponse):
     id: str
+
+
+class EDAGRunBatchItem(BaseRequest):
+    edagname: str = Field(description="Name of EDAG to run")
+    count: int = Field(description="Number of runs to start", ge=1, default=1)
+
+
+class EDAGRunBatchRequest(BaseRequest):
+    runs: list[EDAGRunBatchItem] = Field(description="EDAGs to run", min_length=1)
+
+    @model_validator(mode="after")
+    def check_total_runs(self) -> "EDAGRunBatchRequest":
+        total_runs = sum(item.count for item in self.runs)
+        if total_runs > MAX_BATCH_RUNS:
+            raise ValueError(
+                f"Batch requests {total_runs} runs, maximum is {MAX_BATCH_RUNS}"
+            )
+        return self
+
+
+class EDAGRunBatchResult(BaseResponse):
+    edagname: str
+    id: str | None = None
+    error: str | None = None
+
+
+class EDAGRunBatchResponse(BaseResponse):
+    results: list[EDAGRunBatchResult]
+
+
+class EDAGRunSummary(BaseResponse):
+    id: str
+    graphname: str
+    phase: str
+    creation_time: str
+    completed_time: str | None = None
+    steps_status: list[StepStatus] | None = None
+
+
+class EDAGRunListResponse(BaseResponse):
+    items: list[EDAGRunSummary]
+    continue_token: str | None = None
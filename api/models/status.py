@@ -4,14 +4,15 @@ from pydantic import BaseModel
 class StepStatus(BaseModel):
     name: str
     state: str
-    start_time: str
-    finish_time: str
-    error_message: str
+    start_time: str | None = None
+    finish_time: str | None = None
+    error_message: str | None = None
 
 
 class GraphStatusDetails(BaseModel):
+    id: str
     graphname: str
-    completed_time: str
+    completed_time: str | None = None
     phase: str
     creation_time: str
     steps_status: list[StepStatus]
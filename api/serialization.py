@@ -0,0 +1,48 @@
+from typing import Any, Callable, Coroutine
+
+import orjson
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from pydantic import TypeAdapter
+
+# Any still serialises models by their own schema, found at runtime
+_ANY_ADAPTER: TypeAdapter[Any] = TypeAdapter(Any)
+
+
+class ORJSONRequest(Request):
+    """Request parsing JSON bodies with orjson rather than the stdlib json"""
+
+    async def json(self) -> Any:
+        if not hasattr(self, "_json"):
+            self._json = orjson.loads(await self.body())
+        return self._json
+
+
+class ORJSONRoute(APIRoute):
+    """Route whose request bodies are parsed by ORJSONRequest
+
+    orjson.JSONDecodeError subclasses json.JSONDecodeError, so malformed bodies
+    still get FastAPI's usual 422.
+    """
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        handler = super().get_route_handler()
+
+        async def route_handler(request: Request) -> Response:
+            return await handler(ORJSONRequest(request.scope, request.receive))
+
+        return route_handler
+
+
+class ModelResponse(Response):
+    """JSON response serialising pydantic models with pydantic-core
+
+    Returning models from a route makes FastAPI validate them again against the
+    response model before encoding, which is costly for large graphs. Routes
+    returning this instead should declare response_model for the OpenAPI spec.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return _ANY_ADAPTER.dump_json(content, by_alias=True)
@@ -9,10 +9,42 @@ class Settings(BaseSettings):
     AUTH_TOKEN_URL: str = Field()
     AUTH_AUTH_URL: str = Field()
     AUTH_OIDC_CONFIG_URL: str = Field()
+    AUTH_JWKS_URL: str | None = Field(default=None)
     AUTH_ISSUER: str = Field()
     AUTH_AUDIENCE: str = Field()
     AUTH_REQUIRED_ROLE: Role = Field()
     AUTH_CLIENT_ID: str = Field()
+    AUTH_TOKEN_CACHE_SIZE: int = Field(default=1024, ge=0)
+    AUTH_HTTP_TIMEOUT_SECONDS: float = Field(default=10, gt=0)
+    AUTH_JWKS_REFRESH_INTERVAL_SECONDS: float = Field(default=300, gt=0)
+    AUTH_JWKS_MIN_REFRESH_INTERVAL_SECONDS: float = Field(default=30, ge=0)
+    K8S_TIMEOUT_SECONDS: float = Field(default=10, gt=0)
+    K8S_CONNECT_TIMEOUT_SECONDS: float = Field(default=5, gt=0)
+    K8S_POOL_MAX_CONNECTIONS: int = Field(default=100, ge=1)
+    K8S_POOL_MAX_KEEPALIVE_CONNECTIONS: int = Field(default=20, ge=0)
+    K8S_POOL_KEEPALIVE_EXPIRY_SECONDS: float = Field(default=30, ge=0)
+    K8S_CALL_TIMEOUT_SECONDS: float = Field(default=30, gt=0)
+    K8S_MAX_RETRIES: int = Field(default=3, ge=0)
+    K8S_RETRY_BASE_DELAY_SECONDS: float = Field(default=0.2, gt=0)
+    K8S_RETRY_MAX_DELAY_SECONDS: float = Field(default=5, gt=0)
+    K8S_CIRCUIT_FAILURE_THRESHOLD: int = Field(default=5, ge=1)
+    K8S_CIRCUIT_RESET_SECONDS: float = Field(default=30, gt=0)
+    EDAG_RUN_BATCH_CONCURRENCY: int = Field(default=16, ge=1)
+    EDAG_BULK_CONCURRENCY: int = Field(default=16, ge=1)
+    RUN_STATUS_STREAMS_PER_USER: int = Field(default=10, ge=1)
+    RUN_STATUS_STREAM_KEEPALIVE_SECONDS: float = Field(default=15, gt=0)
+    RESPONSE_GZIP_MIN_BYTES: int = Field(default=1024, ge=0)
+    RESPONSE_GZIP_LEVEL: int = Field(default=6, ge=1, le=9)
+    RESPONSE_BROTLI_QUALITY: int = Field(default=4, ge=0, le=11)
+    EXPORT_PAGE_SIZE: int = Field(default=500, ge=1)
+    METRICS_ENABLED: bool = Field(default=True)
+    RUN_RATE_LIMIT_PER_USER_PER_SECOND: float = Field(default=5, gt=0)
+    RUN_RATE_LIMIT_PER_USER_BURST: int = Field(default=20, ge=1)
+    RUN_RATE_LIMIT_PER_EDAG_PER_SECOND: float = Field(default=10, gt=0)
+    RUN_RATE_LIMIT_PER_EDAG_BURST: int = Field(default=50, ge=1)
+    RUN_RATE_LIMIT_REDIS_URL: str | None = Field(default=None)
+    PROFILE_MAX_SECONDS: float = Field(default=60, gt=0)
+    PROFILE_SAMPLE_INTERVAL_SECONDS: float = Field(default=0.005, gt=0)
 
 
 settings = Settings()
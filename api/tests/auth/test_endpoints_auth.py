@@ -5,12 +5,17 @@ import pytest
 from starlette.routing import Route
 from app import app
 from auth.errors import (
+    AuthNotReadyError,
     InsufficientPermissionsError,
     InvalidTokenError,
     TokenDecodingError,
 )
 from auth.security import RBACSecurity
-from starlette.status import HTTP_400_BAD_REQUEST, HTTP_403_FORBIDDEN
+from starlette.status import (
+    HTTP_400_BAD_REQUEST,
+    HTTP_403_FORBIDDEN,
+    HTTP_503_SERVICE_UNAVAILABLE,
+)
 
 
 pytestmark = pytest.mark.asyncio
@@ -25,6 +30,8 @@ def get_app_routes() -> list[tuple[str, str]]:
         "/docs/oauth2-redirect",
         "/redoc",
         "/health",
+        "/ready",
+        "/metrics",
     ]
     testing_routes = []
     for route in app.routes:
@@ -66,6 +73,18 @@ async def test_should_return_400_on_bad_token(auth_async_client: AsyncClient):
     assert resp.status_code == HTTP_400_BAD_REQUEST
 
 
+async def test_should_return_503_while_auth_initialising(
+    auth_async_client: AsyncClient,
+):
+    def raise_error():
+        raise AuthNotReadyError()
+
+    app.dependency_overrides[RBACSecurity.verify] = raise_error
+    resp = await auth_async_client.post("/api/v1/edag/")
+    assert resp.status_code == HTTP_503_SERVICE_UNAVAILABLE
+    assert resp.headers["Retry-After"] == "1"
+
+
 async def test_should_return_400_on_invalid_token(auth_async_client: AsyncClient):
     def raise_error():
         raise InvalidTokenError()
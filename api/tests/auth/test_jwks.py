@@ -0,0 +1,190 @@
+import asyncio
+import time
+from typing import Any
+from unittest.mock import AsyncMock, Mock
+
+import httpx
+import pytest
+from faker import Faker
+
+from auth.errors import UnknownKeyIdError
+from auth.jwks import JWKSClient, JWKSRefresher
+from auth.security import OAuth
+from auth.token_cache import TokenCache
+from models.auth import Role, TokenContents
+
+pytestmark = pytest.mark.asyncio
+
+fake = Faker()
+
+_OIDC_CONFIG_URL = "https://oidc.com"
+_JWKS_URL = "https://jwks.com"
+
+
+def _jwks_client(
+    valid_oidc_config: dict[str, Any],
+    valid_jwks: dict[str, Any],
+    jwks_uri: str | None = None,
+) -> tuple[JWKSClient, list[str]]:
+    requested_urls: list[str] = []
+    valid_oidc_config["jwks_uri"] = _JWKS_URL
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        url = str(request.url).rstrip("/")
+        requested_urls.append(url)
+        if url == _OIDC_CONFIG_URL:
+            return httpx.Response(200, json=valid_oidc_config)
+        return httpx.Response(200, json=valid_jwks)
+
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return JWKSClient(_OIDC_CONFIG_URL, http_client, jwks_uri), requested_urls
+
+
+async def test_should_fetch_jwks_through_discovery(
+    valid_oidc_config: dict[str, Any], valid_jwks: dict[str, Any]
+) -> None:
+    jwks_client, requested_urls = _jwks_client(valid_oidc_config, valid_jwks)
+
+    assert await jwks_client.fetch_jwks() == valid_jwks
+    assert await jwks_client.fetch_jwks() == valid_jwks
+
+    # Discovery document is only needed once
+    assert requested_urls == [_OIDC_CONFIG_URL, _JWKS_URL, _JWKS_URL]
+
+
+async def test_should_skip_discovery_when_jwks_uri_configured(
+    valid_oidc_config: dict[str, Any], valid_jwks: dict[str, Any]
+) -> None:
+    jwks_client, requested_urls = _jwks_client(
+        valid_oidc_config, valid_jwks, jwks_uri=_JWKS_URL
+    )
+
+    assert await jwks_client.fetch_jwks() == valid_jwks
+    assert requested_urls == [_JWKS_URL]
+
+
+async def test_should_rate_limit_unknown_kid_refresh(
+    valid_oidc_config: dict[str, Any], valid_jwks: dict[str, Any]
+) -> None:
+    jwks_client, requested_urls = _jwks_client(valid_oidc_config, valid_jwks)
+    on_refresh = Mock()
+    refresher = JWKSRefresher(
+        jwks_client, on_refresh, refresh_interval=3600, min_refresh_interval=3600
+    )
+
+    assert await refresher.refresh_for_unknown_kid() is False
+    assert requested_urls == []
+    on_refresh.assert_not_called()
+
+
+async def test_should_refresh_once_for_concurrent_unknown_kids(
+    valid_jwks: dict[str, Any],
+) -> None:
+    async def slow_fetch() -> dict[str, Any]:
+        await asyncio.sleep(0.01)
+        return valid_jwks
+
+    jwks_client = AsyncMock(spec=JWKSClient)
+    jwks_client.fetch_jwks.side_effect = slow_fetch
+    on_refresh = Mock()
+    refresher = JWKSRefresher(
+        jwks_client, on_refresh, refresh_interval=3600, min_refresh_interval=0
+    )
+
+    results = await asyncio.gather(
+        *[refresher.refresh_for_unknown_kid() for _ in range(20)]
+    )
+
+    assert all(results)
+    jwks_client.fetch_jwks.assert_awaited_once()
+    on_refresh.assert_called_once_with(valid_jwks)
+
+
+async def test_should_keep_keys_when_refresh_fails() -> None:
+    http_client = httpx.AsyncClient(
+        transport=httpx.MockTransport(lambda request: httpx.Response(503))
+    )
+    on_refresh = Mock()
+    refresher = JWKSRefresher(
+        JWKSClient(_OIDC_CONFIG_URL, http_client),
+        on_refresh,
+        refresh_interval=3600,
+        min_refresh_interval=0,
+    )
+    await asyncio.sleep(0.001)
+
+    assert await refresher.refresh_for_unknown_kid() is False
+    on_refresh.assert_not_called()
+
+
+async def test_should_keep_refreshing_after_malformed_keys(
+    valid_oidc_config: dict[str, Any], valid_jwks: dict[str, Any]
+) -> None:
+    jwks_client, _ = _jwks_client(valid_oidc_config, valid_jwks)
+    refreshes: list[dict[str, Any]] = []
+    refreshed = asyncio.Event()
+
+    def on_refresh(jwks: dict[str, Any]) -> None:
+        refreshes.append(jwks)
+        if len(refreshes) == 1:
+            raise KeyError("n")
+        refreshed.set()
+
+    refresher = JWKSRefresher(
+        jwks_client, on_refresh, refresh_interval=0.01, min_refresh_interval=0
+    )
+
+    refresher.start()
+    await asyncio.wait_for(refreshed.wait(), timeout=1)
+    await refresher.stop()
+
+    assert len(refreshes) == 2
+
+
+async def test_should_refresh_in_background(
+    valid_oidc_config: dict[str, Any], valid_jwks: dict[str, Any]
+) -> None:
+    jwks_client, _ = _jwks_client(valid_oidc_config, valid_jwks)
+    refreshed = asyncio.Event()
+    refresher = JWKSRefresher(
+        jwks_client,
+        lambda jwks: refreshed.set(),
+        refresh_interval=0.01,
+        min_refresh_interval=0,
+    )
+
+    refresher.start()
+    await asyncio.wait_for(refreshed.wait(), timeout=1)
+    await refresher.stop()
+
+
+async def test_oauth_should_retry_after_refresh_on_unknown_kid() -> None:
+    token_contents = TokenContents(
+        email=fake.email(),
+        roles=[Role.KICKPLATE_USER.value],
+        exp=int(time.time()) + 60,
+    )
+    validator = Mock()
+    validator.jwks_version = 1
+    validator.decode_verify_token.side_effect = [UnknownKeyIdError(), token_contents]
+    refresher = AsyncMock(spec=JWKSRefresher)
+    refresher.refresh_for_unknown_kid.return_value = True
+
+    user = await OAuth()("token", validator, TokenCache(max_size=10), refresher)
+
+    assert user.email == token_contents.email
+    assert validator.decode_verify_token.call_count == 2
+    refresher.refresh_for_unknown_kid.assert_awaited_once()
+
+
+async def test_oauth_should_raise_if_refresh_not_allowed() -> None:
+    validator = Mock()
+    validator.jwks_version = 1
+    validator.decode_verify_token.side_effect = UnknownKeyIdError()
+    refresher = AsyncMock(spec=JWKSRefresher)
+    refresher.refresh_for_unknown_kid.return_value = False
+
+    with pytest.raises(UnknownKeyIdError):
+        await OAuth()("token", validator, TokenCache(max_size=10), refresher)
+
+    assert validator.decode_verify_token.call_count == 1
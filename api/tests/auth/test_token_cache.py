@@ -0,0 +1,101 @@
+import time
+from unittest.mock import AsyncMock
+
+import pytest
+from faker import Faker
+
+from auth.security import OAuth
+from auth.token_cache import TokenCache
+from models.auth import Role, TokenContents, User
+
+fake = Faker()
+
+
+def _make_user(token: str) -> User:
+    return User(email=fake.email(), roles=[Role.KICKPLATE_USER], token=token)
+
+
+def test_should_return_cached_user() -> None:
+    cache = TokenCache(max_size=10)
+    user = _make_user("token")
+
+    cache.put("token", user, int(time.time()) + 60, jwks_version=1)
+
+    assert cache.get("token", jwks_version=1) == user
+    assert cache.stats().hits == 1
+
+
+def test_should_miss_on_unknown_token() -> None:
+    cache = TokenCache(max_size=10)
+
+    assert cache.get("token", jwks_version=1) is None
+    assert cache.stats().misses == 1
+
+
+def test_should_evict_expired_token() -> None:
+    cache = TokenCache(max_size=10)
+    cache.put("token", _make_user("token"), int(time.time()) - 1, jwks_version=1)
+
+    assert cache.get("token", jwks_version=1) is None
+
+    stats = cache.stats()
+    assert stats.evictions == 1
+    assert stats.size == 0
+
+
+def test_should_bypass_entries_after_jwks_rotation() -> None:
+    cache = TokenCache(max_size=10)
+    cache.put("token", _make_user("token"), int(time.time()) + 60, jwks_version=1)
+
+    assert cache.get("token", jwks_version=2) is None
+    assert cache.stats().evictions == 1
+
+
+def test_should_evict_least_recently_used() -> None:
+    cache = TokenCache(max_size=2)
+    expiry = int(time.time()) + 60
+    for token in ["first", "second"]:
+        cache.put(token, _make_user(token), expiry, jwks_version=1)
+
+    cache.get("first", jwks_version=1)
+    cache.put("third", _make_user("third"), expiry, jwks_version=1)
+
+    assert cache.get("second", jwks_version=1) is None
+    assert cache.get("first", jwks_version=1) is not None
+    assert cache.stats().evictions == 1
+
+
+def test_should_not_cache_token_without_expiry() -> None:
+    cache = TokenCache(max_size=10)
+    cache.put("token", _make_user("token"), None, jwks_version=1)
+
+    assert cache.stats().size == 0
+
+
+@pytest.mark.asyncio
+async def test_oauth_should_skip_verification_on_cache_hit() -> None:
+    mock_token = "thisisanaccesstoken"
+    token_contents = TokenContents(
+        email=fake.email(),
+        roles=[Role.KICKPLATE_USER.value],
+        exp=int(time.time()) + 60,
+    )
+
+    class MockValidator:
+        jwks_version = 1
+        calls = 0
+
+        def decode_verify_token(self, access_token: str) -> TokenContents:
+            self.calls += 1
+            return token_contents
+
+    validator = MockValidator()
+    cache = TokenCache(max_size=10)
+    oauth = OAuth()
+
+    first_user = await oauth(mock_token, validator, cache, AsyncMock())
+    second_user = await oauth(mock_token, validator, cache, AsyncMock())
+
+    assert first_user == second_user
+    assert first_user.roles == [Role.KICKPLATE_USER]
+    assert validator.calls == 1
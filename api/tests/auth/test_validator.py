@@ -1,32 +1,30 @@
+import asyncio
+import base64
 import json
-from typing import Any, cast
+from typing import Any
+from unittest.mock import AsyncMock, Mock
 
 import pytest
-import requests_mock
 
-from auth.errors import TokenDecodingError, TokenExpiredError
-from auth.validator import TokenValidator
+import auth.validator
+from auth.errors import TokenDecodingError, TokenExpiredError, UnknownKeyIdError
+from auth.jwks import JWKSClient
+from auth.validator import (
+    TokenValidator,
+    _build_initial_validator,
+    shutdown_token_validator,
+)
 
 
 def test_should_allow_valid_token(
     valid_token: dict[str, str],
     valid_jwks: dict[str, str],
-    valid_oidc_config: dict[str, str],
 ):
-    jwks_url = "https://jwks.com"
-    oidc_config_url = "https://oidc.com"
-    valid_oidc_config["jwks_uri"] = jwks_url
-
     token = valid_token["token"]
     audience = valid_token["audience"]
     issuer = valid_token["issuer"]
 
-    with requests_mock.Mocker() as m:
-        m = cast(requests_mock.Mocker, m)
-        m.get(jwks_url, json=valid_jwks)
-        m.get(oidc_config_url, json=valid_oidc_config)
-
-        token_validator = TokenValidator(audience, issuer, oidc_config_url)
+    token_validator = TokenValidator(audience, issuer, valid_jwks)
 
     token_contents = token_validator.decode_verify_token(
         token,
@@ -37,22 +35,12 @@ def test_should_allow_valid_token(
 def test_should_raise_expiry_error(
     valid_token: dict[str, str],
     valid_jwks: dict[str, str],
-    valid_oidc_config: dict[str, str],
 ):
-    jwks_url = "https://jwks.com"
-    oidc_config_url = "https://oidc.com"
-    valid_oidc_config["jwks_uri"] = jwks_url
-
     token = valid_token["token"]
     audience = valid_token["audience"]
     issuer = valid_token["issuer"]
 
-    with requests_mock.Mocker() as m:
-        m = cast(requests_mock.Mocker, m)
-        m.get(jwks_url, json=valid_jwks)
-        m.get(oidc_config_url, json=valid_oidc_config)
-
-        token_validator = TokenValidator(audience, issuer, oidc_config_url)
+    token_validator = TokenValidator(audience, issuer, valid_jwks)
 
     with pytest.raises(TokenExpiredError) as exc:
         token_contents = token_validator.decode_verify_token(
@@ -63,22 +51,12 @@ def test_should_raise_expiry_error(
 def test_should_raise_error_on_invalid_token(
     valid_token: dict[str, str],
     valid_jwks: dict[str, str],
-    valid_oidc_config: dict[str, str],
 ):
-    jwks_url = "https://jwks.com"
-    oidc_config_url = "https://oidc.com"
-    valid_oidc_config["jwks_uri"] = jwks_url
-
     token = "1fdwf.srfgfbdsg.dsafg=="
     audience = valid_token["audience"]
     issuer = valid_token["issuer"]
 
-    with requests_mock.Mocker() as m:
-        m = cast(requests_mock.Mocker, m)
-        m.get(jwks_url, json=valid_jwks)
-        m.get(oidc_config_url, json=valid_oidc_config)
-
-        token_validator = TokenValidator(audience, issuer, oidc_config_url)
+    token_validator = TokenValidator(audience, issuer, valid_jwks)
 
     with pytest.raises(TokenDecodingError) as exc:
         token_contents = token_validator.decode_verify_token(
@@ -89,25 +67,94 @@ def test_should_raise_error_on_invalid_token(
 def test_should_raise_error_on_missing_kid(
     valid_token: dict[str, str],
     valid_jwks: dict[str, Any],
-    valid_oidc_config: dict[str, Any],
 ):
-    jwks_url = "https://jwks.com"
-    oidc_config_url = "https://oidc.com"
-    valid_oidc_config["jwks_uri"] = jwks_url
     valid_jwks["keys"] = []
 
     token = "1fdwf.srfgfbdsg.dsafg=="
     audience = valid_token["audience"]
     issuer = valid_token["issuer"]
 
-    with requests_mock.Mocker() as m:
-        m = cast(requests_mock.Mocker, m)
-        m.get(jwks_url, json=valid_jwks)
-        m.get(oidc_config_url, json=valid_oidc_config)
-
-        token_validator = TokenValidator(audience, issuer, oidc_config_url)
+    token_validator = TokenValidator(audience, issuer, valid_jwks)
 
     with pytest.raises(TokenDecodingError) as exc:
         token_contents = token_validator.decode_verify_token(
             token,
         )
+
+
+def test_should_index_public_keys_by_kid(
+    valid_token: dict[str, str],
+    valid_jwks: dict[str, Any],
+):
+    token_validator = TokenValidator(
+        valid_token["audience"], valid_token["issuer"], valid_jwks
+    )
+
+    expected_kids = {jwk["kid"] for jwk in valid_jwks["keys"]}
+    assert set(token_validator._public_keys) == expected_kids
+
+    token_validator.update_jwks({"keys": valid_jwks["keys"][:1]})
+    assert set(token_validator._public_keys) == {valid_jwks["keys"][0]["kid"]}
+
+
+def test_should_raise_unknown_kid_error(
+    valid_token: dict[str, str],
+    valid_jwks: dict[str, Any],
+):
+    header = base64.urlsafe_b64encode(
+        json.dumps({"alg": "RS256", "kid": "unknownkid"}).encode("utf-8")
+    ).decode("utf-8")
+    token = f"{header}.e30.c2lnbmF0dXJl"
+
+    token_validator = TokenValidator(
+        valid_token["audience"], valid_token["issuer"], valid_jwks
+    )
+
+    with pytest.raises(UnknownKeyIdError):
+        token_validator.decode_verify_token(token)
+
+
+def test_should_only_bump_jwks_version_when_keys_change(
+    valid_token: dict[str, str],
+    valid_jwks: dict[str, Any],
+):
+    token_validator = TokenValidator(
+        valid_token["audience"], valid_token["issuer"], valid_jwks
+    )
+
+    token_validator.update_jwks({"keys": list(valid_jwks["keys"])})
+    assert token_validator.jwks_version == 1
+
+    token_validator.update_jwks({"keys": valid_jwks["keys"][:1]})
+    assert token_validator.jwks_version == 2
+
+
+@pytest.mark.asyncio
+async def test_should_retry_initial_jwks_with_malformed_key(
+    valid_jwks: dict[str, Any], monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(auth.validator, "_INITIAL_RETRY_DELAY_SECONDS", 0)
+    malformed_jwks = {"keys": [{**valid_jwks["keys"][0], "n": "not*base64"}]}
+    jwks_client = Mock(spec=JWKSClient)
+    jwks_client.fetch_jwks = AsyncMock(side_effect=[malformed_jwks, valid_jwks])
+
+    token_validator = await _build_initial_validator(jwks_client)
+
+    assert token_validator.jwks == valid_jwks
+    assert jwks_client.fetch_jwks.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_should_shut_down_after_failed_initialisation(
+    monkeypatch: pytest.MonkeyPatch,
+):
+    async def fail() -> None:
+        raise RuntimeError("unexpected")
+
+    task = asyncio.create_task(fail())
+    await asyncio.sleep(0)
+    monkeypatch.setattr(auth.validator, "_initialise_task", task)
+
+    await shutdown_token_validator()
+
+    assert auth.validator._initialise_task is None
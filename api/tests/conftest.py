@@ -7,6 +7,8 @@ from httpx import ASGITransport, AsyncClient
 
 from app import app
 from auth.security import RBACSecurity
+from external.rate_limit import InMemoryRateLimitBackend
+from features.graph.rate_limit import RunRateLimiter, get_run_rate_limiter
 from models.auth import Role, User
 from models.edag import (
     EDAG_API_VERSION,
@@ -43,6 +45,9 @@ def mock_user(valid_token: dict[str, str]) -> User:
 @pytest_asyncio.fixture()
 async def async_client(mock_user: User) -> AsyncGenerator[Any, Iterable[AsyncClient]]:
     app.dependency_overrides[RBACSecurity.verify] = lambda: mock_user
+    # Buckets per test, so earlier tests do not use up the runs of later ones
+    rate_limiter = RunRateLimiter(InMemoryRateLimitBackend())
+    app.dependency_overrides[get_run_rate_limiter] = lambda: rate_limiter
     async with AsyncClient(
         transport=ASGITransport(app=app), base_url="http://test"
     ) as client:
@@ -74,7 +79,7 @@ def edag_request() -> EDAGRequest:
                 stepname="step2",
                 image="image2",
                 replicas=2,
-                dependencies=["step2"],
+                dependencies=["step1"],
                 env={"type": "value2"},
                 args=["step2arg"],
                 command=["step2command"],
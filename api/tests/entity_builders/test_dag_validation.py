@@ -0,0 +1,115 @@
+import pytest
+
+from entity_builders.dag_validation import (
+    InvalidEDAGError,
+    build_schedule,
+    validate_steps,
+)
+from models.edag import EDAGRequestStep
+
+
+def step(stepname: str, *dependencies: str) -> EDAGRequestStep:
+    return EDAGRequestStep(
+        stepname=stepname, image="image", dependencies=list(dependencies)
+    )
+
+
+def error_types(exc: InvalidEDAGError) -> list[tuple[str, int]]:
+    return [(error["type"], error["loc"][2]) for error in exc.errors]
+
+
+def test_should_accept_valid_graph() -> None:
+    validate_steps([step("a"), step("b", "a"), step("c", "a", "b"), step("d")])
+
+
+def test_should_find_depths_whatever_the_step_order() -> None:
+    in_order = validate_steps([step("a"), step("b", "a"), step("c", "a", "b")])
+    out_of_order = validate_steps([step("c", "a", "b"), step("b", "a"), step("a")])
+
+    assert in_order.depths == [0, 1, 2]
+    assert out_of_order.depths == [2, 1, 0]
+
+
+def test_should_reject_duplicate_step_names() -> None:
+    with pytest.raises(InvalidEDAGError) as exc:
+        validate_steps([step("a"), step("b"), step("a")])
+
+    assert error_types(exc.value) == [("duplicate_step", 2)]
+
+
+def test_should_reject_unknown_dependencies() -> None:
+    with pytest.raises(InvalidEDAGError) as exc:
+        validate_steps([step("a"), step("b", "a", "missing")])
+
+    assert error_types(exc.value) == [("unknown_dependency", 1)]
+    assert "missing" in exc.value.errors[0]["msg"]
+
+
+def test_should_reject_duplicate_dependencies() -> None:
+    with pytest.raises(InvalidEDAGError) as exc:
+        validate_steps([step("a"), step("b", "a", "a")])
+
+    assert error_types(exc.value) == [("duplicate_dependency", 1)]
+
+
+def test_should_find_depths_of_steps_after_one_out_of_order() -> None:
+    graph = validate_steps(
+        [step("a"), step("d", "c"), step("b", "a"), step("c", "b", "a"), step("e")]
+    )
+
+    assert graph.depths == [0, 3, 1, 2, 0]
+
+
+@pytest.mark.parametrize(
+    "steps, error",
+    [
+        ([step("a", "b"), step("b", "missing")], ("unknown_dependency", 1)),
+        ([step("a", "c"), step("b", "a"), step("c", "b")], ("dependency_cycle", 0)),
+    ],
+)
+def test_should_reject_out_of_order_steps_with_errors(
+    steps: list[EDAGRequestStep], error: tuple[str, int]
+) -> None:
+    with pytest.raises(InvalidEDAGError) as exc:
+        validate_steps(steps)
+
+    assert error_types(exc.value)[0] == error
+
+
+def test_should_report_only_steps_on_a_cycle() -> None:
+    # c depends on the a -> b -> a cycle but is not part of it
+    with pytest.raises(InvalidEDAGError) as exc:
+        validate_steps([step("a", "b"), step("b", "a"), step("c", "b"), step("d", "d")])
+
+    assert error_types(exc.value) == [
+        ("dependency_cycle", 0),
+        ("dependency_cycle", 1),
+        ("dependency_cycle", 3),
+    ]
+
+
+def test_should_report_all_errors_together() -> None:
+    with pytest.raises(InvalidEDAGError) as exc:
+        validate_steps([step("a", "missing"), step("a"), step("b", "b")])
+
+    assert sorted(error["type"] for error in exc.value.errors) == [
+        "dependency_cycle",
+        "duplicate_step",
+        "unknown_dependency",
+    ]
+
+
+def test_should_lay_out_schedule_by_depth() -> None:
+    schedule = build_schedule(
+        validate_steps(
+            [step("a"), step("b", "a"), step("c", "a"), step("d", "b", "c"), step("e")]
+        )
+    )
+
+    assert schedule["levels"] == [["a", "e"], ["b", "c"], ["d"]]
+    assert schedule["critical_path"][0] == "a"
+    assert schedule["critical_path"][-1] == "d"
+    assert len(schedule["critical_path"]) == 3
+    assert schedule["steps"]["a"]["fan_out"] == 2
+    assert schedule["steps"]["d"]["fan_in"] == 2
+    assert schedule["steps"]["d"]["depth"] == 2
@@ -1,7 +1,14 @@
 from typing import Any
 
 from entity_builders.edag import EDAGBuilder
-from models.edag import EDAG_API_VERSION, EDAG_KIND, EDAGRequest, EDAGResource
+from models.edag import (
+    EDAG_API_VERSION,
+    EDAG_KIND,
+    EDAGRequest,
+    EDAGRequestStep,
+    EDAGResource,
+    EDAGSchedule,
+)
 
 
 def test_should_get_crd_definition():
@@ -27,3 +34,64 @@ def test_should_build_manifest_from_resource(
     )
     raw_manifest = built_manifest.raw.to_dict()
     assert raw_manifest == edag_manifest
+
+
+def test_should_reuse_crd_definition():
+    assert EDAGBuilder.get_crd() is EDAGBuilder().get_crd()
+
+
+def test_should_build_steps_from_manifest(edag_resource: EDAGResource) -> None:
+    edag = EDAGBuilder()
+    manifest = edag.build_manifest(edag_resource, "testnamespace").raw
+
+    steps = edag.build_steps_from_manifest(manifest)
+
+    assert steps == [
+        EDAGRequestStep(**step.model_dump()) for step in edag_resource.steps
+    ]
+
+
+def test_should_store_schedule_on_manifest(edag_request: EDAGRequest) -> None:
+    edag = EDAGBuilder()
+    resource = edag.build_resource(edag_request)
+    manifest = edag.build_manifest(resource, "testnamespace").raw
+
+    schedule = edag.build_schedule_from_manifest(manifest)
+
+    assert schedule is not None
+    assert schedule == EDAGSchedule.model_validate(resource.schedule)
+    assert schedule.critical_path == ["step1", "step2"]
+
+
+def test_should_have_no_schedule_without_annotation(
+    edag_manifest: dict[str, Any],
+) -> None:
+    assert EDAGBuilder().build_schedule_from_manifest(edag_manifest) is None
+
+
+def test_should_hash_content_independent_of_order(edag_request: EDAGRequest) -> None:
+    edag = EDAGBuilder()
+    resource = edag.build_resource(edag_request)
+    reordered = edag_request.model_copy(
+        update={
+            "steps": [
+                step.model_copy(update={"env": dict(reversed(step.env.items()))})
+                for step in reversed(edag_request.steps)
+            ]
+        }
+    )
+    changed = edag_request.model_copy(
+        update={
+            "steps": [
+                edag_request.steps[0].model_copy(update={"args": ["otherarg"]}),
+                edag_request.steps[1],
+            ]
+        }
+    )
+
+    assert edag.build_resource(reordered).content_hash == resource.content_hash
+    assert edag.build_resource(changed).content_hash != resource.content_hash
+    assert (
+        edag.get_content_hash(edag.build_manifest(resource, "testnamespace").raw)
+        == resource.content_hash
+    )
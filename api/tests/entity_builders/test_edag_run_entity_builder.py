@@ -1,7 +1,19 @@
 from typing import Any
 
-from entity_builders.edagrun import EDAGRunBuilder
-from models.edagrun import EDAG_RUN_API_VERSION, EDAG_RUN_KIND, EDAGRunResource
+from entity_builders.edag import EDAGBuilder
+from entity_builders.edagrun import (
+    EDAGRunBuilder,
+    edag_label_value,
+    owner_label_value,
+)
+from models.edagrun import (
+    EDAG_NAME_LABEL,
+    EDAG_RUN_API_VERSION,
+    EDAG_RUN_KIND,
+    EDAG_RUN_TRACEPARENT_ANNOTATION,
+    OWNER_LABEL,
+    EDAGRunResource,
+)
 
 
 def test_should_get_crd_definition() -> None:
@@ -19,11 +31,63 @@ def test_should_build_manifest_from_resource(
     )
     raw_manifest = built_manifest.raw.to_dict()
 
-    # Suffix is unknown, so do fine comparison on metadata
+    # Name is generated by the API server, so do fine comparison on metadata
     expected_namespace = edagrun_manifest.pop("metadata")["namespace"]
     generated_metadata = raw_manifest.pop("metadata")
-    generated_name: str = generated_metadata["name"]
 
     assert expected_namespace == generated_metadata["namespace"]
-    assert generated_name.startswith(edagrun_resource.edagname)
+    assert "name" not in generated_metadata
+    assert generated_metadata["generateName"] == f"{edagrun_resource.edagname}-"
     assert raw_manifest == edagrun_manifest
+
+
+def test_should_reuse_crd_definition() -> None:
+    assert EDAGRunBuilder.get_crd() is EDAGRunBuilder().get_crd()
+    assert EDAGRunBuilder.get_crd() is not EDAGBuilder.get_crd()
+
+
+def test_should_label_run_with_edag_and_owner(
+    edag_run_resource: EDAGRunResource,
+) -> None:
+    edag_run_resource.owner = "testuser@email.com"
+
+    manifest = EDAGRunBuilder().build_manifest(edag_run_resource, "testnamespace")
+
+    labels = manifest.raw["metadata"]["labels"]
+    assert labels[EDAG_NAME_LABEL] == edag_run_resource.edagname
+    assert labels[OWNER_LABEL] == owner_label_value("testuser@email.com")
+    assert "@" not in labels[OWNER_LABEL]
+
+
+def test_should_shorten_long_edag_names_in_labels(
+    edag_run_resource: EDAGRunResource,
+) -> None:
+    edag_run_resource.edagname = "a" * 253
+
+    manifest = EDAGRunBuilder().build_manifest(edag_run_resource, "testnamespace")
+
+    label = manifest.raw["metadata"]["labels"][EDAG_NAME_LABEL]
+    assert len(label) == 63
+    assert label == edag_label_value("a" * 253)
+    assert label != edag_label_value("a" * 252)
+
+
+def test_should_annotate_run_with_traceparent(
+    edag_run_resource: EDAGRunResource,
+) -> None:
+    traceparent = "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+    edag_run_resource.traceparent = traceparent
+
+    manifest = EDAGRunBuilder().build_raw_manifest(edag_run_resource, "testnamespace")
+
+    assert manifest["metadata"]["annotations"] == {
+        EDAG_RUN_TRACEPARENT_ANNOTATION: traceparent
+    }
+
+
+def test_should_not_annotate_run_outside_a_trace(
+    edag_run_resource: EDAGRunResource,
+) -> None:
+    manifest = EDAGRunBuilder().build_raw_manifest(edag_run_resource, "testnamespace")
+
+    assert "annotations" not in manifest["metadata"]
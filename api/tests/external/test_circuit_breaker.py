@@ -0,0 +1,89 @@
+from external.circuit_breaker import CircuitBreaker
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_should_open_after_consecutive_failures() -> None:
+    # Arrange
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=10, clock=clock)
+
+    # Act
+    opened = [breaker.record_failure(), breaker.record_failure()]
+    clock.now += 4
+
+    # Assert
+    assert opened == [False, True]
+    assert breaker.is_open
+    assert breaker.retry_after() == 6
+
+
+def test_should_not_open_if_failures_are_interleaved_with_successes() -> None:
+    # Arrange
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=10, clock=FakeClock())
+
+    # Act
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+
+    # Assert
+    assert not breaker.is_open
+    assert breaker.retry_after() == 0
+
+
+def test_should_let_one_trial_through_after_reset() -> None:
+    # Arrange
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=10, clock=clock)
+    breaker.record_failure()
+    clock.now += 10
+
+    # Act
+    trial = breaker.retry_after()
+    during_trial = breaker.retry_after()
+    breaker.record_success()
+
+    # Assert
+    assert trial == 0
+    assert during_trial == 10
+    assert not breaker.is_open
+
+
+def test_should_reopen_if_trial_fails() -> None:
+    # Arrange
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=3, reset_seconds=10, clock=clock)
+    for _ in range(3):
+        breaker.record_failure()
+    clock.now += 10
+    breaker.retry_after()
+
+    # Act
+    breaker.record_failure()
+
+    # Assert
+    assert breaker.is_open
+    assert breaker.retry_after() == 10
+
+
+def test_should_replace_trial_that_never_reports_back() -> None:
+    # Arrange
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=10, clock=clock)
+    breaker.record_failure()
+    clock.now += 10
+    breaker.retry_after()
+
+    # Act
+    clock.now += 10
+    second_trial = breaker.retry_after()
+
+    # Assert
+    assert second_trial == 0
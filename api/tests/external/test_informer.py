@@ -0,0 +1,199 @@
+import asyncio
+from typing import Any, AsyncIterator
+
+import pytest
+
+from entity_builders.edag import EDAGBuilder
+from external.informer import ResourceInformer
+
+pytestmark = pytest.mark.asyncio
+
+
+def _edag(name: str, uid: str, resource_version: str) -> dict[str, Any]:
+    return {"metadata": {"name": name, "uid": uid, "resourceVersion": resource_version}}
+
+
+class FakeKubernetesClient:
+    def __init__(
+        self,
+        pages: list[dict[str, Any]],
+        watches: list[list[dict[str, Any]]],
+    ) -> None:
+        self.pages = pages
+        self.watches = watches
+        self.list_params: list[dict[str, Any]] = []
+        self.watch_versions: list[str] = []
+        self.watch_done = asyncio.Event()
+
+    async def list_resources(
+        self, resource_builder: EDAGBuilder, params: dict[str, Any]
+    ) -> dict[str, Any]:
+        self.list_params.append(dict(params))
+        return self.pages.pop(0)
+
+    async def watch_resources(
+        self, resource_builder: EDAGBuilder, resource_version: str
+    ) -> AsyncIterator[dict[str, Any]]:
+        self.watch_versions.append(resource_version)
+        if not self.watches:
+            self.watch_done.set()
+            await asyncio.Event().wait()
+        for event in self.watches.pop(0):
+            yield event
+
+
+async def _run_informer(client: FakeKubernetesClient) -> ResourceInformer:
+    informer = ResourceInformer(client, EDAGBuilder())  # type: ignore[arg-type]
+    informer.start()
+    await asyncio.wait_for(client.watch_done.wait(), timeout=1)
+    return informer
+
+
+async def test_should_list_all_pages() -> None:
+    client = FakeKubernetesClient(
+        pages=[
+            {"metadata": {"continue": "next"}, "items": [_edag("a", "uid-a", "1")]},
+            {"metadata": {"resourceVersion": "5"}, "items": [_edag("b", "uid-b", "2")]},
+        ],
+        watches=[],
+    )
+
+    informer = await _run_informer(client)
+
+    assert informer.synced
+    assert informer.get("a")["metadata"]["uid"] == "uid-a"
+    assert informer.get("b")["metadata"]["uid"] == "uid-b"
+    assert client.list_params[1]["continue"] == "next"
+    assert client.watch_versions == ["5"]
+    await informer.stop()
+
+
+async def test_should_apply_watch_events() -> None:
+    client = FakeKubernetesClient(
+        pages=[
+            {"metadata": {"resourceVersion": "1"}, "items": [_edag("a", "a1", "1")]}
+        ],
+        watches=[
+            [
+                {"type": "ADDED", "object": _edag("b", "b1", "2")},
+                {"type": "MODIFIED", "object": _edag("a", "a2", "3")},
+                {"type": "DELETED", "object": _edag("b", "b1", "4")},
+                {"type": "BOOKMARK", "object": {"metadata": {"resourceVersion": "7"}}},
+            ]
+        ],
+    )
+
+    informer = await _run_informer(client)
+
+    assert informer.get("a")["metadata"]["uid"] == "a2"
+    assert informer.get("b") is None
+    # Resumes from the last seen version when the server closes the watch
+    assert client.watch_versions == ["1", "7"]
+    await informer.stop()
+
+
+async def test_should_relist_when_watch_expires() -> None:
+    client = FakeKubernetesClient(
+        pages=[
+            {"metadata": {"resourceVersion": "1"}, "items": [_edag("a", "a1", "1")]},
+            {"metadata": {"resourceVersion": "9"}, "items": [_edag("c", "c1", "9")]},
+        ],
+        watches=[[{"type": "ERROR", "object": {"code": 410, "message": "Gone"}}]],
+    )
+
+    informer = await _run_informer(client)
+
+    assert informer.get("a") is None
+    assert informer.get("c")["metadata"]["uid"] == "c1"
+    assert client.watch_versions == ["1", "9"]
+    await informer.stop()
+    assert not informer.synced
+
+
+async def test_should_relist_after_unexpected_error(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr("external.informer._INITIAL_RETRY_DELAY_SECONDS", 0)
+    client = FakeKubernetesClient(
+        pages=[
+            {"metadata": {"resourceVersion": "1"}, "items": [_edag("a", "a1", "1")]},
+            {"metadata": {"resourceVersion": "9"}, "items": [_edag("c", "c1", "9")]},
+        ],
+        watches=[[{"type": "MODIFIED", "object": None}]],
+    )
+
+    informer = await _run_informer(client)
+
+    assert informer.synced
+    assert informer.get("c")["metadata"]["uid"] == "c1"
+    assert client.watch_versions == ["1", "9"]
+    await informer.stop()
+
+
+async def test_should_index_resources() -> None:
+    client = FakeKubernetesClient(
+        pages=[
+            {
+                "metadata": {"resourceVersion": "1"},
+                "items": [_edag("a", "a1", "1"), _edag("b", "b1", "1")],
+            }
+        ],
+        watches=[
+            [
+                {"type": "MODIFIED", "object": _edag("a", "a2", "2")},
+                {"type": "DELETED", "object": _edag("b", "b1", "3")},
+            ]
+        ],
+    )
+    informer = ResourceInformer(
+        client,  # type: ignore[arg-type]
+        EDAGBuilder(),
+        indexers={"uid": lambda obj: obj["metadata"]["uid"]},
+    )
+
+    informer.start()
+    await asyncio.wait_for(client.watch_done.wait(), timeout=1)
+
+    assert informer.list_by_index("uid", "a2") == [informer.get("a")]
+    assert informer.list_by_index("uid", "a1") == []
+    assert informer.list_by_index("uid", "b1") == []
+    await informer.stop()
+
+
+async def test_should_notify_listeners() -> None:
+    client = FakeKubernetesClient(
+        pages=[
+            {
+                "metadata": {"resourceVersion": "1"},
+                "items": [_edag("a", "a1", "1"), _edag("b", "b1", "1")],
+            },
+            {
+                "metadata": {"resourceVersion": "9"},
+                "items": [_edag("a", "a1", "1"), _edag("c", "c1", "9")],
+            },
+        ],
+        watches=[
+            [
+                {"type": "MODIFIED", "object": _edag("a", "a1", "1")},
+                {"type": "ERROR", "object": {"code": 410, "message": "Gone"}},
+            ]
+        ],
+    )
+    informer = ResourceInformer(client, EDAGBuilder())  # type: ignore[arg-type]
+    events: list[tuple[str, str]] = []
+    informer.add_listener(
+        lambda event, obj: events.append((event, obj["metadata"]["name"]))
+    )
+
+    informer.start()
+    await asyncio.wait_for(client.watch_done.wait(), timeout=1)
+
+    # Relist only reports what changed since the previous list
+    assert events == [
+        ("ADDED", "a"),
+        ("ADDED", "b"),
+        ("MODIFIED", "a"),
+        ("ADDED", "c"),
+        ("DELETED", "b"),
+    ]
+    await informer.stop()
@@ -1,14 +1,30 @@
+import asyncio
+import json
+from pathlib import Path
 from typing import Any
-from unittest.mock import AsyncMock, Mock
+from unittest.mock import AsyncMock, MagicMock, Mock
 
+import httpx
 import pytest
-from kr8s import Api
-from kr8s.asyncio.objects import APIObject
+from kr8s import Api, ServerError
 
 from entity_builders.edag import EDAGBuilder
-from external.kubernetes import _NAMESPACE, KubernetesClient
-from models.edag import (EDAGRequest, EDAGRequestStep, EDAGResource,
-                         EDAGStepResource)
+from external.kubernetes import (
+    _NAMESPACE,
+    KubernetesClient,
+    KubernetesUnavailableError,
+    get_kubernetes_client,
+    initialise_kubernetes_client,
+    shutdown_kubernetes_client,
+)
+from models.edag import (
+    EDAG_SCHEDULE_ANNOTATION,
+    EDAGRequest,
+    EDAGRequestStep,
+    EDAGResource,
+    EDAGStepResource,
+)
+from settings import settings
 
 pytestmark = pytest.mark.asyncio
 
@@ -42,19 +58,334 @@ def edag_resource() -> EDAGResource:
 
 async def test_should_create_edag(edag_resource: EDAGResource) -> None:
     # Arrange
-    mock_api = AsyncMock(spec=Api)
-    mock_resource_builder = Mock(spec=EDAGBuilder)
-    mock_api_object = AsyncMock(spec=APIObject)
+    mock_api = MagicMock(spec=Api)
+    mock_response = Mock()
+    mock_response.json.return_value = {"metadata": {"name": "testgraphname"}}
+    mock_api.call_api.return_value.__aenter__.return_value = mock_response
     client = KubernetesClient(mock_api)
+    builder = EDAGBuilder()
 
-    mock_resource_builder.build_manifest.return_value = mock_api_object
+    # Act
+    created = await client.create_resource(builder, edag_resource)
+
+    # Assert
+    crd = builder.get_crd()
+    mock_api.call_api.assert_called_once_with(
+        "POST",
+        version=crd.version,
+        url=crd.endpoint,
+        namespace=_NAMESPACE,
+        data=json.dumps(builder.build_raw_manifest(edag_resource, _NAMESPACE)),
+    )
+    assert created == {"metadata": {"name": "testgraphname"}}
+
+
+async def test_should_get_resource_with_shared_api() -> None:
+    # Arrange
+    mock_api = MagicMock(spec=Api)
+    mock_response = Mock()
+    mock_response.json.return_value = {"metadata": {"name": "testgraphname"}}
+    mock_api.call_api.return_value.__aenter__.return_value = mock_response
+    client = KubernetesClient(mock_api)
+
+    # Act
+    resource = await client.get_resource(EDAGBuilder(), "testgraphname")
+
+    # Assert
+    crd = EDAGBuilder.get_crd()
+    mock_api.call_api.assert_called_once_with(
+        "GET",
+        version=crd.version,
+        url=f"{crd.endpoint}/testgraphname",
+        namespace=_NAMESPACE,
+    )
+    assert isinstance(resource, crd)
+    assert resource.api == mock_api
+
+
+async def test_should_not_patch_unchanged_resource(
+    edag_resource: EDAGResource,
+) -> None:
+    # Arrange
+    mock_api = MagicMock(spec=Api)
+    client = KubernetesClient(mock_api)
+    builder = EDAGBuilder()
+    current = builder.build_manifest(edag_resource, _NAMESPACE)
+
+    # Act
+    updated = await client.update_resource(builder, edag_resource, current)
+
+    # Assert
+    assert updated is None
+    mock_api.call_api.assert_not_called()
+
+
+async def test_should_patch_changed_resource(edag_resource: EDAGResource) -> None:
+    # Arrange
+    mock_api = MagicMock(spec=Api)
+    mock_response = Mock()
+    mock_response.json.return_value = {"metadata": {"name": "testgraphname"}}
+    mock_api.call_api.return_value.__aenter__.return_value = mock_response
+    client = KubernetesClient(mock_api)
+    builder = EDAGBuilder()
+    current = builder.build_manifest(edag_resource, _NAMESPACE)
+    edag_resource.steps[0].image = "image3"
+
+    # Act
+    updated = await client.update_resource(builder, edag_resource, current)
+
+    # Assert
+    assert updated == {"metadata": {"name": "testgraphname"}}
+    method = mock_api.call_api.call_args.args[0]
+    kwargs = mock_api.call_api.call_args.kwargs
+    assert method == "PATCH"
+    assert kwargs["url"] == f"{builder.get_crd().endpoint}/testgraphname"
+    assert kwargs["headers"] == {"Content-Type": "application/json-patch+json"}
+
+
+async def test_should_patch_with_resource_version_precondition(
+    edag_resource: EDAGResource,
+) -> None:
+    # Arrange
+    mock_api = MagicMock(spec=Api)
+    client = KubernetesClient(mock_api)
+    builder = EDAGBuilder()
+    current = builder.build_manifest(edag_resource, _NAMESPACE)
+    edag_resource.steps[0].image = "image3"
+
+    # Act
+    await client.update_resource(builder, edag_resource, current, "42")
+
+    # Assert
+    patch = json.loads(mock_api.call_api.call_args.kwargs["data"])
+    assert patch[0] == {
+        "op": "replace",
+        "path": "/metadata/resourceVersion",
+        "value": "42",
+    }
+    assert patch[1]["path"] == "/spec"
+
+
+async def test_should_merge_builder_annotations_into_patch(
+    edag_request: EDAGRequest,
+) -> None:
+    # Arrange
+    mock_api = MagicMock(spec=Api)
+    client = KubernetesClient(mock_api)
+    builder = EDAGBuilder()
+    resource = builder.build_resource(edag_request)
+    current = builder.build_manifest(
+        resource.model_copy(update={"schedule": None}), _NAMESPACE
+    )
+    current.raw["metadata"]["annotations"] = {"other": "kept"}
+
+    # Act
+    await client.update_resource(builder, resource, current)
+
+    # Assert
+    patch = json.loads(mock_api.call_api.call_args.kwargs["data"])
+    annotations = patch[1]["value"]
+    assert patch[1]["path"] == "/metadata/annotations"
+    assert annotations["other"] == "kept"
+    assert EDAG_SCHEDULE_ANNOTATION in annotations
+
+
+async def test_should_delete_with_background_propagation() -> None:
+    # Arrange
+    mock_api = MagicMock(spec=Api)
+    client = KubernetesClient(mock_api)
+
+    # Act
+    await client.delete_resource(EDAGBuilder(), "testgraphname", "42")
+
+    # Assert
+    crd = EDAGBuilder.get_crd()
+    mock_api.call_api.assert_called_once_with(
+        "DELETE",
+        version=crd.version,
+        url=f"{crd.endpoint}/testgraphname",
+        namespace=_NAMESPACE,
+        data=json.dumps(
+            {
+                "propagationPolicy": "Background",
+                "preconditions": {"resourceVersion": "42"},
+            }
+        ),
+    )
+
+
+async def test_should_share_client_between_requests() -> None:
+    # Act
+    initialise_kubernetes_client(url="http://localhost:6443")
+    first_client = get_kubernetes_client()
+    second_client = get_kubernetes_client()
+    await shutdown_kubernetes_client()
+
+    # Assert
+    assert first_client is second_client
+
+
+async def test_should_configure_connection_pool() -> None:
+    # Arrange
+    initialise_kubernetes_client(url="http://localhost:6443")
+    api = await get_kubernetes_client()._get_api()
+
+    # Act
+    await api._create_session()
+    session = api._session
+
+    # Assert
+    assert session.timeout.read == settings.K8S_TIMEOUT_SECONDS
+    assert session.timeout.connect == settings.K8S_CONNECT_TIMEOUT_SECONDS
+    assert session._transport._pool._max_connections == (
+        settings.K8S_POOL_MAX_CONNECTIONS
+    )
+    await shutdown_kubernetes_client()
+
+
+async def test_should_create_session_on_first_use() -> None:
+    # Arrange
+    initialise_kubernetes_client(url="http://localhost:6443")
+    client = get_kubernetes_client()
+
+    # Act
+    first_api, second_api = await asyncio.gather(client._get_api(), client._get_api())
+
+    # Assert
+    assert first_api is second_api
+    assert first_api._session is not None
+    assert not first_api._session.is_closed
+    await shutdown_kubernetes_client()
+
+
+async def test_should_be_unavailable_without_credentials(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    # Arrange
+    monkeypatch.setenv("KUBECONFIG", str(tmp_path / "missing"))
+    monkeypatch.setenv("HOME", str(tmp_path))
+    initialise_kubernetes_client()
+
+    # Act
+    with pytest.raises(KubernetesUnavailableError):
+        await get_kubernetes_client().list_resources(EDAGBuilder())
+
+    # Assert
+    await shutdown_kubernetes_client()
+
+
+def server_error(
+    status_code: int, headers: dict[str, str] | None = None
+) -> ServerError:
+    return ServerError(
+        "error",
+        status=str(status_code),
+        response=httpx.Response(status_code, headers=headers),
+    )
+
+
+async def test_should_retry_idempotent_call_after_retry_after(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    # Arrange
+    sleep = AsyncMock()
+    monkeypatch.setattr(asyncio, "sleep", sleep)
+    mock_api = MagicMock(spec=Api)
+    mock_response = Mock()
+    mock_response.json.return_value = {"items": []}
+    mock_api.call_api.return_value.__aenter__.side_effect = [
+        server_error(429, {"Retry-After": "2"}),
+        server_error(500),
+        mock_response,
+    ]
+    client = KubernetesClient(mock_api)
+
+    # Act
+    listed = await client.list_resources(EDAGBuilder())
+
+    # Assert
+    assert listed == {"items": []}
+    assert mock_api.call_api.call_count == 3
+    assert sleep.await_args_list[0].args[0] >= 2
+
+
+async def test_should_not_retry_create_after_server_error(
+    edag_resource: EDAGResource,
+) -> None:
+    # Arrange
+    mock_api = MagicMock(spec=Api)
+    mock_api.call_api.return_value.__aenter__.side_effect = server_error(500)
+    client = KubernetesClient(mock_api)
 
     # Act
-    await client.create_resource(mock_resource_builder, edag_resource)
+    with pytest.raises(ServerError):
+        await client.create_resource(EDAGBuilder(), edag_resource)
 
     # Assert
-    assert mock_api_object.api == mock_api
-    mock_resource_builder.build_manifest.assert_called_once_with(
-        edag_resource, _NAMESPACE
+    mock_api.call_api.assert_called_once()
+
+
+async def test_should_raise_unavailable_once_retries_are_exhausted(
+    edag_resource: EDAGResource,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    # Arrange
+    monkeypatch.setattr(asyncio, "sleep", AsyncMock())
+    monkeypatch.setattr(settings, "K8S_MAX_RETRIES", 2)
+    mock_api = MagicMock(spec=Api)
+    mock_api.call_api.return_value.__aenter__.side_effect = server_error(
+        503, {"Retry-After": "3"}
     )
-    mock_api_object.create.assert_awaited_once()
+    client = KubernetesClient(mock_api)
+
+    # Act
+    with pytest.raises(KubernetesUnavailableError) as exc_info:
+        await client.create_resource(EDAGBuilder(), edag_resource)
+
+    # Assert
+    assert mock_api.call_api.call_count == 3
+    assert exc_info.value.retry_after == 3
+
+
+async def test_should_fail_fast_while_circuit_is_open(
+    edag_resource: EDAGResource,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    # Arrange
+    monkeypatch.setattr(settings, "K8S_CIRCUIT_FAILURE_THRESHOLD", 1)
+    mock_api = MagicMock(spec=Api)
+    mock_api.call_api.return_value.__aenter__.side_effect = server_error(500)
+    client = KubernetesClient(mock_api)
+    with pytest.raises(ServerError):
+        await client.create_resource(EDAGBuilder(), edag_resource)
+
+    # Act
+    with pytest.raises(KubernetesUnavailableError) as exc_info:
+        await client.get_resource(EDAGBuilder(), "testgraphname")
+
+    # Assert
+    mock_api.call_api.assert_called_once()
+    assert exc_info.value.retry_after == pytest.approx(
+        settings.K8S_CIRCUIT_RESET_SECONDS, abs=1
+    )
+
+
+async def test_should_raise_unavailable_if_call_times_out(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    # Arrange
+    monkeypatch.setattr(settings, "K8S_CALL_TIMEOUT_SECONDS", 0.01)
+
+    async def hang() -> None:
+        await asyncio.Event().wait()
+
+    mock_api = MagicMock(spec=Api)
+    mock_api.call_api.return_value.__aenter__.side_effect = hang
+    client = KubernetesClient(mock_api)
+
+    # Act
+    with pytest.raises(KubernetesUnavailableError):
+        await client.get_resource(EDAGBuilder(), "testgraphname")
+
+    # Assert
+    assert client._request_slots._value == settings.K8S_POOL_MAX_CONNECTIONS
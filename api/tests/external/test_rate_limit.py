@@ -0,0 +1,140 @@
+from typing import Any
+
+import pytest
+
+from external.rate_limit import InMemoryRateLimitBackend, RedisRateLimitBackend
+
+pytestmark = pytest.mark.asyncio
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class StandInRedis:
+    """Stands in for redis.asyncio.Redis, replying to eval in order"""
+
+    def __init__(self, *replies: Any) -> None:
+        self.replies = list(replies)
+        self.evals: list[tuple[Any, ...]] = []
+        self.closed = False
+
+    async def eval(self, script: str, numkeys: int, *keys_and_args: Any) -> Any:
+        self.evals.append((numkeys, *keys_and_args))
+        return self.replies.pop(0)
+
+    async def aclose(self) -> None:
+        self.closed = True
+
+
+async def test_should_allow_burst_then_limit() -> None:
+    # Arrange
+    backend = InMemoryRateLimitBackend(clock=FakeClock())
+
+    # Act
+    takes = [await backend.take("key", rate=2, burst=3, tokens=1) for _ in range(4)]
+
+    # Assert
+    assert takes == [(1, 0), (1, 0), (1, 0), (0, 0.5)]
+
+
+async def test_should_refill_at_rate() -> None:
+    # Arrange
+    clock = FakeClock()
+    backend = InMemoryRateLimitBackend(clock=clock)
+    await backend.take("key", rate=2, burst=3, tokens=3)
+
+    # Act
+    clock.now += 1
+    taken = await backend.take("key", rate=2, burst=3, tokens=2)
+    refused = await backend.take("key", rate=2, burst=3, tokens=1)
+
+    # Assert
+    assert taken == (2, 0)
+    assert refused == (0, 0.5)
+
+
+async def test_should_keep_buckets_separate() -> None:
+    # Arrange
+    backend = InMemoryRateLimitBackend(clock=FakeClock())
+    await backend.take("first", rate=1, burst=1, tokens=1)
+
+    # Act
+    taken = await backend.take("second", rate=1, burst=1, tokens=1)
+
+    # Assert
+    assert taken == (1, 0)
+
+
+async def test_should_take_what_is_available() -> None:
+    # Arrange
+    clock = FakeClock()
+    backend = InMemoryRateLimitBackend(clock=clock)
+    await backend.take("key", rate=2, burst=3, tokens=1)
+
+    # Act
+    taken = await backend.take("key", rate=2, burst=3, tokens=5)
+
+    # Assert
+    assert taken == (2, 0.5)
+
+
+async def test_should_give_back_up_to_burst() -> None:
+    # Arrange
+    backend = InMemoryRateLimitBackend(clock=FakeClock())
+    await backend.take("key", rate=1, burst=3, tokens=3)
+
+    # Act
+    await backend.give_back("key", rate=1, burst=3, tokens=5)
+    await backend.give_back("unused", rate=1, burst=3, tokens=1)
+    taken = await backend.take("key", rate=1, burst=3, tokens=5)
+
+    # Assert
+    assert taken == (3, 1)
+
+
+async def test_should_take_from_redis_bucket() -> None:
+    # Arrange
+    redis = StandInRedis([1, 0], [0, 1500], 0)
+    backend = RedisRateLimitBackend(redis)
+
+    # Act
+    taken = await backend.take("key", rate=2, burst=3, tokens=1)
+    refused = await backend.take("key", rate=2, burst=3, tokens=1)
+    await backend.give_back("key", rate=2, burst=3, tokens=1)
+    await backend.close()
+
+    # Assert
+    assert taken == (1, 0)
+    assert refused == (0, 1.5)
+    assert redis.evals[0] == (1, "key", 2, 3, 1)
+    assert redis.evals[2] == (1, "key", 3, 1)
+    assert redis.closed
+
+
+async def test_should_run_token_bucket_script_in_redis() -> None:
+    # Arrange
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    redis = fakeredis.FakeAsyncRedis()
+    backend = RedisRateLimitBackend(redis)
+
+    # Act
+    # Refills so slowly that the time between calls does not change the waits
+    takes = [await backend.take("key", rate=0.001, burst=3, tokens=1) for _ in range(4)]
+    await backend.give_back("key", rate=0.001, burst=3, tokens=2)
+    partial = await backend.take("key", rate=0.001, burst=3, tokens=3)
+    other = await backend.take("other", rate=0.001, burst=3, tokens=3)
+    expires_in_ms = await redis.pttl("key")
+    await backend.close()
+
+    # Assert
+    assert [taken for taken, _ in takes] == [1, 1, 1, 0]
+    assert 0 < takes[3][1] <= 1000
+    assert partial[0] == 2
+    assert other == (3, 0)
+    assert 0 < expires_in_ms <= 3000 * 1000
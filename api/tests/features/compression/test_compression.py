@@ -0,0 +1,101 @@
+import gzip
+from typing import AsyncGenerator, AsyncIterator
+
+import brotli
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+
+from features.compression.middleware import CompressionMiddleware
+
+pytestmark = pytest.mark.asyncio
+
+_LARGE_BODY = "x" * 2000
+
+
+async def _large(request: Request) -> PlainTextResponse:
+    return PlainTextResponse(_LARGE_BODY)
+
+
+async def _small(request: Request) -> PlainTextResponse:
+    return PlainTextResponse("small")
+
+
+async def _streamed(request: Request) -> StreamingResponse:
+    async def chunks() -> AsyncIterator[str]:
+        for _ in range(3):
+            yield "chunk\n"
+
+    return StreamingResponse(chunks(), media_type="text/plain")
+
+
+async def _identity(request: Request) -> PlainTextResponse:
+    return PlainTextResponse(_LARGE_BODY, headers={"Content-Encoding": "identity"})
+
+
+@pytest_asyncio.fixture
+async def client() -> AsyncGenerator[AsyncClient, None]:
+    app = Starlette(
+        routes=[
+            Route("/large", _large),
+            Route("/small", _small),
+            Route("/streamed", _streamed),
+            Route("/identity", _identity),
+        ]
+    )
+    app.add_middleware(
+        CompressionMiddleware, minimum_size=1024, gzip_level=6, brotli_quality=4
+    )
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        yield client
+
+
+async def _get(client: AsyncClient, path: str, accept_encoding: str) -> tuple:
+    async with client.stream(
+        "GET", path, headers={"Accept-Encoding": accept_encoding}
+    ) as resp:
+        return resp.headers, b"".join([chunk async for chunk in resp.aiter_raw()])
+
+
+async def test_should_prefer_brotli(client: AsyncClient) -> None:
+    headers, body = await _get(client, "/large", "gzip, deflate, br")
+
+    assert headers["content-encoding"] == "br"
+    assert headers["vary"] == "Accept-Encoding"
+    assert headers["content-length"] == str(len(body))
+    assert brotli.decompress(body).decode() == _LARGE_BODY
+
+
+async def test_should_gzip_if_brotli_refused(client: AsyncClient) -> None:
+    headers, body = await _get(client, "/large", "gzip, br;q=0")
+
+    assert headers["content-encoding"] == "gzip"
+    assert gzip.decompress(body).decode() == _LARGE_BODY
+
+
+async def test_should_not_compress_small_responses(client: AsyncClient) -> None:
+    headers, body = await _get(client, "/small", "br")
+
+    assert "content-encoding" not in headers
+    assert body == b"small"
+
+
+async def test_should_compress_streamed_responses(client: AsyncClient) -> None:
+    headers, body = await _get(client, "/streamed", "br")
+
+    assert headers["content-encoding"] == "br"
+    assert "content-length" not in headers
+    assert brotli.decompress(body).decode() == "chunk\n" * 3
+
+
+async def test_should_pass_through_encoded_responses(client: AsyncClient) -> None:
+    headers, body = await _get(client, "/identity", "br")
+
+    assert headers["content-encoding"] == "identity"
+    assert body.decode() == _LARGE_BODY
@@ -1,15 +1,48 @@
+import json
+from typing import Any, AsyncIterator, Sequence
 from unittest.mock import AsyncMock, Mock
 import pytest
 from httpx import AsyncClient
 from app import app
+from entity_builders.dag_validation import (
+    InvalidEDAGError,
+    build_schedule,
+    validate_steps,
+)
+from external.kubernetes import KubernetesUnavailableError
 from features.graph.exceptions import (
+    ContinueTokenExpiredError,
+    EDAGChangedError,
     EDAGAlreadyExistsError,
     EDAGNotFoundError,
+    EDAGRunNotFoundError,
+    RunRateLimitedError,
+    RunStatusNotReadyError,
+    TooManyStreamsError,
     UndeterminedApiError,
 )
+from features.graph.informers import get_run_status_broadcaster
+from features.graph.rate_limit import RunRateLimiter, get_run_rate_limiter
 from features.graph.services import EDAGServices
-from models.edag import EDAGRequest
-from models.edagrun import EDAGRunResponse
+from features.graph.streams import RunStatusBroadcaster
+from models.edag import (
+    EDAGBulkRequest,
+    EDAGBulkResponse,
+    EDAGListResponse,
+    EDAGRequest,
+    EDAGResponse,
+    EDAGUpsertOutcome,
+    EDAGUpsertResult,
+)
+from models.edagrun import (
+    EDAGRunBatchRequest,
+    EDAGRunBatchResponse,
+    EDAGRunBatchResult,
+    EDAGRunListResponse,
+    EDAGRunResponse,
+    EDAGRunSummary,
+)
+from models.status import GraphStatusDetails, StepStatus
 
 pytestmark = pytest.mark.asyncio
 
@@ -18,14 +51,51 @@ async def test_create_edag(
     async_client: AsyncClient, edag_request: EDAGRequest
 ) -> None:
     class MockEdagServices(EDAGServices):
-        async def create_edag(self, request: EDAGRequest) -> None:
+        async def create_edag(self, request: EDAGRequest) -> EDAGResponse:
             assert request == edag_request
+            return edag_response(edag_request)
 
     app.dependency_overrides[EDAGServices] = MockEdagServices
 
     resp = await async_client.post(f"/api/v1/edag/", json=edag_request.model_dump())
 
     assert resp.status_code == 200
+    assert resp.headers["ETag"] == '"7"'
+    assert resp.json()["schedule"]["critical_path"] == ["step1", "step2"]
+
+
+async def test_should_return_422_on_invalid_graph(
+    async_client: AsyncClient, edag_request: EDAGRequest
+) -> None:
+    errors = [
+        {
+            "loc": ["body", "steps", 1, "dependencies"],
+            "msg": "Step step2 is part of a dependency cycle",
+            "type": "dependency_cycle",
+        }
+    ]
+
+    class MockEdagServices(EDAGServices):
+        async def create_edag(self, request: EDAGRequest) -> None:
+            raise InvalidEDAGError(errors)
+
+    app.dependency_overrides[EDAGServices] = MockEdagServices
+
+    resp = await async_client.post("/api/v1/edag/", json=edag_request.model_dump())
+
+    assert resp.status_code == 422
+    assert resp.json() == {"detail": errors}
+
+
+async def test_should_return_422_on_malformed_json(async_client: AsyncClient) -> None:
+    resp = await async_client.post(
+        "/api/v1/edag/",
+        content=b'{"graphname": ',
+        headers={"Content-Type": "application/json"},
+    )
+
+    assert resp.status_code == 422
+    assert resp.json()["detail"][0]["type"] == "json_invalid"
 
 
 async def test_should_return_409_on_existing_edag(
@@ -58,9 +128,59 @@ async def test_should_return_500_on_unknown_error(
     assert "detail" in resp.json()
 
 
+async def test_upsert_edags(
+    async_client: AsyncClient, edag_request: EDAGRequest
+) -> None:
+    class MockEdagServices(EDAGServices):
+        async def upsert_edags(self, bulk_request: EDAGBulkRequest) -> EDAGBulkResponse:
+            return EDAGBulkResponse(
+                results=[
+                    EDAGUpsertResult(
+                        graphname=graph.graphname, outcome=EDAGUpsertOutcome.CREATED
+                    )
+                    for graph in bulk_request.graphs
+                ]
+            )
+
+    app.dependency_overrides[EDAGServices] = MockEdagServices
+
+    resp = await async_client.put(
+        "/api/v1/edag/", json={"graphs": [edag_request.model_dump()]}
+    )
+
+    assert resp.status_code == 200
+    assert resp.json()["results"] == [
+        {"graphname": edag_request.graphname, "outcome": "created", "error": None}
+    ]
+
+
+async def test_should_return_422_on_duplicate_graphs_in_bulk_request(
+    async_client: AsyncClient, edag_request: EDAGRequest
+) -> None:
+    resp = await async_client.put(
+        "/api/v1/edag/",
+        json={"graphs": [edag_request.model_dump(), edag_request.model_dump()]},
+    )
+
+    assert resp.status_code == 422
+
+
+async def test_should_return_422_on_reserved_graphname(
+    async_client: AsyncClient, edag_request: EDAGRequest
+) -> None:
+    body = {**edag_request.model_dump(), "graphname": "runs"}
+
+    resp = await async_client.post("/api/v1/edag/", json=body)
+
+    assert resp.status_code == 422
+    assert resp.json()["detail"][0]["loc"] == ["body", "graphname"]
+
+
 async def test_run_edag(async_client: AsyncClient, edag_run_response: EDAGRunResponse):
     class MockEdagServices(EDAGServices):
-        async def run_edag(self, edagname: str) -> EDAGRunResponse:
+        async def run_edag(
+            self, edagname: str, owner: str | None = None
+        ) -> EDAGRunResponse:
             assert edagname == edag_name
             return edag_run_response
 
@@ -73,9 +193,60 @@ async def test_run_edag(async_client: AsyncClient, edag_run_response: EDAGRunRes
     assert resp.json()["id"] == edag_run_response.id
 
 
+async def test_should_return_429_if_runs_rate_limited(
+    async_client: AsyncClient,
+) -> None:
+    class MockRunRateLimiter(RunRateLimiter):
+        async def admit(self, user_email: str, edag_names: Sequence[str]) -> None:
+            assert (user_email, list(edag_names)) == ("testuser@email.com", ["myedag"])
+            raise RunRateLimitedError(1.5)
+
+    app.dependency_overrides[get_run_rate_limiter] = lambda: MockRunRateLimiter(Mock())
+
+    resp = await async_client.post("/api/v1/edag/myedag/run")
+
+    assert resp.status_code == 429
+    assert resp.headers["Retry-After"] == "2"
+
+
+async def test_should_report_runs_not_admitted_per_run(
+    async_client: AsyncClient,
+) -> None:
+    class MockRunRateLimiter(RunRateLimiter):
+        async def admit(self, user_email: str, edag_names: Sequence[str]) -> list[bool]:
+            return [True, False]
+
+    class MockEdagServices(EDAGServices):
+        async def run_edags(
+            self,
+            batch: EDAGRunBatchRequest,
+            owner: str | None = None,
+            admitted: Sequence[bool] | None = None,
+        ) -> EDAGRunBatchResponse:
+            assert admitted == [True, False]
+            return EDAGRunBatchResponse(
+                results=[
+                    EDAGRunBatchResult(edagname="myedag", id="myedag-fdsuihgiu"),
+                    EDAGRunBatchResult(edagname="myedag", error="Too many runs started, please retry later"),
+                ]
+            )
+
+    app.dependency_overrides[get_run_rate_limiter] = lambda: MockRunRateLimiter(Mock())
+    app.dependency_overrides[EDAGServices] = MockEdagServices
+
+    resp = await async_client.post(
+        "/api/v1/edag/runs", json={"runs": [{"edagname": "myedag", "count": 2}]}
+    )
+
+    assert resp.status_code == 200
+    assert [result["id"] for result in resp.json()["results"]] == ["myedag-fdsuihgiu", None]
+
+
 async def test_should_return_404_if_edag_not_found(async_client: AsyncClient):
     class MockEdagServices(EDAGServices):
-        async def run_edag(self, edagname: str) -> EDAGRunResponse:
+        async def run_edag(
+            self, edagname: str, owner: str | None = None
+        ) -> EDAGRunResponse:
             raise EDAGNotFoundError(edagname)
 
     app.dependency_overrides[EDAGServices] = MockEdagServices
@@ -85,3 +256,414 @@ async def test_should_return_404_if_edag_not_found(async_client: AsyncClient):
 
     assert resp.status_code == 404
     assert "detail" in resp.json()
+
+
+async def test_should_return_503_if_kubernetes_unavailable(async_client: AsyncClient):
+    class MockEdagServices(EDAGServices):
+        async def get_edag(self, edag_name: str) -> EDAGResponse:
+            raise KubernetesUnavailableError(retry_after=12.5)
+
+    app.dependency_overrides[EDAGServices] = MockEdagServices
+
+    resp = await async_client.get("/api/v1/edag/myedag")
+
+    assert resp.status_code == 503
+    assert resp.headers["Retry-After"] == "13"
+
+
+async def test_run_edags(async_client: AsyncClient) -> None:
+    class MockEdagServices(EDAGServices):
+        async def run_edags(
+            self,
+            batch: EDAGRunBatchRequest,
+            owner: str | None = None,
+            admitted: Sequence[bool] | None = None,
+        ) -> EDAGRunBatchResponse:
+            assert owner == "testuser@email.com"
+            assert admitted == [True]
+            return EDAGRunBatchResponse(
+                results=[
+                    EDAGRunBatchResult(edagname=item.edagname, id="myedag-fdsuihgiu")
+                    for item in batch.runs
+                ]
+            )
+
+    app.dependency_overrides[EDAGServices] = MockEdagServices
+
+    resp = await async_client.post(
+        "/api/v1/edag/runs", json={"runs": [{"edagname": "myedag"}]}
+    )
+
+    assert resp.status_code == 200
+    assert resp.json()["results"][0]["id"] == "myedag-fdsuihgiu"
+
+
+async def test_should_return_422_if_batch_too_large(async_client: AsyncClient) -> None:
+    resp = await async_client.post(
+        "/api/v1/edag/runs", json={"runs": [{"edagname": "myedag", "count": 1001}]}
+    )
+
+    assert resp.status_code == 422
+
+
+async def test_get_run_status(async_client: AsyncClient) -> None:
+    class MockEdagServices(EDAGServices):
+        async def get_run_status(self, run_name: str) -> GraphStatusDetails:
+            return GraphStatusDetails(
+                id=run_name,
+                graphname="myedag",
+                phase="InProgress",
+                creation_time="2024-01-01T00:00:00Z",
+                steps_status=[],
+            )
+
+    app.dependency_overrides[EDAGServices] = MockEdagServices
+
+    resp = await async_client.get("/api/v1/edag/runs/myedag-abcde")
+
+    assert resp.status_code == 200
+    assert resp.json()["id"] == "myedag-abcde"
+    assert resp.json()["phase"] == "InProgress"
+
+
+async def test_should_return_404_if_run_not_found(async_client: AsyncClient) -> None:
+    class MockEdagServices(EDAGServices):
+        async def get_run_status(self, run_name: str) -> GraphStatusDetails:
+            raise EDAGRunNotFoundError(run_name)
+
+    app.dependency_overrides[EDAGServices] = MockEdagServices
+
+    resp = await async_client.get("/api/v1/edag/runs/myedag-abcde")
+
+    assert resp.status_code == 404
+
+
+async def test_should_return_503_if_run_statuses_not_synced(
+    async_client: AsyncClient,
+) -> None:
+    class MockEdagServices(EDAGServices):
+        def list_run_statuses(self, edag_name: str) -> list[GraphStatusDetails]:
+            raise RunStatusNotReadyError()
+
+    app.dependency_overrides[EDAGServices] = MockEdagServices
+
+    resp = await async_client.get("/api/v1/edag/myedag/runs")
+
+    assert resp.status_code == 503
+    assert resp.headers["Retry-After"] == "1"
+
+
+async def test_stream_run_status(async_client: AsyncClient) -> None:
+    class MockEdagServices(EDAGServices):
+        async def get_run_status(self, run_name: str) -> GraphStatusDetails:
+            return GraphStatusDetails(
+                id=run_name,
+                graphname="myedag",
+                phase="Succeeded",
+                creation_time="2024-01-01T00:00:00Z",
+                steps_status=[StepStatus(name="step1", state="Succeeded")],
+            )
+
+    app.dependency_overrides[EDAGServices] = MockEdagServices
+    app.dependency_overrides[get_run_status_broadcaster] = lambda: (
+        RunStatusBroadcaster(Mock(), Mock())
+    )
+
+    resp = await async_client.get("/api/v1/edag/runs/myedag-abcde/events")
+
+    del app.dependency_overrides[get_run_status_broadcaster]
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/event-stream")
+    assert resp.headers["content-encoding"] == "identity"
+    assert resp.text.startswith("event: step\n")
+    assert "event: complete\n" in resp.text
+
+
+async def test_should_return_429_if_too_many_streams(
+    async_client: AsyncClient,
+) -> None:
+    class MockEdagServices(EDAGServices):
+        async def get_run_status(self, run_name: str) -> GraphStatusDetails:
+            return Mock(spec=GraphStatusDetails)
+
+    mock_broadcaster = Mock(spec=RunStatusBroadcaster)
+    mock_broadcaster.subscribe.side_effect = TooManyStreamsError(10)
+    app.dependency_overrides[EDAGServices] = MockEdagServices
+    app.dependency_overrides[get_run_status_broadcaster] = lambda: mock_broadcaster
+
+    resp = await async_client.get("/api/v1/edag/runs/myedag-abcde/events")
+
+    del app.dependency_overrides[get_run_status_broadcaster]
+    assert resp.status_code == 429
+
+
+async def test_list_edags(async_client: AsyncClient) -> None:
+    class MockEdagServices(EDAGServices):
+        async def list_edags(
+            self, limit: int, continue_token: str | None, include_steps: bool
+        ) -> EDAGListResponse:
+            assert (limit, continue_token, include_steps) == (10, "token", True)
+            return EDAGListResponse(items=[], continue_token="next")
+
+    app.dependency_overrides[EDAGServices] = MockEdagServices
+
+    resp = await async_client.get(
+        "/api/v1/edag/",
+        params={"limit": 10, "continue": "token", "include_steps": True},
+    )
+
+    assert resp.status_code == 200
+    assert resp.json() == {"items": [], "continue_token": "next"}
+
+
+async def test_list_edag_runs(async_client: AsyncClient) -> None:
+    class MockEdagServices(EDAGServices):
+        async def list_edag_runs(
+            self,
+            limit: int,
+            continue_token: str | None,
+            include_steps: bool,
+            edag_name: str | None = None,
+            owner: str | None = None,
+            phase: str | None = None,
+        ) -> EDAGRunListResponse:
+            assert (limit, continue_token, include_steps) == (100, None, False)
+            assert (edag_name, owner, phase) == ("myedag", None, "Failed")
+            return EDAGRunListResponse(items=[])
+
+    app.dependency_overrides[EDAGServices] = MockEdagServices
+
+    resp = await async_client.get(
+        "/api/v1/edag/runs", params={"edagname": "myedag", "phase": "Failed"}
+    )
+
+    assert resp.status_code == 200
+    assert resp.json() == {"items": [], "continue_token": None}
+
+
+async def test_export_edag_runs(async_client: AsyncClient) -> None:
+    class MockEdagServices(EDAGServices):
+        async def export_edag_runs(
+            self,
+            include_steps: bool,
+            edag_name: str | None = None,
+            owner: str | None = None,
+            phase: str | None = None,
+        ) -> AsyncIterator[EDAGRunSummary]:
+            assert (include_steps, edag_name) == (False, "myedag")
+
+            async def summaries() -> AsyncIterator[EDAGRunSummary]:
+                for run_id in ("myedag-first", "myedag-second"):
+                    yield EDAGRunSummary(
+                        id=run_id,
+                        graphname="myedag",
+                        phase="Pending",
+                        creation_time="2024-01-01T00:00:00Z",
+                    )
+
+            return summaries()
+
+    app.dependency_overrides[EDAGServices] = MockEdagServices
+
+    resp = await async_client.get(
+        "/api/v1/edag/runs/export", params={"edagname": "myedag"}
+    )
+
+    assert resp.status_code == 200
+    assert resp.headers["content-type"] == "application/x-ndjson"
+    lines = resp.text.splitlines()
+    assert [json.loads(line)["id"] for line in lines] == [
+        "myedag-first",
+        "myedag-second",
+    ]
+
+
+async def test_should_gzip_large_responses(async_client: AsyncClient) -> None:
+    class MockEdagServices(EDAGServices):
+        async def list_edag_runs(
+            self, *args: Any, **kwargs: Any
+        ) -> EDAGRunListResponse:
+            return EDAGRunListResponse(
+                items=[
+                    EDAGRunSummary(
+                        id=f"myedag-{idx}",
+                        graphname="myedag",
+                        phase="Pending",
+                        creation_time="2024-01-01T00:00:00Z",
+                    )
+                    for idx in range(100)
+                ]
+            )
+
+    app.dependency_overrides[EDAGServices] = MockEdagServices
+
+    resp = await async_client.get(
+        "/api/v1/edag/runs", headers={"Accept-Encoding": "gzip"}
+    )
+
+    assert resp.status_code == 200
+    assert resp.headers["content-encoding"] == "gzip"
+    assert len(resp.json()["items"]) == 100
+
+
+async def test_should_return_410_if_continue_token_expired(
+    async_client: AsyncClient,
+) -> None:
+    class MockEdagServices(EDAGServices):
+        async def list_edags(
+            self, limit: int, continue_token: str | None, include_steps: bool
+        ) -> EDAGListResponse:
+            raise ContinueTokenExpiredError()
+
+    app.dependency_overrides[EDAGServices] = MockEdagServices
+
+    resp = await async_client.get("/api/v1/edag/", params={"continue": "old"})
+
+    assert resp.status_code == 410
+
+
+async def test_should_return_422_if_page_too_large(async_client: AsyncClient) -> None:
+    resp = await async_client.get("/api/v1/edag/runs", params={"limit": 501})
+
+    assert resp.status_code == 422
+
+
+def edag_response(edag_request: EDAGRequest) -> EDAGResponse:
+    return EDAGResponse(
+        graphname=edag_request.graphname,
+        creation_time="2024-01-01T00:00:00Z",
+        steps=edag_request.steps,
+        schedule=build_schedule(validate_steps(edag_request.steps)),
+        resource_version="7",
+    )
+
+
+async def test_get_edag(async_client: AsyncClient, edag_request: EDAGRequest) -> None:
+    class MockEdagServices(EDAGServices):
+        async def get_edag(self, edag_name: str) -> EDAGResponse:
+            return edag_response(edag_request)
+
+    app.dependency_overrides[EDAGServices] = MockEdagServices
+
+    resp = await async_client.get("/api/v1/edag/testgraphname")
+
+    assert resp.status_code == 200
+    assert resp.headers["ETag"] == '"7"'
+    assert resp.json()["graphname"] == edag_request.graphname
+    assert "resource_version" not in resp.json()
+
+
+async def test_should_return_304_if_etag_matches(
+    async_client: AsyncClient, edag_request: EDAGRequest
+) -> None:
+    class MockEdagServices(EDAGServices):
+        async def get_edag(self, edag_name: str) -> EDAGResponse:
+            return edag_response(edag_request)
+
+    app.dependency_overrides[EDAGServices] = MockEdagServices
+
+    resp = await async_client.get(
+        "/api/v1/edag/testgraphname", headers={"If-None-Match": 'W/"6", "7"'}
+    )
+
+    assert resp.status_code == 304
+    assert resp.content == b""
+    assert resp.headers["ETag"] == '"7"'
+
+
+async def test_update_edag(
+    async_client: AsyncClient, edag_request: EDAGRequest
+) -> None:
+    class MockEdagServices(EDAGServices):
+        async def update_edag(
+            self, edag_name: str, request: EDAGRequest, if_match: list[str] | None
+        ) -> EDAGResponse:
+            assert if_match == ["7"]
+            return edag_response(edag_request)
+
+    app.dependency_overrides[EDAGServices] = MockEdagServices
+
+    resp = await async_client.put(
+        "/api/v1/edag/testgraphname",
+        json=edag_request.model_dump(),
+        headers={"If-Match": '"7"'},
+    )
+
+    assert resp.status_code == 200
+    assert resp.headers["ETag"] == '"7"'
+
+
+async def test_should_return_412_if_edag_changed(
+    async_client: AsyncClient, edag_request: EDAGRequest
+) -> None:
+    class MockEdagServices(EDAGServices):
+        async def update_edag(
+            self, edag_name: str, request: EDAGRequest, if_match: list[str] | None
+        ) -> EDAGResponse:
+            raise EDAGChangedError(edag_name)
+
+    app.dependency_overrides[EDAGServices] = MockEdagServices
+
+    resp = await async_client.put(
+        "/api/v1/edag/testgraphname",
+        json=edag_request.model_dump(),
+        headers={"If-Match": '"6"'},
+    )
+
+    assert resp.status_code == 412
+
+
+async def test_should_pass_every_listed_etag(
+    async_client: AsyncClient, edag_request: EDAGRequest
+) -> None:
+    class MockEdagServices(EDAGServices):
+        async def update_edag(
+            self, edag_name: str, request: EDAGRequest, if_match: list[str] | None
+        ) -> EDAGResponse:
+            assert if_match == ["6", "7"]
+            return edag_response(edag_request)
+
+    app.dependency_overrides[EDAGServices] = MockEdagServices
+
+    resp = await async_client.put(
+        "/api/v1/edag/testgraphname",
+        json=edag_request.model_dump(),
+        headers={"If-Match": '"6", W/"7"'},
+    )
+
+    assert resp.status_code == 200
+
+
+@pytest.mark.parametrize("if_match", ['""', ",", " , "])
+async def test_should_return_400_if_if_match_lists_no_etags(
+    async_client: AsyncClient, if_match: str
+) -> None:
+    class MockEdagServices(EDAGServices):
+        async def delete_edag(
+            self, edag_name: str, if_match: list[str] | None
+        ) -> None:
+            raise AssertionError("should not be called")
+
+    app.dependency_overrides[EDAGServices] = MockEdagServices
+
+    resp = await async_client.delete(
+        "/api/v1/edag/testgraphname", headers={"If-Match": if_match}
+    )
+
+    assert resp.status_code == 400
+
+
+async def test_delete_edag(async_client: AsyncClient) -> None:
+    class MockEdagServices(EDAGServices):
+        async def delete_edag(
+            self, edag_name: str, if_match: list[str] | None
+        ) -> None:
+            assert if_match is None
+
+    app.dependency_overrides[EDAGServices] = MockEdagServices
+
+    resp = await async_client.delete(
+        "/api/v1/edag/testgraphname", headers={"If-Match": "*"}
+    )
+
+    assert resp.status_code == 204
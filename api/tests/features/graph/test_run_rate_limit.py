@@ -0,0 +1,97 @@
+import pytest
+
+from external.rate_limit import InMemoryRateLimitBackend
+from features.graph.exceptions import RunRateLimitedError
+from features.graph.rate_limit import RunRateLimiter
+from settings import settings
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture
+def rate_limiter(monkeypatch: pytest.MonkeyPatch) -> RunRateLimiter:
+    monkeypatch.setattr(settings, "RUN_RATE_LIMIT_PER_USER_PER_SECOND", 1)
+    monkeypatch.setattr(settings, "RUN_RATE_LIMIT_PER_USER_BURST", 3)
+    monkeypatch.setattr(settings, "RUN_RATE_LIMIT_PER_EDAG_PER_SECOND", 1)
+    monkeypatch.setattr(settings, "RUN_RATE_LIMIT_PER_EDAG_BURST", 2)
+    return RunRateLimiter(InMemoryRateLimitBackend(clock=lambda: 0))
+
+
+async def test_should_limit_runs_per_user(rate_limiter: RunRateLimiter) -> None:
+    # arrange
+    await rate_limiter.admit("testuser@email.com", ["first", "second", "third"])
+
+    # act
+    with pytest.raises(RunRateLimitedError) as exc:
+        await rate_limiter.admit("testuser@email.com", ["fourth"])
+
+    # assert
+    assert exc.value.retry_after == 1
+    await rate_limiter.admit("otheruser@email.com", ["fourth"])
+
+
+async def test_should_limit_runs_per_edag(rate_limiter: RunRateLimiter) -> None:
+    # arrange
+    await rate_limiter.admit("testuser@email.com", ["myedag", "myedag"])
+
+    # act
+    with pytest.raises(RunRateLimitedError):
+        await rate_limiter.admit("otheruser@email.com", ["myedag"])
+
+    # assert
+    await rate_limiter.admit("otheruser@email.com", ["otheredag"])
+
+
+async def test_should_charge_every_run_in_batch(rate_limiter: RunRateLimiter) -> None:
+    # arrange
+    await rate_limiter.admit("testuser@email.com", ["first", "first", "second"])
+
+    # act
+    with pytest.raises(RunRateLimitedError) as exc:
+        await rate_limiter.admit("testuser@email.com", ["third"])
+
+    # assert
+    assert exc.value.retry_after == 1
+
+
+async def test_should_admit_batch_larger_than_user_burst_in_part(
+    rate_limiter: RunRateLimiter,
+) -> None:
+    # act
+    admitted = await rate_limiter.admit("testuser@email.com", ["a", "b", "c", "d"])
+
+    # assert
+    assert admitted == [True, True, True, False]
+
+
+async def test_should_admit_batch_larger_than_edag_burst_in_part(
+    rate_limiter: RunRateLimiter,
+) -> None:
+    # act
+    admitted = await rate_limiter.admit(
+        "testuser@email.com", ["myedag", "myedag", "myedag"]
+    )
+
+    # assert
+    assert admitted == [True, True, False]
+    # The token the user bucket gave for the refused run is given back
+    assert await rate_limiter.admit("testuser@email.com", ["otheredag"]) == [True]
+
+
+async def test_should_retry_after_soonest_edag_refill(
+    rate_limiter: RunRateLimiter,
+) -> None:
+    # arrange
+    await rate_limiter.admit("otheruser@email.com", ["myedag", "myedag"])
+
+    # act
+    with pytest.raises(RunRateLimitedError) as exc:
+        await rate_limiter.admit("testuser@email.com", ["myedag"])
+
+    # assert
+    assert exc.value.retry_after == 1
+    assert await rate_limiter.admit("testuser@email.com", ["a", "b", "c"]) == [
+        True,
+        True,
+        True,
+    ]
@@ -1,38 +1,84 @@
+import asyncio
 from unittest.mock import AsyncMock, Mock
 
 import pytest
 from httpx import Response
 from kr8s import ServerError
 from kr8s.asyncio.objects import APIObject
+from prometheus_client import REGISTRY
 
 from entity_builders.edag import EDAGBuilder
-from entity_builders.edagrun import EDAGRunBuilder
-from external.kubernetes import KubernetesClient
-from features.graph.exceptions import (EDAGAlreadyExistsError,
-                                       EDAGNotFoundError, UndeterminedApiError)
+from entity_builders.edagrun import (
+    EDAGRunBuilder,
+    edag_label_value,
+    owner_label_value,
+)
+from external.informer import ResourceInformer
+from external.kubernetes import KubernetesClient, KubernetesUnavailableError
+from features.graph.exceptions import (
+    ContinueTokenExpiredError,
+    EDAGAlreadyExistsError,
+    EDAGChangedError,
+    EDAGNameMismatchError,
+    EDAGNotFoundError,
+    EDAGRunNotFoundError,
+    RunRateLimitedError,
+    RunStatusNotReadyError,
+    UndeterminedApiError,
+)
+from features.graph.informers import EDAG_NAME_INDEX
 from features.graph.services import EDAGServices
-from models.edag import EDAGRequest, EDAGResource
-from models.edagrun import EDAGRunResource
+from models.edag import (
+    EDAGBulkRequest,
+    EDAGRequest,
+    EDAGResource,
+    EDAGSchedule,
+    EDAGStepSchedule,
+    EDAGUpsertOutcome,
+)
+from models.edagrun import EDAGRunBatchItem, EDAGRunBatchRequest, EDAGRunResource
 
 pytestmark = pytest.mark.asyncio
 
 
-async def test_create_edag(edag_request: EDAGRequest, edag_resource: EDAGResource):
+def unsynced_informer() -> Mock:
+    informer = Mock(spec=ResourceInformer)
+    informer.synced = False
+    return informer
+
+
+async def test_create_edag(edag_request: EDAGRequest) -> None:
     # arrange
     mock_kubernetes_client = AsyncMock(spec=KubernetesClient)
-    mock_edag_builder = Mock(spec=EDAGBuilder)
-    mock_edag_run_builder = Mock(spec=EDAGRunBuilder)
-    svc = EDAGServices(mock_kubernetes_client, mock_edag_builder, mock_edag_run_builder)
+    svc = EDAGServices(
+        mock_kubernetes_client,
+        EDAGBuilder(),
+        Mock(spec=EDAGRunBuilder),
+        unsynced_informer(),
+        unsynced_informer(),
+    )
 
-    mock_edag_builder.build_resource.return_value = edag_resource
+    async def create_resource(builder: EDAGBuilder, resource: EDAGResource) -> dict:
+        manifest = builder.build_manifest(resource, "testnamespace").raw.to_dict()
+        manifest["metadata"]["resourceVersion"] = "1"
+        return manifest
+
+    mock_kubernetes_client.create_resource.side_effect = create_resource
 
     # act
-    await svc.create_edag(edag_request)
+    edag = await svc.create_edag(edag_request)
 
     # assert
-    mock_edag_builder.build_resource.assert_called_once_with(edag_request)
-    mock_kubernetes_client.create_resource.assert_called_once_with(
-        mock_edag_builder, edag_resource
+    mock_kubernetes_client.create_resource.assert_called_once()
+    assert edag.graphname == edag_request.graphname
+    assert edag.resource_version == "1"
+    assert edag.schedule == EDAGSchedule(
+        levels=[["step1"], ["step2"]],
+        critical_path=["step1", "step2"],
+        steps={
+            "step1": EDAGStepSchedule(depth=0, fan_in=0, fan_out=1),
+            "step2": EDAGStepSchedule(depth=1, fan_in=1, fan_out=0),
+        },
     )
 
 
@@ -43,7 +89,13 @@ async def test_should_raise_error_if_edag_already_exists(
     mock_kubernetes_client = AsyncMock(spec=KubernetesClient)
     mock_edag_builder = Mock(spec=EDAGBuilder)
     mock_edag_run_builder = Mock(spec=EDAGRunBuilder)
-    svc = EDAGServices(mock_kubernetes_client, mock_edag_builder, mock_edag_run_builder)
+    svc = EDAGServices(
+        mock_kubernetes_client,
+        mock_edag_builder,
+        mock_edag_run_builder,
+        unsynced_informer(),
+        unsynced_informer(),
+    )
 
     mock_edag_builder.build_resource.return_value = edag_resource
 
@@ -67,7 +119,13 @@ async def test_should_raise_error_if_error_is_unknown_creating_edag(
     mock_kubernetes_client = AsyncMock(spec=KubernetesClient)
     mock_edag_builder = Mock(spec=EDAGBuilder)
     mock_edag_run_builder = Mock(spec=EDAGRunBuilder)
-    svc = EDAGServices(mock_kubernetes_client, mock_edag_builder, mock_edag_run_builder)
+    svc = EDAGServices(
+        mock_kubernetes_client,
+        mock_edag_builder,
+        mock_edag_run_builder,
+        unsynced_informer(),
+        unsynced_informer(),
+    )
 
     mock_edag_builder.build_resource.return_value = edag_resource
 
@@ -81,6 +139,85 @@ async def test_should_raise_error_if_error_is_unknown_creating_edag(
         await svc.create_edag(edag_request)
 
 
+@pytest.mark.parametrize(
+    "update_result, expected_outcome",
+    [
+        ({"metadata": {"name": "testgraphname"}}, EDAGUpsertOutcome.UPDATED),
+        (None, EDAGUpsertOutcome.UNCHANGED),
+    ],
+)
+async def test_upsert_edags_should_update_existing_edag(
+    edag_request: EDAGRequest,
+    edag_resource: EDAGResource,
+    update_result: dict | None,
+    expected_outcome: EDAGUpsertOutcome,
+) -> None:
+    # arrange
+    mock_kubernetes_client = AsyncMock(spec=KubernetesClient)
+    mock_edag_builder = Mock(spec=EDAGBuilder)
+    mock_edag_run_builder = Mock(spec=EDAGRunBuilder)
+    mock_api_object = Mock(spec=APIObject)
+    svc = EDAGServices(
+        mock_kubernetes_client,
+        mock_edag_builder,
+        mock_edag_run_builder,
+        unsynced_informer(),
+        unsynced_informer(),
+    )
+
+    mock_edag_builder.build_resource.return_value = edag_resource
+    mock_kubernetes_client.create_resource.side_effect = ServerError(
+        message="Already exists", response=Response(status_code=409)
+    )
+    mock_kubernetes_client.get_resource.return_value = mock_api_object
+    mock_kubernetes_client.update_resource.return_value = update_result
+
+    # act
+    bulk_response = await svc.upsert_edags(EDAGBulkRequest(graphs=[edag_request]))
+
+    # assert
+    mock_kubernetes_client.update_resource.assert_called_once_with(
+        mock_edag_builder, edag_resource, mock_api_object
+    )
+    assert bulk_response.results[0].outcome == expected_outcome
+
+
+async def test_upsert_edags_should_report_outcome_per_graph(
+    edag_request: EDAGRequest,
+) -> None:
+    # arrange
+    mock_kubernetes_client = AsyncMock(spec=KubernetesClient)
+    mock_edag_run_builder = Mock(spec=EDAGRunBuilder)
+    svc = EDAGServices(
+        mock_kubernetes_client,
+        EDAGBuilder(),
+        mock_edag_run_builder,
+        unsynced_informer(),
+        unsynced_informer(),
+    )
+    failing_request = edag_request.model_copy(update={"graphname": "failinggraph"})
+
+    async def create_resource(builder, resource: EDAGResource) -> dict:
+        if resource.graphname == "failinggraph":
+            raise ServerError(message="Error", response=Response(status_code=500))
+        return {"metadata": {"name": resource.graphname}}
+
+    mock_kubernetes_client.create_resource.side_effect = create_resource
+
+    # act
+    bulk_response = await svc.upsert_edags(
+        EDAGBulkRequest(graphs=[edag_request, failing_request])
+    )
+
+    # assert
+    created, failed = bulk_response.results
+    assert created.graphname == edag_request.graphname
+    assert created.outcome == EDAGUpsertOutcome.CREATED
+    assert failed.graphname == "failinggraph"
+    assert failed.outcome == EDAGUpsertOutcome.FAILED
+    assert failed.error is not None
+
+
 async def test_run_edag(edag_run_resource: EDAGRunResource):
     # arrange
     mock_kubernetes_client = AsyncMock(spec=KubernetesClient)
@@ -88,7 +225,13 @@ async def test_run_edag(edag_run_resource: EDAGRunResource):
     mock_edag_run_builder = Mock(spec=EDAGRunBuilder)
     mock_api_object = Mock(spec=APIObject)
 
-    svc = EDAGServices(mock_kubernetes_client, mock_edag_builder, mock_edag_run_builder)
+    svc = EDAGServices(
+        mock_kubernetes_client,
+        mock_edag_builder,
+        mock_edag_run_builder,
+        unsynced_informer(),
+        unsynced_informer(),
+    )
     edag_name = edag_run_resource.edagname
     expected_edag_run_name = edag_name + "-fdsuihgiu"
 
@@ -111,7 +254,7 @@ async def test_run_edag(edag_run_resource: EDAGRunResource):
     assert edag_run_response.id == expected_edag_run_name
 
 
-async def test_should_retry_if_run_name_collides(
+async def test_should_raise_error_if_run_creation_conflicts(
     edag_run_resource: EDAGRunResource,
 ) -> None:
     # arrange
@@ -120,30 +263,91 @@ async def test_should_retry_if_run_name_collides(
     mock_edag_run_builder = Mock(spec=EDAGRunBuilder)
     mock_api_object = Mock(spec=APIObject)
 
-    svc = EDAGServices(mock_kubernetes_client, mock_edag_builder, mock_edag_run_builder)
+    svc = EDAGServices(
+        mock_kubernetes_client,
+        mock_edag_builder,
+        mock_edag_run_builder,
+        unsynced_informer(),
+        unsynced_informer(),
+    )
     edag_name = edag_run_resource.edagname
-    expected_edag_run_name = edag_name + "-fdsuihgiu"
 
     mock_api_object.raw = {"metadata": {"uid": edag_run_resource.edag_uid}}
     mock_kubernetes_client.get_resource.return_value = mock_api_object
-    mock_edag_run_builder.build_resource.return_value = edag_run_resource
-    mock_kubernetes_client.create_resource.side_effect = [
-        ServerError(message="Already exists", response=Response(status_code=409)),
-        {"metadata": {"name": expected_edag_run_name}},
-    ]
+    mock_kubernetes_client.create_resource.side_effect = ServerError(
+        message="Already exists", response=Response(status_code=409)
+    )
+
     # act
-    edag_run_response = await svc.run_edag(edag_name)
+    with pytest.raises(UndeterminedApiError):
+        await svc.run_edag(edag_name)
 
     # assert
-    mock_kubernetes_client.create_resource.assert_called_with(
-        mock_edag_run_builder, edag_run_resource
+    assert mock_kubernetes_client.create_resource.call_count == 1
+    assert mock_kubernetes_client.get_resource.call_count == 1
+
+
+async def test_run_edag_should_count_run_name_collisions() -> None:
+    # arrange
+    mock_kubernetes_client = AsyncMock(spec=KubernetesClient)
+    mock_api_object = Mock(spec=APIObject)
+    mock_api_object.raw = {"metadata": {"uid": "12345"}}
+    svc = EDAGServices(
+        mock_kubernetes_client,
+        Mock(spec=EDAGBuilder),
+        Mock(spec=EDAGRunBuilder),
+        unsynced_informer(),
+        unsynced_informer(),
+    )
+    mock_kubernetes_client.get_resource.return_value = mock_api_object
+    mock_kubernetes_client.create_resource.side_effect = ServerError(
+        message="Already exists", response=Response(status_code=409)
     )
-    assert mock_kubernetes_client.create_resource.call_count == 2
+    collisions = REGISTRY.get_sample_value("edag_run_name_collisions_total")
 
-    mock_kubernetes_client.get_resource.assert_called_with(mock_edag_builder, edag_name)
-    assert mock_kubernetes_client.get_resource.call_count == 2
+    # act
+    with pytest.raises(UndeterminedApiError):
+        await svc.run_edag("myedag")
 
-    assert edag_run_response.id == expected_edag_run_name
+    # assert
+    assert REGISTRY.get_sample_value("edag_run_name_collisions_total") == collisions + 1
+
+
+async def test_run_edag_burst_should_make_one_create_call_per_run(
+    edag_run_resource: EDAGRunResource,
+) -> None:
+    # arrange
+    runs = 2000
+    mock_kubernetes_client = AsyncMock(spec=KubernetesClient)
+    mock_informer = Mock(spec=ResourceInformer)
+    mock_informer.synced = True
+    mock_informer.get.return_value = {"metadata": {"uid": edag_run_resource.edag_uid}}
+    svc = EDAGServices(
+        mock_kubernetes_client,
+        EDAGBuilder(),
+        EDAGRunBuilder(),
+        mock_informer,
+        unsynced_informer(),
+    )
+    created_names: list[str] = []
+
+    async def create_resource(builder, resource: EDAGRunResource) -> dict:
+        manifest = builder.build_manifest(resource, "default").raw
+        name = f"{manifest['metadata']['generateName']}{len(created_names)}"
+        created_names.append(name)
+        return {"metadata": {"name": name}}
+
+    mock_kubernetes_client.create_resource.side_effect = create_resource
+
+    # act
+    responses = await asyncio.gather(
+        *[svc.run_edag(edag_run_resource.edagname) for _ in range(runs)]
+    )
+
+    # assert
+    assert mock_kubernetes_client.create_resource.call_count == runs
+    mock_kubernetes_client.get_resource.assert_not_called()
+    assert len({response.id for response in responses}) == runs
 
 
 async def test_should_raise_error_if_edag_not_found(
@@ -154,7 +358,13 @@ async def test_should_raise_error_if_edag_not_found(
     mock_edag_builder = Mock(spec=EDAGBuilder)
     mock_edag_run_builder = Mock(spec=EDAGRunBuilder)
 
-    svc = EDAGServices(mock_kubernetes_client, mock_edag_builder, mock_edag_run_builder)
+    svc = EDAGServices(
+        mock_kubernetes_client,
+        mock_edag_builder,
+        mock_edag_run_builder,
+        unsynced_informer(),
+        unsynced_informer(),
+    )
     edag_name = edag_run_resource.edagname
 
     mock_edag_run_builder.build_resource.return_value = edag_run_resource
@@ -178,7 +388,13 @@ async def test_should_raise_error_if_error_is_unknown_running_edag(
     mock_edag_builder = Mock(spec=EDAGBuilder)
     mock_edag_run_builder = Mock(spec=EDAGRunBuilder)
 
-    svc = EDAGServices(mock_kubernetes_client, mock_edag_builder, mock_edag_run_builder)
+    svc = EDAGServices(
+        mock_kubernetes_client,
+        mock_edag_builder,
+        mock_edag_run_builder,
+        unsynced_informer(),
+        unsynced_informer(),
+    )
     edag_name = edag_run_resource.edagname
 
     mock_edag_run_builder.build_resource.return_value = edag_run_resource
@@ -191,5 +407,755 @@ async def test_should_raise_error_if_error_is_unknown_running_edag(
         await svc.run_edag(edag_name)
 
 
-def test_get_edag_status():
-    pass
+async def test_run_edag_should_use_informer_cache(
+    edag_run_resource: EDAGRunResource,
+) -> None:
+    # arrange
+    mock_kubernetes_client = AsyncMock(spec=KubernetesClient)
+    mock_edag_builder = Mock(spec=EDAGBuilder)
+    mock_edag_run_builder = Mock(spec=EDAGRunBuilder)
+    mock_informer = Mock(spec=ResourceInformer)
+    mock_informer.synced = True
+    mock_informer.get.return_value = {"metadata": {"uid": edag_run_resource.edag_uid}}
+
+    svc = EDAGServices(
+        mock_kubernetes_client,
+        mock_edag_builder,
+        mock_edag_run_builder,
+        mock_informer,
+        unsynced_informer(),
+    )
+    edag_name = edag_run_resource.edagname
+    mock_kubernetes_client.create_resource.return_value = {
+        "metadata": {"name": edag_name + "-fdsuihgiu"}
+    }
+
+    # act
+    await svc.run_edag(edag_name)
+
+    # assert
+    mock_informer.get.assert_called_once_with(edag_name)
+    mock_kubernetes_client.get_resource.assert_not_called()
+    mock_kubernetes_client.create_resource.assert_called_once_with(
+        mock_edag_run_builder, edag_run_resource
+    )
+
+
+async def test_run_edag_should_fall_back_to_api_on_cache_miss(
+    edag_run_resource: EDAGRunResource,
+) -> None:
+    # arrange
+    mock_kubernetes_client = AsyncMock(spec=KubernetesClient)
+    mock_edag_builder = Mock(spec=EDAGBuilder)
+    mock_edag_run_builder = Mock(spec=EDAGRunBuilder)
+    mock_api_object = Mock(spec=APIObject)
+    mock_informer = Mock(spec=ResourceInformer)
+    mock_informer.synced = True
+    mock_informer.get.return_value = None
+
+    svc = EDAGServices(
+        mock_kubernetes_client,
+        mock_edag_builder,
+        mock_edag_run_builder,
+        mock_informer,
+        unsynced_informer(),
+    )
+    edag_name = edag_run_resource.edagname
+    mock_api_object.raw = {"metadata": {"uid": edag_run_resource.edag_uid}}
+    mock_kubernetes_client.get_resource.return_value = mock_api_object
+    mock_kubernetes_client.create_resource.return_value = {
+        "metadata": {"name": edag_name + "-fdsuihgiu"}
+    }
+
+    # act
+    await svc.run_edag(edag_name)
+
+    # assert
+    mock_kubernetes_client.get_resource.assert_called_once_with(
+        mock_edag_builder, edag_name
+    )
+
+
+async def test_run_edags_should_resolve_each_edag_once() -> None:
+    # arrange
+    mock_kubernetes_client = AsyncMock(spec=KubernetesClient)
+    mock_edag_builder = Mock(spec=EDAGBuilder)
+    mock_edag_run_builder = Mock(spec=EDAGRunBuilder)
+    mock_api_object = Mock(spec=APIObject)
+
+    svc = EDAGServices(
+        mock_kubernetes_client,
+        mock_edag_builder,
+        mock_edag_run_builder,
+        unsynced_informer(),
+        unsynced_informer(),
+    )
+    mock_api_object.raw = {"metadata": {"uid": "12345"}}
+    mock_kubernetes_client.get_resource.return_value = mock_api_object
+    mock_kubernetes_client.create_resource.return_value = {
+        "metadata": {"name": "myedag-fdsuihgiu"}
+    }
+    batch = EDAGRunBatchRequest(
+        runs=[
+            EDAGRunBatchItem(edagname="myedag", count=3),
+            EDAGRunBatchItem(edagname="myedag"),
+        ]
+    )
+
+    # act
+    batch_response = await svc.run_edags(batch)
+
+    # assert
+    mock_kubernetes_client.get_resource.assert_called_once_with(
+        mock_edag_builder, "myedag"
+    )
+    assert mock_kubernetes_client.create_resource.call_count == 4
+    assert [result.id for result in batch_response.results] == ["myedag-fdsuihgiu"] * 4
+
+
+async def test_run_edags_should_not_start_runs_not_admitted() -> None:
+    # arrange
+    mock_kubernetes_client = AsyncMock(spec=KubernetesClient)
+    mock_edag_builder = Mock(spec=EDAGBuilder)
+    mock_edag_run_builder = Mock(spec=EDAGRunBuilder)
+    mock_api_object = Mock(spec=APIObject)
+
+    svc = EDAGServices(
+        mock_kubernetes_client,
+        mock_edag_builder,
+        mock_edag_run_builder,
+        unsynced_informer(),
+        unsynced_informer(),
+    )
+    mock_api_object.raw = {"metadata": {"uid": "12345"}}
+    mock_kubernetes_client.get_resource.return_value = mock_api_object
+    mock_kubernetes_client.create_resource.return_value = {
+        "metadata": {"name": "myedag-fdsuihgiu"}
+    }
+    batch = EDAGRunBatchRequest(
+        runs=[
+            EDAGRunBatchItem(edagname="myedag", count=2),
+            EDAGRunBatchItem(edagname="otheredag"),
+        ]
+    )
+
+    # act
+    batch_response = await svc.run_edags(batch, admitted=[True, False, False])
+
+    # assert
+    mock_kubernetes_client.get_resource.assert_called_once_with(
+        mock_edag_builder, "myedag"
+    )
+    assert mock_kubernetes_client.create_resource.call_count == 1
+    assert [result.id for result in batch_response.results] == [
+        "myedag-fdsuihgiu",
+        None,
+        None,
+    ]
+    assert batch_response.results[2].error == str(RunRateLimitedError(0))
+
+
+async def test_run_edags_should_report_failures_per_run() -> None:
+    # arrange
+    mock_kubernetes_client = AsyncMock(spec=KubernetesClient)
+    mock_edag_builder = Mock(spec=EDAGBuilder)
+    mock_edag_run_builder = Mock(spec=EDAGRunBuilder)
+    mock_api_object = Mock(spec=APIObject)
+    mock_api_object.raw = {"metadata": {"uid": "12345"}}
+
+    async def get_resource(builder, edag_name: str) -> Mock:
+        if edag_name == "missing":
+            raise ServerError(message="Not found", response=Response(status_code=404))
+        return mock_api_object
+
+    svc = EDAGServices(
+        mock_kubernetes_client,
+        mock_edag_builder,
+        mock_edag_run_builder,
+        unsynced_informer(),
+        unsynced_informer(),
+    )
+    mock_kubernetes_client.get_resource.side_effect = get_resource
+    mock_kubernetes_client.create_resource.return_value = {
+        "metadata": {"name": "myedag-fdsuihgiu"}
+    }
+    batch = EDAGRunBatchRequest(
+        runs=[
+            EDAGRunBatchItem(edagname="myedag"),
+            EDAGRunBatchItem(edagname="missing"),
+        ]
+    )
+
+    # act
+    batch_response = await svc.run_edags(batch)
+
+    # assert
+    succeeded, failed = batch_response.results
+    assert succeeded.id == "myedag-fdsuihgiu"
+    assert succeeded.error is None
+    assert failed.id is None
+    assert failed.edagname == "missing"
+    assert failed.error is not None
+    assert mock_kubernetes_client.get_resource.call_count == 2
+
+
+async def test_run_edags_should_report_kubernetes_unavailable_per_run() -> None:
+    # arrange
+    mock_kubernetes_client = AsyncMock(spec=KubernetesClient)
+    mock_api_object = Mock(spec=APIObject)
+    mock_api_object.raw = {"metadata": {"uid": "12345"}}
+    svc = EDAGServices(
+        mock_kubernetes_client,
+        Mock(spec=EDAGBuilder),
+        Mock(spec=EDAGRunBuilder),
+        unsynced_informer(),
+        unsynced_informer(),
+    )
+    mock_kubernetes_client.get_resource.return_value = mock_api_object
+    mock_kubernetes_client.create_resource.side_effect = [
+        {"metadata": {"name": "myedag-fdsuihgiu"}},
+        KubernetesUnavailableError(),
+    ]
+    batch = EDAGRunBatchRequest(runs=[EDAGRunBatchItem(edagname="myedag", count=2)])
+
+    # act
+    batch_response = await svc.run_edags(batch)
+
+    # assert
+    assert [result.id for result in batch_response.results] == [
+        "myedag-fdsuihgiu",
+        None,
+    ]
+    assert batch_response.results[1].error == str(KubernetesUnavailableError())
+
+
+def synced_informer(*items: dict) -> Mock:
+    informer = Mock(spec=ResourceInformer)
+    informer.synced = True
+    items_by_name = {item["metadata"]["name"]: item for item in items}
+    informer.get.side_effect = items_by_name.get
+    informer.list_by_index.return_value = list(items)
+    return informer
+
+
+def edag_run(name: str, creation_time: str) -> dict:
+    return {
+        "metadata": {"name": name, "creationTimestamp": creation_time},
+        "spec": {"edagname": "myedag"},
+        "status": {"jobs": {"step1": f"{name}-step1"}},
+    }
+
+
+async def test_get_run_status_should_use_informer_cache() -> None:
+    # arrange
+    mock_kubernetes_client = AsyncMock(spec=KubernetesClient)
+    svc = EDAGServices(
+        mock_kubernetes_client,
+        Mock(spec=EDAGBuilder),
+        Mock(spec=EDAGRunBuilder),
+        synced_informer({"metadata": {"name": "myedag"}, "spec": {"steps": {}}}),
+        synced_informer(edag_run("myedag-abcde", "2024-01-01T00:00:00Z")),
+    )
+
+    # act
+    status = await svc.get_run_status("myedag-abcde")
+
+    # assert
+    mock_kubernetes_client.get_resource.assert_not_called()
+    assert status.id == "myedag-abcde"
+    assert status.steps_status[0].name == "step1"
+
+
+async def test_get_run_status_should_raise_error_if_run_not_found() -> None:
+    # arrange
+    mock_kubernetes_client = AsyncMock(spec=KubernetesClient)
+    svc = EDAGServices(
+        mock_kubernetes_client,
+        Mock(spec=EDAGBuilder),
+        Mock(spec=EDAGRunBuilder),
+        unsynced_informer(),
+        synced_informer(),
+    )
+    mock_kubernetes_client.get_resource.side_effect = ServerError(
+        message="Not found", response=Response(status_code=404)
+    )
+
+    # act
+    with pytest.raises(EDAGRunNotFoundError) as exc:
+        await svc.get_run_status("myedag-abcde")
+
+    # assert
+    assert exc.value.run_name == "myedag-abcde"
+
+
+async def test_list_run_statuses_should_return_runs_oldest_first() -> None:
+    # arrange
+    mock_edag_run_informer = synced_informer(
+        edag_run("myedag-newer", "2024-01-02T00:00:00Z"),
+        edag_run("myedag-older", "2024-01-01T00:00:00Z"),
+    )
+    svc = EDAGServices(
+        AsyncMock(spec=KubernetesClient),
+        Mock(spec=EDAGBuilder),
+        Mock(spec=EDAGRunBuilder),
+        unsynced_informer(),
+        mock_edag_run_informer,
+    )
+
+    # act
+    statuses = svc.list_run_statuses("myedag")
+
+    # assert
+    mock_edag_run_informer.list_by_index.assert_called_once_with(
+        EDAG_NAME_INDEX, "myedag"
+    )
+    assert [status.id for status in statuses] == ["myedag-older", "myedag-newer"]
+
+
+async def test_list_run_statuses_should_raise_error_if_not_synced() -> None:
+    # arrange
+    svc = EDAGServices(
+        AsyncMock(spec=KubernetesClient),
+        Mock(spec=EDAGBuilder),
+        Mock(spec=EDAGRunBuilder),
+        unsynced_informer(),
+        unsynced_informer(),
+    )
+
+    # act
+    with pytest.raises(RunStatusNotReadyError):
+        svc.list_run_statuses("myedag")
+
+
+async def test_list_edags_should_request_one_page(
+    edag_manifest: dict,
+) -> None:
+    # arrange
+    mock_kubernetes_client = AsyncMock(spec=KubernetesClient)
+    svc = EDAGServices(
+        mock_kubernetes_client,
+        EDAGBuilder(),
+        Mock(spec=EDAGRunBuilder),
+        unsynced_informer(),
+        unsynced_informer(),
+    )
+    mock_kubernetes_client.list_resources.return_value = {
+        "metadata": {"continue": "next"},
+        "items": [edag_manifest],
+    }
+
+    # act
+    edag_list = await svc.list_edags(10, "token", include_steps=False)
+
+    # assert
+    mock_kubernetes_client.list_resources.assert_called_once_with(
+        svc._edag_builder, {"limit": 10, "continue": "token"}
+    )
+    assert edag_list.continue_token == "next"
+    assert edag_list.items[0].graphname == "testgraphname"
+    assert edag_list.items[0].step_count == 2
+    assert edag_list.items[0].steps is None
+
+
+async def test_list_edag_runs_should_filter_by_labels_and_phase() -> None:
+    # arrange
+    mock_kubernetes_client = AsyncMock(spec=KubernetesClient)
+    mock_edag_run_builder = Mock(spec=EDAGRunBuilder)
+    svc = EDAGServices(
+        mock_kubernetes_client,
+        Mock(spec=EDAGBuilder),
+        mock_edag_run_builder,
+        unsynced_informer(),
+        unsynced_informer(),
+    )
+    failed_run = edag_run("myedag-failed", "2024-01-01T00:00:00Z")
+    failed_run["status"]["conditions"] = [{"type": "Failed"}]
+    mock_kubernetes_client.list_resources.return_value = {
+        "metadata": {},
+        "items": [failed_run, edag_run("myedag-pending", "2024-01-01T00:00:00Z")],
+    }
+
+    # act
+    edag_run_list = await svc.list_edag_runs(
+        100,
+        None,
+        include_steps=True,
+        edag_name="myedag",
+        owner="testuser@email.com",
+        phase="Failed",
+    )
+
+    # assert
+    params = mock_kubernetes_client.list_resources.call_args.args[1]
+    assert params["labelSelector"] == (
+        "kickplate.com/edag=myedag,"
+        f"kickplate.com/owner={owner_label_value('testuser@email.com')}"
+    )
+    assert "continue" not in params
+    assert [run.id for run in edag_run_list.items] == ["myedag-failed"]
+    assert edag_run_list.items[0].steps_status is not None
+    assert edag_run_list.continue_token is None
+
+
+async def test_list_edag_runs_should_select_long_edag_names_by_label_value() -> None:
+    # arrange
+    mock_kubernetes_client = AsyncMock(spec=KubernetesClient)
+    svc = EDAGServices(
+        mock_kubernetes_client,
+        Mock(spec=EDAGBuilder),
+        Mock(spec=EDAGRunBuilder),
+        unsynced_informer(),
+        unsynced_informer(),
+    )
+    mock_kubernetes_client.list_resources.return_value = {"metadata": {}, "items": []}
+    edag_name = "a" * 253
+
+    # act
+    await svc.list_edag_runs(100, None, include_steps=False, edag_name=edag_name)
+
+    # assert
+    params = mock_kubernetes_client.list_resources.call_args.args[1]
+    assert params["labelSelector"] == (
+        f"kickplate.com/edag={edag_label_value(edag_name)}"
+    )
+
+
+async def test_export_edag_runs_should_page_through_all_runs() -> None:
+    # arrange
+    mock_kubernetes_client = AsyncMock(spec=KubernetesClient)
+    svc = EDAGServices(
+        mock_kubernetes_client,
+        Mock(spec=EDAGBuilder),
+        Mock(spec=EDAGRunBuilder),
+        unsynced_informer(),
+        unsynced_informer(),
+    )
+    mock_kubernetes_client.list_resources.side_effect = [
+        {
+            "metadata": {"continue": "next"},
+            "items": [edag_run("myedag-first", "2024-01-01T00:00:00Z")],
+        },
+        {
+            "metadata": {},
+            "items": [edag_run("myedag-second", "2024-01-01T00:00:00Z")],
+        },
+    ]
+
+    # act
+    summaries = await svc.export_edag_runs(include_steps=False)
+    run_ids = [summary.id async for summary in summaries]
+
+    # assert
+    assert run_ids == ["myedag-first", "myedag-second"]
+    second_params = mock_kubernetes_client.list_resources.call_args_list[1].args[1]
+    assert second_params["continue"] == "next"
+
+
+async def test_list_should_raise_error_if_continue_token_expired() -> None:
+    # arrange
+    mock_kubernetes_client = AsyncMock(spec=KubernetesClient)
+    svc = EDAGServices(
+        mock_kubernetes_client,
+        EDAGBuilder(),
+        Mock(spec=EDAGRunBuilder),
+        unsynced_informer(),
+        unsynced_informer(),
+    )
+    mock_kubernetes_client.list_resources.side_effect = ServerError(
+        message="Expired", response=Response(status_code=410)
+    )
+
+    # act
+    with pytest.raises(ContinueTokenExpiredError):
+        await svc.list_edags(10, "old", include_steps=False)
+
+
+def edag_manifest_with_version(edag_manifest: dict, resource_version: str) -> dict:
+    edag_manifest["metadata"]["resourceVersion"] = resource_version
+    return edag_manifest
+
+
+async def test_get_edag_should_use_informer_cache(edag_manifest: dict) -> None:
+    # arrange
+    mock_kubernetes_client = AsyncMock(spec=KubernetesClient)
+    svc = EDAGServices(
+        mock_kubernetes_client,
+        EDAGBuilder(),
+        Mock(spec=EDAGRunBuilder),
+        synced_informer(edag_manifest_with_version(edag_manifest, "7")),
+        unsynced_informer(),
+    )
+
+    # act
+    edag = await svc.get_edag("testgraphname")
+
+    # assert
+    mock_kubernetes_client.get_resource.assert_not_called()
+    assert edag.graphname == "testgraphname"
+    assert edag.resource_version == "7"
+    assert [step.stepname for step in edag.steps] == ["step1", "step2"]
+
+
+async def test_update_edag_should_raise_error_if_version_changed(
+    edag_request: EDAGRequest, edag_manifest: dict
+) -> None:
+    # arrange
+    mock_kubernetes_client = AsyncMock(spec=KubernetesClient)
+    mock_api_object = Mock(spec=APIObject)
+    mock_api_object.raw = edag_manifest_with_version(edag_manifest, "8")
+    mock_kubernetes_client.get_resource.return_value = mock_api_object
+    svc = EDAGServices(
+        mock_kubernetes_client,
+        EDAGBuilder(),
+        Mock(spec=EDAGRunBuilder),
+        unsynced_informer(),
+        unsynced_informer(),
+    )
+
+    # act
+    with pytest.raises(EDAGChangedError):
+        await svc.update_edag("testgraphname", edag_request, if_match=["7"])
+
+    # assert
+    mock_kubernetes_client.update_resource.assert_not_called()
+
+
+async def test_update_edag_should_raise_error_on_conflicting_write(
+    edag_request: EDAGRequest, edag_manifest: dict
+) -> None:
+    # arrange
+    mock_kubernetes_client = AsyncMock(spec=KubernetesClient)
+    mock_api_object = Mock(spec=APIObject)
+    mock_api_object.raw = edag_manifest_with_version(edag_manifest, "7")
+    mock_kubernetes_client.get_resource.return_value = mock_api_object
+    mock_kubernetes_client.update_resource.side_effect = ServerError(
+        message="Conflict", response=Response(status_code=409)
+    )
+    svc = EDAGServices(
+        mock_kubernetes_client,
+        EDAGBuilder(),
+        Mock(spec=EDAGRunBuilder),
+        unsynced_informer(),
+        unsynced_informer(),
+    )
+
+    # act
+    with pytest.raises(EDAGChangedError):
+        await svc.update_edag("testgraphname", edag_request, if_match=["7"])
+
+    # assert
+    assert mock_kubernetes_client.update_resource.call_args.kwargs == {
+        "resource_version": "7"
+    }
+
+
+async def test_update_edag_should_accept_any_listed_version(
+    edag_request: EDAGRequest, edag_manifest: dict
+) -> None:
+    # arrange
+    mock_kubernetes_client = AsyncMock(spec=KubernetesClient)
+    mock_api_object = Mock(spec=APIObject)
+    mock_api_object.raw = edag_manifest_with_version(edag_manifest, "7")
+    mock_kubernetes_client.get_resource.return_value = mock_api_object
+    mock_kubernetes_client.update_resource.return_value = mock_api_object.raw
+    svc = EDAGServices(
+        mock_kubernetes_client,
+        EDAGBuilder(),
+        Mock(spec=EDAGRunBuilder),
+        unsynced_informer(),
+        unsynced_informer(),
+    )
+
+    # act
+    await svc.update_edag("testgraphname", edag_request, if_match=["6", "7"])
+
+    # assert
+    assert mock_kubernetes_client.update_resource.call_args.kwargs == {
+        "resource_version": "7"
+    }
+
+
+async def test_update_edag_should_raise_error_if_names_differ(
+    edag_request: EDAGRequest,
+) -> None:
+    # arrange
+    svc = EDAGServices(
+        AsyncMock(spec=KubernetesClient),
+        EDAGBuilder(),
+        Mock(spec=EDAGRunBuilder),
+        unsynced_informer(),
+        unsynced_informer(),
+    )
+
+    # act
+    with pytest.raises(EDAGNameMismatchError):
+        await svc.update_edag("othergraph", edag_request, if_match=None)
+
+
+async def test_delete_edag_should_raise_error_if_edag_not_found() -> None:
+    # arrange
+    mock_kubernetes_client = AsyncMock(spec=KubernetesClient)
+    mock_kubernetes_client.delete_resource.side_effect = ServerError(
+        message="Not found", response=Response(status_code=404)
+    )
+    svc = EDAGServices(
+        mock_kubernetes_client,
+        EDAGBuilder(),
+        Mock(spec=EDAGRunBuilder),
+        unsynced_informer(),
+        unsynced_informer(),
+    )
+
+    # act
+    with pytest.raises(EDAGNotFoundError):
+        await svc.delete_edag("testgraphname", if_match=None)
+
+
+def stored_edag(edag_request: EDAGRequest, resource_version: str) -> dict:
+    builder = EDAGBuilder()
+    resource = builder.build_resource(edag_request)
+    edag = builder.build_manifest(resource, "testnamespace").raw.to_dict()
+    edag["metadata"]["resourceVersion"] = resource_version
+    return edag
+
+
+async def test_create_edag_should_skip_write_if_cached_edag_unchanged(
+    edag_request: EDAGRequest,
+) -> None:
+    # arrange
+    mock_kubernetes_client = AsyncMock(spec=KubernetesClient)
+    svc = EDAGServices(
+        mock_kubernetes_client,
+        EDAGBuilder(),
+        Mock(spec=EDAGRunBuilder),
+        synced_informer(stored_edag(edag_request, "7")),
+        unsynced_informer(),
+    )
+
+    # act
+    edag = await svc.create_edag(edag_request)
+
+    # assert
+    mock_kubernetes_client.create_resource.assert_not_called()
+    assert edag.resource_version == "7"
+
+
+async def test_create_edag_should_return_existing_identical_edag(
+    edag_request: EDAGRequest,
+) -> None:
+    # arrange
+    mock_kubernetes_client = AsyncMock(spec=KubernetesClient)
+    mock_api_object = Mock(spec=APIObject)
+    # Steps in a different order hash the same
+    mock_api_object.raw = stored_edag(
+        edag_request.model_copy(update={"steps": edag_request.steps[::-1]}), "7"
+    )
+    mock_kubernetes_client.create_resource.side_effect = ServerError(
+        message="Already exists", response=Response(status_code=409)
+    )
+    mock_kubernetes_client.get_resource.return_value = mock_api_object
+    svc = EDAGServices(
+        mock_kubernetes_client,
+        EDAGBuilder(),
+        Mock(spec=EDAGRunBuilder),
+        unsynced_informer(),
+        unsynced_informer(),
+    )
+
+    # act
+    edag = await svc.create_edag(edag_request)
+
+    # assert
+    assert edag.resource_version == "7"
+
+
+async def test_update_edag_should_skip_write_if_cached_edag_unchanged(
+    edag_request: EDAGRequest,
+) -> None:
+    # arrange
+    mock_kubernetes_client = AsyncMock(spec=KubernetesClient)
+    svc = EDAGServices(
+        mock_kubernetes_client,
+        EDAGBuilder(),
+        Mock(spec=EDAGRunBuilder),
+        synced_informer(stored_edag(edag_request, "7")),
+        unsynced_informer(),
+    )
+
+    # act
+    edag = await svc.update_edag("testgraphname", edag_request, if_match=["7"])
+
+    # assert
+    mock_kubernetes_client.get_resource.assert_not_called()
+    mock_kubernetes_client.update_resource.assert_not_called()
+    assert edag.resource_version == "7"
+
+
+async def test_upsert_edags_should_not_call_api_for_unchanged_edags(
+    edag_request: EDAGRequest,
+) -> None:
+    # arrange
+    mock_kubernetes_client = AsyncMock(spec=KubernetesClient)
+    svc = EDAGServices(
+        mock_kubernetes_client,
+        EDAGBuilder(),
+        Mock(spec=EDAGRunBuilder),
+        synced_informer(stored_edag(edag_request, "7")),
+        unsynced_informer(),
+    )
+
+    # act
+    bulk_response = await svc.upsert_edags(EDAGBulkRequest(graphs=[edag_request]))
+
+    # assert
+    assert bulk_response.results[0].outcome == EDAGUpsertOutcome.UNCHANGED
+    assert not mock_kubernetes_client.mock_calls
+
+
+async def test_delete_edag_should_delete_at_matching_listed_version(
+    edag_manifest: dict,
+) -> None:
+    # arrange
+    mock_kubernetes_client = AsyncMock(spec=KubernetesClient)
+    mock_api_object = Mock(spec=APIObject)
+    mock_api_object.raw = edag_manifest_with_version(edag_manifest, "7")
+    mock_kubernetes_client.get_resource.return_value = mock_api_object
+    svc = EDAGServices(
+        mock_kubernetes_client,
+        EDAGBuilder(),
+        Mock(spec=EDAGRunBuilder),
+        unsynced_informer(),
+        unsynced_informer(),
+    )
+
+    # act
+    await svc.delete_edag("testgraphname", if_match=["6", "7"])
+
+    # assert
+    assert mock_kubernetes_client.delete_resource.call_args.kwargs == {
+        "resource_version": "7"
+    }
+
+
+async def test_delete_edag_should_raise_error_if_no_listed_version_matches(
+    edag_manifest: dict,
+) -> None:
+    # arrange
+    mock_kubernetes_client = AsyncMock(spec=KubernetesClient)
+    mock_api_object = Mock(spec=APIObject)
+    mock_api_object.raw = edag_manifest_with_version(edag_manifest, "8")
+    mock_kubernetes_client.get_resource.return_value = mock_api_object
+    svc = EDAGServices(
+        mock_kubernetes_client,
+        EDAGBuilder(),
+        Mock(spec=EDAGRunBuilder),
+        unsynced_informer(),
+        unsynced_informer(),
+    )
+
+    # act
+    with pytest.raises(EDAGChangedError):
+        await svc.delete_edag("testgraphname", if_match=["6", "7"])
+
+    # assert
+    mock_kubernetes_client.delete_resource.assert_not_called()
@@ -0,0 +1,80 @@
+from typing import Any
+
+from features.graph.status import build_graph_status
+
+
+def _edag_run(status: dict[str, Any] | None = None) -> dict[str, Any]:
+    return {
+        "metadata": {
+            "name": "myedag-abcde",
+            "creationTimestamp": "2024-01-01T00:00:00Z",
+        },
+        "spec": {"edagname": "myedag"},
+        "status": status,
+    }
+
+
+def _condition(condition_type: str, transition_time: str) -> dict[str, Any]:
+    return {
+        "type": condition_type,
+        "status": "True",
+        "reason": "JobStart",
+        "message": "",
+        "lastTransitionTime": transition_time,
+    }
+
+
+def test_should_be_pending_without_status() -> None:
+    # act
+    status = build_graph_status(_edag_run())
+
+    # assert
+    assert status.id == "myedag-abcde"
+    assert status.graphname == "myedag"
+    assert status.phase == "Pending"
+    assert status.creation_time == "2024-01-01T00:00:00Z"
+    assert status.completed_time is None
+    assert status.steps_status == []
+
+
+def test_should_report_started_and_pending_steps() -> None:
+    # arrange
+    edag_run = _edag_run(
+        {
+            "conditions": [_condition("InProgress", "2024-01-01T00:01:00Z")],
+            "jobs": {"step1": "myedag-abcde-step1"},
+        }
+    )
+    edag = {"spec": {"steps": {"step1": {}, "step2": {}}}}
+
+    # act
+    status = build_graph_status(edag_run, edag)
+
+    # assert
+    assert status.phase == "InProgress"
+    assert status.completed_time is None
+    assert [(step.name, step.state) for step in status.steps_status] == [
+        ("step1", "Started"),
+        ("step2", "Pending"),
+    ]
+
+
+def test_should_use_latest_condition_for_completion() -> None:
+    # arrange
+    edag_run = _edag_run(
+        {
+            "conditions": [
+                _condition("InProgress", "2024-01-01T00:01:00Z"),
+                _condition("Succeeded", "2024-01-01T00:02:00Z"),
+            ],
+            "jobs": {"step1": "myedag-abcde-step1"},
+        }
+    )
+
+    # act
+    status = build_graph_status(edag_run)
+
+    # assert
+    assert status.phase == "Succeeded"
+    assert status.completed_time == "2024-01-01T00:02:00Z"
+    assert status.steps_status[0].state == "Succeeded"
@@ -0,0 +1,153 @@
+import asyncio
+from unittest.mock import Mock
+
+import pytest
+
+from external.informer import ResourceInformer
+from features.graph.exceptions import TooManyStreamsError
+from features.graph.streams import RunStatusBroadcaster, RunStatusStreamResponse
+from models.status import GraphStatusDetails, StepStatus
+from settings import settings
+
+pytestmark = pytest.mark.asyncio
+
+
+def run_status(phase: str, **steps: str) -> GraphStatusDetails:
+    return GraphStatusDetails(
+        id="myedag-abcde",
+        graphname="myedag",
+        phase=phase,
+        creation_time="2024-01-01T00:00:00Z",
+        steps_status=[
+            StepStatus(name=name, state=state) for name, state in steps.items()
+        ],
+    )
+
+
+def edag_run(phase: str, jobs: dict[str, str]) -> dict:
+    return {
+        "metadata": {"name": "myedag-abcde"},
+        "spec": {"edagname": "myedag"},
+        "status": {
+            "conditions": [
+                {"type": phase, "lastTransitionTime": "2024-01-01T00:01:00Z"}
+            ],
+            "jobs": jobs,
+        },
+    }
+
+
+def broadcaster() -> tuple[RunStatusBroadcaster, Mock]:
+    edag_run_informer = Mock(spec=ResourceInformer)
+    edag_informer = Mock(spec=ResourceInformer)
+    edag_informer.synced = False
+    run_status_broadcaster = RunStatusBroadcaster(edag_run_informer, edag_informer)
+    run_status_broadcaster.start()
+    listener = edag_run_informer.add_listener.call_args.args[0]
+    return run_status_broadcaster, listener
+
+
+async def collect(stream, count: int) -> list[str]:
+    events = []
+    async for event in stream:
+        events.append(event)
+        if len(events) == count:
+            break
+    return events
+
+
+async def test_should_fan_out_step_transitions() -> None:
+    # arrange
+    run_status_broadcaster, listener = broadcaster()
+    status = run_status("InProgress", step1="Pending")
+    first = run_status_broadcaster.subscribe("myedag-abcde", "a@example.com", status)
+    second = run_status_broadcaster.subscribe("myedag-abcde", "b@example.com", status)
+
+    # act
+    listener("MODIFIED", edag_run("InProgress", {"step1": "job1"}))
+    first_events = await collect(run_status_broadcaster.stream(first), 1)
+    second_events = await collect(run_status_broadcaster.stream(second), 1)
+
+    # assert
+    assert first_events == second_events
+    assert first_events[0].startswith("event: step\n")
+    assert '"state":"Started"' in first_events[0]
+
+
+async def test_should_coalesce_updates_for_slow_clients() -> None:
+    # arrange
+    run_status_broadcaster, listener = broadcaster()
+    subscription = run_status_broadcaster.subscribe(
+        "myedag-abcde", "a@example.com", run_status("InProgress")
+    )
+
+    # act
+    listener("MODIFIED", edag_run("InProgress", {"step1": "job1"}))
+    listener("MODIFIED", edag_run("Succeeded", {"step1": "job1"}))
+    events = await collect(run_status_broadcaster.stream(subscription), 3)
+
+    # assert
+    assert len(events) == 2
+    assert '"state":"Succeeded"' in events[0]
+    assert events[1].startswith("event: complete\n")
+
+
+async def test_should_end_stream_when_run_deleted() -> None:
+    # arrange
+    run_status_broadcaster, listener = broadcaster()
+    subscription = run_status_broadcaster.subscribe(
+        "myedag-abcde", "a@example.com", run_status("InProgress")
+    )
+    stream = run_status_broadcaster.stream(subscription)
+
+    # act
+    listener("DELETED", edag_run("InProgress", {}))
+    events = await asyncio.wait_for(collect(stream, 1), timeout=1)
+
+    # assert
+    assert events == []
+    assert not run_status_broadcaster._subscriptions
+
+
+async def test_should_cap_streams_per_user(monkeypatch: pytest.MonkeyPatch) -> None:
+    # arrange
+    monkeypatch.setattr(settings, "RUN_STATUS_STREAMS_PER_USER", 1)
+    run_status_broadcaster, _ = broadcaster()
+    status = run_status("InProgress")
+    subscription = run_status_broadcaster.subscribe(
+        "myedag-abcde", "a@example.com", status
+    )
+
+    # act
+    with pytest.raises(TooManyStreamsError):
+        run_status_broadcaster.subscribe("myedag-abcde", "a@example.com", status)
+    run_status_broadcaster.unsubscribe(subscription)
+
+    # assert
+    run_status_broadcaster.subscribe("myedag-abcde", "a@example.com", status)
+
+
+async def test_should_release_stream_when_client_leaves_before_body(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    # arrange
+    monkeypatch.setattr(settings, "RUN_STATUS_STREAMS_PER_USER", 1)
+    run_status_broadcaster, _ = broadcaster()
+    status = run_status("InProgress")
+    subscription = run_status_broadcaster.subscribe(
+        "myedag-abcde", "a@example.com", status
+    )
+    response = RunStatusStreamResponse(run_status_broadcaster, subscription)
+
+    async def receive() -> dict:
+        return {"type": "http.disconnect"}
+
+    async def send(message: dict) -> None:
+        # Client is gone before the response starts, so the body never runs
+        await asyncio.Event().wait()
+
+    # act
+    await response({"type": "http"}, receive, send)
+
+    # assert
+    run_status_broadcaster.subscribe("myedag-abcde", "a@example.com", status)
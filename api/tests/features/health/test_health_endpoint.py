@@ -4,6 +4,33 @@ from httpx import AsyncClient
 pytestmark = pytest.mark.anyio
 
 
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
 def test_health_endpoint(async_client: AsyncClient):
     response = async_client.get("/health")
     assert response.status_code == 200
+
+
+async def test_ready_endpoint_should_return_503_until_auth_ready(
+    async_client: AsyncClient, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr("auth.validator._token_validator", None)
+
+    response = await async_client.get("/ready")
+
+    assert response.status_code == 503
+    assert response.json()["status"] == "initialising"
+
+
+async def test_ready_endpoint_should_return_200_once_auth_ready(
+    async_client: AsyncClient, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr("auth.validator._token_validator", object())
+
+    response = await async_client.get("/ready")
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "ready"
@@ -0,0 +1,74 @@
+import pytest
+from httpx import AsyncClient
+from prometheus_client import CONTENT_TYPE_LATEST
+
+from app import app
+from auth.token_cache import get_token_cache
+from features.graph.exceptions import EDAGNotFoundError
+from features.graph.services import EDAGServices
+from models.edag import EDAGResponse
+
+pytestmark = pytest.mark.asyncio
+
+
+def sample(exposition: str, series: str) -> float:
+    for line in exposition.splitlines():
+        if line.startswith(series + " "):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"{series} not exported")
+
+
+async def test_should_time_requests_by_route_template(async_client: AsyncClient):
+    class MockEdagServices(EDAGServices):
+        async def get_edag(self, edag_name: str) -> EDAGResponse:
+            raise EDAGNotFoundError(edag_name)
+
+    app.dependency_overrides[EDAGServices] = MockEdagServices
+    await async_client.get("/api/v1/edag/myedag")
+    await async_client.get("/not-a-route")
+
+    resp = await async_client.get("/metrics")
+
+    assert resp.status_code == 200
+    assert resp.headers["content-type"] == CONTENT_TYPE_LATEST
+    route_series = (
+        "http_request_duration_seconds_count"
+        '{method="GET",route="/api/v1/edag/{edagname}",status="404"}'
+    )
+    unmatched_series = (
+        "http_request_duration_seconds_count"
+        '{method="GET",route="unmatched",status="404"}'
+    )
+    assert sample(resp.text, route_series) >= 1
+    assert sample(resp.text, unmatched_series) >= 1
+    assert "myedag" not in resp.text
+
+
+async def test_should_export_token_cache_lookups(async_client: AsyncClient):
+    get_token_cache().get("token", jwks_version=1)
+
+    resp = await async_client.get("/metrics")
+
+    series = 'auth_token_cache_lookups_total{result="miss"}'
+    assert sample(resp.text, series) == get_token_cache().misses
+
+
+async def test_should_export_token_cache_size_and_evictions(async_client: AsyncClient):
+    resp = await async_client.get("/metrics")
+
+    stats = get_token_cache().stats()
+    assert sample(resp.text, "auth_token_cache_evictions_total") == stats.evictions
+    assert sample(resp.text, "auth_token_cache_entries") == stats.size
+
+
+async def test_should_export_latency_buckets_below_default(async_client: AsyncClient):
+    await async_client.get("/not-a-route")
+
+    resp = await async_client.get("/metrics")
+
+    series = (
+        "http_request_duration_seconds_bucket"
+        '{le="+Inf",method="GET",route="unmatched",status="404"}'
+    )
+    assert sample(resp.text, series) >= 1
+    assert 'le="0.0005"' in resp.text
@@ -0,0 +1,121 @@
+import asyncio
+import re
+
+import pytest
+from fastapi.security import SecurityScopes
+from httpx import AsyncClient
+
+from app import app
+from auth.security import RBACSecurity
+from features.profiling.middleware import ProfilingMiddleware
+from features.profiling.profiler import (
+    ProfileSession,
+    SamplingProfiler,
+    get_profile_session,
+    set_profile_session,
+)
+from models.auth import Role, User
+from settings import settings
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture
+def admin_client(async_client: AsyncClient, mock_user: User) -> AsyncClient:
+    admin = mock_user.model_copy(update={"roles": [Role.KICKPLATE_ADMIN]})
+    app.dependency_overrides[RBACSecurity.verify] = lambda: admin
+    return async_client
+
+
+@pytest.fixture(autouse=True)
+def fast_sampling(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "PROFILE_SAMPLE_INTERVAL_SECONDS", 0.001)
+
+
+async def test_should_return_collapsed_stacks(admin_client: AsyncClient) -> None:
+    resp = await admin_client.post("/api/v1/profile/", params={"seconds": 0.05})
+
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+    lines = resp.text.splitlines()
+    assert lines
+    assert all(re.fullmatch(r"[^ ].*;.* \d+", line) for line in lines)
+    assert any(line.startswith("MainThread;") for line in lines)
+    assert get_profile_session() is None
+
+
+async def test_should_only_profile_for_admins(
+    async_client: AsyncClient, mock_user: User
+) -> None:
+    def verify(security_scopes: SecurityScopes) -> User:
+        return RBACSecurity.verify(security_scopes, mock_user)
+
+    app.dependency_overrides[RBACSecurity.verify] = verify
+
+    resp = await async_client.post("/api/v1/profile/", params={"seconds": 0.01})
+
+    assert resp.status_code == 403
+
+
+async def test_should_return_409_if_already_profiling(
+    admin_client: AsyncClient,
+) -> None:
+    set_profile_session(ProfileSession(1))
+    try:
+        resp = await admin_client.post("/api/v1/profile/", params={"seconds": 0.01})
+    finally:
+        set_profile_session(None)
+
+    assert resp.status_code == 409
+
+
+async def test_should_return_422_on_unknown_route(admin_client: AsyncClient) -> None:
+    resp = await admin_client.post(
+        "/api/v1/profile/", params={"seconds": 0.01, "route": "/not/a/route"}
+    )
+
+    assert resp.status_code == 422
+
+
+async def test_should_only_sample_while_matching_requests_are_in_flight() -> None:
+    # arrange
+    session = ProfileSession(0.001, header="X-Profile")
+    in_flight_during_request = []
+
+    async def downstream(scope, receive, send) -> None:
+        in_flight_during_request.append(session.in_flight)
+
+    middleware = ProfilingMiddleware(downstream)
+    set_profile_session(session)
+
+    # act
+    try:
+        await middleware(
+            {"type": "http", "path": "/", "headers": [(b"x-profile", b"1")]},
+            None,
+            None,
+        )
+        await middleware({"type": "http", "path": "/", "headers": []}, None, None)
+    finally:
+        set_profile_session(None)
+
+    # assert
+    assert in_flight_during_request == [1, 0]
+    assert session.in_flight == 0
+    assert not session.profiler._should_sample()
+
+
+async def test_should_not_sample_after_stopping() -> None:
+    # arrange
+    profiler = SamplingProfiler(0.001)
+    profiler.start()
+    await asyncio.sleep(0.02)
+
+    # act
+    profiler.stop()
+    samples = sum(profiler.stacks.values())
+    await asyncio.sleep(0.01)
+
+    # assert
+    assert samples > 0
+    assert sum(profiler.stacks.values()) == samples
@@ -0,0 +1,101 @@
+import json
+from typing import Any
+from unittest.mock import MagicMock, Mock
+
+import pytest
+from httpx import AsyncClient
+from kr8s import Api
+from opentelemetry import trace
+
+from app import app
+from entity_builders.edag import EDAGBuilder
+from entity_builders.edagrun import EDAGRunBuilder
+from external.informer import ResourceInformer
+from external.kubernetes import KubernetesClient
+from features.graph.services import EDAGServices
+from models.edagrun import EDAG_RUN_TRACEPARENT_ANNOTATION
+from tracing import current_traceparent
+
+sdk_trace = pytest.importorskip("opentelemetry.sdk.trace")
+sdk_export = pytest.importorskip("opentelemetry.sdk.trace.export")
+in_memory = pytest.importorskip(
+    "opentelemetry.sdk.trace.export.in_memory_span_exporter"
+)
+
+pytestmark = pytest.mark.asyncio
+
+_INCOMING_TRACE_ID = "0af7651916cd43dd8448eb211c80319c"
+
+
+@pytest.fixture(scope="module")
+def exporter() -> Any:
+    # The global provider can only be set once, so later modules share it
+    exporter = in_memory.InMemorySpanExporter()
+    provider = trace.get_tracer_provider()
+    if not isinstance(provider, sdk_trace.TracerProvider):
+        provider = sdk_trace.TracerProvider()
+        trace.set_tracer_provider(provider)
+    provider.add_span_processor(sdk_export.SimpleSpanProcessor(exporter))
+    return exporter
+
+
+@pytest.fixture
+def spans(exporter: Any) -> Any:
+    exporter.clear()
+    return exporter
+
+
+def unsynced_informer() -> Mock:
+    informer = Mock(spec=ResourceInformer)
+    informer.synced = False
+    return informer
+
+
+async def test_should_trace_run_trigger_across_layers(
+    async_client: AsyncClient, spans: Any
+) -> None:
+    # arrange
+    mock_api = MagicMock(spec=Api)
+    mock_response = Mock(status_code=200)
+    mock_response.json.return_value = {
+        "metadata": {"name": "myedag-fdsuihgiu", "uid": "12345"}
+    }
+    mock_api.call_api.return_value.__aenter__.return_value = mock_response
+    kubernetes_client = KubernetesClient(mock_api)
+    app.dependency_overrides[EDAGServices] = lambda: EDAGServices(
+        kubernetes_client,
+        EDAGBuilder(),
+        EDAGRunBuilder(),
+        unsynced_informer(),
+        unsynced_informer(),
+    )
+
+    # act
+    resp = await async_client.post(
+        "/api/v1/edag/myedag/run",
+        headers={"traceparent": f"00-{_INCOMING_TRACE_ID}-b7ad6b7169203331-01"},
+    )
+
+    # assert
+    assert resp.status_code == 200
+    finished = {span.name: span for span in spans.get_finished_spans()}
+    server = finished["POST /api/v1/edag/{edagname}/run"]
+    create_run = finished["EDAGServices._create_edag_run"]
+    assert format(server.context.trace_id, "032x") == _INCOMING_TRACE_ID
+    assert finished["EDAGServices._get_edag_uid"].parent.span_id == (
+        finished["EDAGServices.run_edag"].context.span_id
+    )
+    assert finished["Kubernetes POST"].parent.span_id == create_run.context.span_id
+    assert {span.context.trace_id for span in finished.values()} == {
+        server.context.trace_id
+    }
+
+    manifest = json.loads(mock_api.call_api.call_args_list[-1].kwargs["data"])
+    traceparent = manifest["metadata"]["annotations"][EDAG_RUN_TRACEPARENT_ANNOTATION]
+    assert traceparent == (
+        f"00-{_INCOMING_TRACE_ID}-{create_run.context.span_id:016x}-01"
+    )
+
+
+async def test_should_have_no_traceparent_outside_a_span(spans: Any) -> None:
+    assert current_traceparent() is None
@@ -0,0 +1,41 @@
+import functools
+import inspect
+from typing import Any, Callable, TypeVar, cast
+
+from opentelemetry import propagate, trace
+
+# Only the OpenTelemetry API is used here, spans are no-ops until a deployment
+# installs and configures an SDK tracer provider
+tracer = trace.get_tracer("kickplate.api")
+
+_Function = TypeVar("_Function", bound=Callable[..., Any])
+
+
+def traced(name: str) -> Callable[[_Function], _Function]:
+    """Run the decorated function, sync or async, in a span called name"""
+
+    def decorator(function: _Function) -> _Function:
+        if inspect.iscoroutinefunction(function):
+
+            @functools.wraps(function)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                with tracer.start_as_current_span(name):
+                    return await function(*args, **kwargs)
+
+            return cast(_Function, async_wrapper)
+
+        @functools.wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with tracer.start_as_current_span(name):
+                return function(*args, **kwargs)
+
+        return cast(_Function, wrapper)
+
+    return decorator
+
+
+def current_traceparent() -> str | None:
+    """W3C traceparent of the current span, None outside a sampled trace"""
+    carrier: dict[str, str] = {}
+    propagate.inject(carrier)
+    return carrier.get("traceparent")